@@ -1,43 +1,152 @@
 import streamlit as st
-import svgwrite
-import random
-import tempfile
-import json
+import math
+import os
 from settings import settings_component
-from bubbles import generate_bubbles
-from splotches import generate_splotches
-from filters import generate_filters
-from waves import generate_waves
+from render import to_svg, compress_svg, draft_config
+from presets import PresetStore, ThumbnailRenderer
+from cache import RenderCache, config_key
+from background import BackgroundRenderer
+from concurrent.futures import ThreadPoolExecutor
+from profiling import profile, span
+import stages
+
+st.set_page_config(layout="wide")
 
 ################# PRESET DEFINITION #################
-with open('presets.json', 'r') as file:
-   presets = json.load(file)
+# indexed once per server instead of on every run. set BUBBLES_PRESETS to a directory to use a whole library of presets,
+# edits show up once the cache is cleared (streamlit's menu)
+@st.cache_resource
+def get_preset_store():
+    return PresetStore(os.environ.get("BUBBLES_PRESETS", "presets.json"))
 
-################# SIDEBAR CONFIGURATION #################
-st.set_page_config(layout="wide")
-C = {} # config is used EVERYWHERE, thus the shorthand...
-OTHER_CONFIG = {}
-sp = settings_component(C, OTHER_CONFIG, presets)
-
-################# MAIN BODY #################
-# set up the drawing environment
-random.seed(C["SEED"])
-dwg = svgwrite.Drawing(size=(C['W'], C['H']))
-
-# add the default background 
-if C["HAS_BACKGROUND"]:
-    bg_rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=C["BACKGROUND_COLOR"].strip().lower())
-    dwg.add(bg_rect)
-
-if C["MODULE"] == "Bubbles": dwg = generate_bubbles(dwg, C, OTHER_CONFIG)
-if C["MODULE"] == "Filters": dwg = generate_filters(dwg, C, OTHER_CONFIG)
-if C["MODULE"] == "Waves": dwg = generate_waves(dwg, C, OTHER_CONFIG)
-if C["MODULE"] == "Splotches": dwg = generate_splotches(dwg, C, OTHER_CONFIG)
-if C["MODULE"] == "Radial Waves": st.info("Radial waves coming soon!") # TODO
-
-# Display output as an image
-with tempfile.NamedTemporaryFile(delete=False, suffix=".svg") as tmpfile:
-    dwg.saveas(tmpfile.name)
-    st.image(tmpfile.name)
-    
-    
+store = get_preset_store()
+
+################# RENDER CACHE #################
+# shared by all sessions. set BUBBLES_CACHE_DIR to also keep renders on disk
+@st.cache_resource
+def get_render_cache():
+    return RenderCache(directory=os.environ.get("BUBBLES_CACHE_DIR"))
+
+cache = get_render_cache()
+
+################# BACKGROUND RENDERS #################
+# full previews render on a pool shared by all sessions, each session only ever runs its latest config
+@st.cache_resource
+def get_render_pool():
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="preview")
+
+if "renderer" not in st.session_state: st.session_state.renderer = BackgroundRenderer(get_render_pool())
+
+# thumbnails of the preset gallery render on the same pool
+@st.cache_resource
+def get_thumbnails():
+    return ThumbnailRenderer(get_render_pool())
+
+thumbnails = get_thumbnails()
+
+@st.fragment(run_every=0.25)
+def wait_for_full_render(future):
+    # runs until the full render is in the cache, then reruns the page to show it
+    if future.done(): st.rerun()
+    st.caption("Draft preview without filters, shadows, noise and animation, the full one is on its way...")
+
+# the profiling toggles sit at the end of the sidebar, their values are known from the interaction that caused this run
+with profile(st.session_state.get("profile", False), st.session_state.get("profile_memory", False)) as profiler:
+    ################# SIDEBAR CONFIGURATION #################
+    C = {} # config is used EVERYWHERE, thus the shorthand...
+    OTHER_CONFIG = {}
+    with span("settings"): sp = settings_component(C, OTHER_CONFIG, store)
+
+    ################# MAIN BODY #################
+    # set up the drawing environment, the background and the graphic itself, unless this exact config was rendered before.
+    # otherwise a draft is shown while the full render runs in the background, unless there's nothing to leave out.
+    # profiled runs always render right away (and compute every stage, see stages.run_stages), so that every stage shows up
+    pending = None
+    with span("render"):
+        key, draft = config_key(C, OTHER_CONFIG), draft_config(C)
+        if profiler is not None: svg = to_svg(C, OTHER_CONFIG)
+        elif draft == C: svg = cache.get_or_render(key, lambda: to_svg(C, OTHER_CONFIG))
+        else:
+            svg = cache.get(key)
+            if svg is None:
+                def render_full():
+                    full = to_svg(C, OTHER_CONFIG)
+                    cache.put(key, full)
+                    return full
+                # the draft goes first, the full render would only slow it down. submitting cancels the previous config's render
+                svg = cache.get_or_render(config_key(draft, OTHER_CONFIG), lambda: to_svg(draft, OTHER_CONFIG))
+                pending = st.session_state.renderer.submit(key, render_full)
+                if pending.done(): svg, pending = pending.result(), None
+    if C["MODULE"] == "Radial Waves": st.info("Radial waves coming soon!") # TODO
+
+    stats = cache.stats()
+    st.sidebar.caption(f"Render cache: {stats['hits'] + stats['disk_hits']} hits ({stats['disk_hits']} from disk), {stats['misses']} misses")
+    if stages.STAGE_CACHE is not None:
+        stats = stages.STAGE_CACHE.stats()
+        st.sidebar.caption(f"Reused stages: {stats['hits']} of {stats['hits'] + stats['misses']}")
+
+    # Display output as an image, straight from memory (streamlit embeds SVG strings as data URLs)
+    with span("display"): st.image(svg)
+
+    # offer the file itself, gzipped if asked to (worth it for large animated outputs). drafts aren't worth downloading
+    file_name = sp["name"].lower().replace(" ", "-")
+    if pending is not None: wait_for_full_render(pending)
+    elif st.checkbox("Compress download (.svgz)", value=len(svg) > 1024 * 1024, help="gzip the SVG, most useful for large animated outputs"):
+        with span("compress"): st.download_button("Download", compress_svg(svg), file_name=f"{file_name}.svgz", mime="image/svg+xml")
+    else:
+        st.download_button("Download", svg, file_name=f"{file_name}.svg", mime="image/svg+xml")
+
+################# PRESET GALLERY #################
+GALLERY_COLUMNS = 4
+GALLERY_PAGE_SIZE = 6 * GALLERY_COLUMNS
+
+def choose_preset(name):
+    st.session_state.preset = name
+
+def thumbnail_pending(name):
+    try:
+        return thumbnails.request(store.get(name)) is None
+    except Exception:
+        return False # failed thumbnails are shown as errors, nothing to wait for
+
+@st.fragment(run_every=0.5)
+def wait_for_thumbnails(names):
+    # runs until the page's thumbnails are done, then reruns the page to show them
+    if not any(thumbnail_pending(name) for name in names): st.rerun()
+
+st.sidebar.header("Presets")
+if st.sidebar.toggle("Show Preset Gallery", key="gallery", help="thumbnails of all presets, click one to open it"):
+    st.header("Preset Gallery")
+    module_filter, tag_filter, page_filter = st.columns(3)
+    module = module_filter.selectbox("Module", [None] + store.modules(), format_func=lambda module: module or "All")
+    tag = tag_filter.selectbox("Tag", [None] + store.tags(), format_func=lambda tag: tag or "All")
+    names = store.names(module, tag)
+    pages = max(1, math.ceil(len(names) / GALLERY_PAGE_SIZE))
+    page = page_filter.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+    page_names = names[(page - 1) * GALLERY_PAGE_SIZE:page * GALLERY_PAGE_SIZE]
+
+    for row in range(0, len(page_names), GALLERY_COLUMNS):
+        for column, name in zip(st.columns(GALLERY_COLUMNS), page_names[row:row + GALLERY_COLUMNS]):
+            try:
+                thumbnail = thumbnails.request(store.get(name))
+                if thumbnail is None: column.caption("Rendering thumbnail...")
+                else: column.image(thumbnail)
+            except Exception as error:
+                column.error(str(error))
+            column.button(name, key=f"gallery-{name}", on_click=choose_preset, args=(name,), use_container_width=True)
+
+    # the next page is rendered ahead, so it's ready when it's turned to
+    if any(thumbnail_pending(name) for name in page_names): wait_for_thumbnails(page_names)
+    else:
+        for name in names[page * GALLERY_PAGE_SIZE:(page + 1) * GALLERY_PAGE_SIZE]: thumbnail_pending(name)
+
+################# PROFILING #################
+st.sidebar.header("Profiling")
+st.sidebar.toggle("Profile Rendering", key="profile", help="time every stage of the next runs, they bypass the render cache")
+if profiler is not None:
+    st.sidebar.checkbox("Trace Memory (slower)", key="profile_memory", help="also count the bytes each stage allocates")
+    with st.sidebar.expander("Stages", expanded=True):
+        rows = [{"stage": "\u2003" * total["depth"] + total["name"].split(" / ")[-1], "ms": round(total["seconds"] * 1000, 1), "calls": total["calls"], "blocks": total["blocks"]}
+                | ({"KiB": round(total["bytes"] / 1024, 1)} if "bytes" in total else {}) for total in profiler.totals()]
+        st.dataframe(rows, hide_index=True)
+        st.download_button("Download Profile (JSON)", profiler.to_json(), file_name=f"{file_name}-profile.json", mime="application/json")
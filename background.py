@@ -0,0 +1,59 @@
+import threading
+from contextvars import ContextVar
+
+# the cancellation flag of the render running in this thread, None for everything but background renders.
+# a context variable like profiling.current, so a render only ever sees its own flag
+current = ContextVar("cancelled", default=None)
+
+class Cancelled(Exception):
+    """Raised within a background render that was replaced by a newer one."""
+
+def checkpoint():
+    # a point at which a background render stops if it's no longer wanted. costs one lookup otherwise
+    cancelled = current.get()
+    if cancelled is not None and cancelled.is_set(): raise Cancelled()
+
+def run(cancelled, render):
+    token = current.set(cancelled)
+    try:
+        return render()
+    finally:
+        current.reset(token)
+
+class BackgroundRenderer:
+    """
+    Runs one render at a time for a session on a shared thread pool, e.g. the app's full preview while a draft is shown.
+
+    Submitting a different render cancels the previous one: it's dropped if it hasn't started yet, otherwise it raises
+    Cancelled at its next checkpoint() (between stages and passes of the render).
+
+    Args:
+        executor (concurrent.futures.Executor): The pool renders run on, threads as the flag is shared in memory.
+    """
+    def __init__(self, executor):
+        self.executor = executor
+        self.lock = threading.Lock()
+        self.key = None
+        self.future = None
+        self.cancelled = None
+
+    def submit(self, key, render):
+        """
+        Start render (a function without arguments) unless the render for key is already running or done.
+
+        Returns:
+            concurrent.futures.Future: The render's future, raising Cancelled if it got replaced before it was done.
+        """
+        with self.lock:
+            if key == self.key: return self.future
+            self._cancel()
+            self.key, self.cancelled = key, threading.Event()
+            self.future = self.executor.submit(run, self.cancelled, render)
+            return self.future
+
+    def _cancel(self):
+        # stop the current render, if any. callers hold the lock
+        if self.future is None: return
+        self.cancelled.set()
+        self.future.cancel()
+        self.key = self.future = self.cancelled = None
@@ -0,0 +1,205 @@
+import base64
+import io
+import itertools
+import math
+import re
+import numpy as np
+import raster
+import smil
+
+# primitives that make an image from their attributes alone, without reading an input
+GENERATORS = {"feTurbulence", "feFlood", "feImage"}
+
+# all filters together bake at most this many canvases of pixels, the rest stay live. every canvas of noise adds
+# up to a megabyte to the SVG and seconds to the render
+MAX_BAKED_CANVASES = 1
+
+# filters whose images would be larger than this (as data: URIs) stay live, they'd cost more to download than to compute
+MAX_IMAGE_BYTES = 1024 * 1024
+
+# rows of pixels baked first to estimate how large a filter's images would be, see bake_filter
+TRIAL_ROWS = 32
+
+# baked results that are opaque everywhere (e.g. lighting) are embedded as JPEG, which is a lot smaller for noise
+JPEG_QUALITY = 92
+
+def is_animated(element):
+    return any(child.elementname in smil.ANIMATIONS or is_animated(child) for child in element.elements)
+
+def inputs(primitive):
+    # the results a primitive reads, None being the previous primitive's result (SourceGraphic for the first)
+    a = primitive.attribs
+    if primitive.elementname in GENERATORS: return []
+    if primitive.elementname == "feMerge": return [node.attribs.get("in") for node in primitive.elements]
+    return [a.get("in")] + ([a.get("in2")] if primitive.elementname in raster.TWO_INPUTS else [])
+
+def static_prefix(primitives):
+    """
+    Number of leading primitives whose results neither depend on the filtered element nor change over time,
+    e.g. an feTurbulence and the lighting of it by a light that isn't animated.
+    """
+    results = set()
+    for index, primitive in enumerate(primitives):
+        static_inputs = all(name in results if name is not None else index > 0 for name in inputs(primitive))
+        if not static_inputs or not raster.supported(primitive) or is_animated(primitive): return index
+        if primitive.attribs.get("result"): results.add(primitive.attribs["result"])
+    return len(primitives)
+
+def baked_results(primitives, count):
+    # results of the first count primitives that the rest of the chain reads, the implicitly read one last.
+    # None stands for the unnamed result of the whole chain
+    prefix, rest = primitives[:count], primitives[count:]
+    last = prefix[-1].attribs.get("result")
+    if not rest: return [last]
+    names = {primitive.attribs["result"] for primitive in prefix if primitive.attribs.get("result")}
+    needed = list(dict.fromkeys(name for primitive in rest for name in inputs(primitive) if name in names))
+    if None in inputs(rest[0]):
+        if last is None:
+            last = "baked"
+            prefix[-1].attribs["result"] = last
+        needed = [name for name in needed if name != last] + [last]
+    return needed
+
+def filter_users(element, users, transformed=False):
+    # elements referencing each filter id, and whether they (or a group they're in) are transformed
+    for child in element.elements:
+        if child.elementname == "defs": continue
+        moved = transformed or "transform" in child.attribs or any(node.elementname == "animateTransform" for node in child.elements)
+        reference = re.fullmatch(r"url\(#(.+)\)", str(child.attribs.get("filter", "")).strip())
+        if reference: users.setdefault(reference.group(1), []).append((child, moved))
+        filter_users(child, users, moved)
+
+def element_states(element):
+    # the element at every combination of its animations' key values. shapes only move between key values,
+    # so the bounding boxes of the states hold the element's bounding box at any time
+    animations = [child for child in element.elements if child.elementname == "animate" and child.attribs.get("attributeName")]
+    for values in itertools.product(*(smil.animation_values(animation) for animation in animations)):
+        state = smil.sample(element, -math.inf) # before anything begins, i.e. the static attributes
+        for animation, value in zip(animations, values): state.attribs[animation.attribs["attributeName"]] = value
+        yield state
+
+def bake_region(filter_element, users, size):
+    """
+    The part of the user space the filter ever renders to, (x0, y0, x1, y1) in user units.
+
+    Untransformed elements are only visible on the canvas, so their regions are clipped to it. None if an element
+    isn't a shape (e.g. a filtered group), whose region isn't known here.
+    """
+    boxes = []
+    for element, transformed in users:
+        for state in element_states(element):
+            subpaths = raster.element_path(state, size)
+            if subpaths is None: return None
+            if not subpaths: continue
+            x, y, width, height = raster.filter_region(filter_element, raster.bounds(subpaths), size)
+            box = (x, y, x + width, y + height)
+            if not transformed: box = (max(box[0], 0), max(box[1], 0), min(box[2], size[0]), min(box[3], size[1]))
+            if box[0] < box[2] and box[1] < box[3]: boxes.append(box)
+    if not boxes: return None
+    boxes = np.array(boxes)
+    return (*boxes[:, :2].min(axis=0), *boxes[:, 2:].max(axis=0))
+
+def image_href(layer, linear):
+    # data: URI of a premultiplied layer. images are sRGB, browsers convert them back to linearRGB for the filter
+    from PIL import Image # only needed for baking
+    pixels = raster.to_pixels(raster.convert(layer, raster.TO_SRGB) if linear else layer)
+    buffer = io.BytesIO()
+    if (pixels[..., 3] == 255).all():
+        Image.fromarray(pixels[..., :3], "RGB").save(buffer, format="JPEG", quality=JPEG_QUALITY)
+        mime = "image/jpeg"
+    else:
+        Image.fromarray(pixels, "RGBA").save(buffer, format="PNG", optimize=True)
+        mime = "image/png"
+    return f"data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+def render_layers(primitives, names, linear, scale, box):
+    # the named results (None for the last one) of static primitives over the pixels box (left, top, right, bottom),
+    # rendered with a margin for what e.g. an feOffset shifts in from outside
+    left, top, right, bottom = box
+    margin = math.ceil(raster.filter_margin(primitives) * scale)
+    source = np.zeros((bottom - top + 2 * margin, right - left + 2 * margin, 4), dtype=np.float32)
+    results, last = raster.run_primitives(primitives, source, scale, (top - margin, left - margin), linear)
+    return [(results[name] if name is not None else last)[margin:margin + bottom - top, margin:margin + right - left] for name in names]
+
+def bake_filter(filter_element, users, size, scale=1.0, max_area=math.inf, max_bytes=MAX_IMAGE_BYTES):
+    """
+    Replace the static start of a filter chain (see static_prefix) with feImages of the results the rest reads.
+
+    Args:
+        max_area (float): Pixels that may still be embedded, the filter stays live if its images would be larger.
+        max_bytes (int): Size an image's data: URI may have, the filter stays live if one is larger.
+
+    Returns:
+        tuple: The number of pixels baked (0 if the filter stays live) and a description of what was done,
+        None if nothing in the filter is static.
+    """
+    name = filter_element.attribs.get("id")
+    primitives = list(filter_element.elements)
+    count = static_prefix(primitives)
+    if not count: return 0, None
+    region = bake_region(filter_element, users, size)
+    if region is None: return 0, f"left {name} live, its region isn't known"
+
+    # render on the pixel grid of the image
+    x0, y0, x1, y1 = region
+    left, top = math.floor(x0 * scale), math.floor(y0 * scale)
+    right, bottom = math.ceil(x1 * scale), math.ceil(y1 * scale)
+    area = (right - left) * (bottom - top)
+    if area > max_area: return 0, f"left {name} live, {right - left}x{bottom - top} px is more than the {max_area:.0f} px left to bake"
+    linear = filter_element.attribs.get("color-interpolation-filters", "linearRGB") != "sRGB"
+    names = baked_results(primitives, count)
+
+    # noise and its lighting look alike everywhere, so a strip across the middle compresses about like the whole image.
+    # it spans the full width because noise repeats every 256 lattice cells, which PNG finds within a row. only worth it
+    # if the image could be too large at all (not even raw RGBA fits) and the strip, margins included, is a lot cheaper
+    margin = math.ceil(raster.filter_margin(primitives[:count]) * scale)
+    if area * 4 * 4 // 3 > max_bytes and (TRIAL_ROWS + 2 * margin) * 4 < bottom - top + 2 * margin:
+        strip_top = (top + bottom - TRIAL_ROWS) // 2
+        strip = render_layers(primitives[:count], names, linear, scale, (left, strip_top, right, strip_top + TRIAL_ROWS))
+        estimate = max(len(image_href(layer, linear)) for layer in strip) * (bottom - top) // TRIAL_ROWS
+        if estimate > max_bytes: return 0, f"left {name} live, its {right - left}x{bottom - top} px image would be about {estimate // 1024} KB"
+
+    # encode everything before touching the filter, so it's left as it is if an image turns out too large after all
+    hrefs = [image_href(layer, linear) for layer in render_layers(primitives[:count], names, linear, scale, (left, top, right, bottom))]
+    largest = max(map(len, hrefs))
+    if largest > max_bytes: return 0, f"left {name} live, its {right - left}x{bottom - top} px image would be {largest // 1024} KB"
+
+    del filter_element.elements[:]
+    for result, href in zip(names, hrefs):
+        extra = {"result": result} if result is not None else {}
+        # the subregion has the aspect ratio of the image, so it isn't letterboxed
+        filter_element.feImage(href, start=(left / scale, top / scale), size=((right - left) / scale, (bottom - top) / scale), **extra)
+    filter_element.elements.extend(primitives[count:])
+    return area, f"baked {name} into {len(hrefs)} {right - left}x{bottom - top} px image{'s' if len(hrefs) > 1 else ''} ({sum(map(len, hrefs)) // 1024} KB)"
+
+def bake_filters(dwg, size, scale=1.0, max_canvases=MAX_BAKED_CANVASES, max_bytes=MAX_IMAGE_BYTES):
+    """
+    Pre-render what's static in the drawing's filters, so viewers don't recompute e.g. noise and lighting every frame.
+
+    The leading primitives that depend neither on the filtered element nor on time are rendered with raster.py and
+    embedded as an image, the rest of the chain (compositing it onto the element) stays live. The SVG gets bigger,
+    but is a lot cheaper to display, within limits: filters are baked in document order until max_canvases worth
+    of pixels are embedded, and ones whose images would be larger than max_bytes stay live.
+
+    Args:
+        dwg: The svgwrite drawing, see render.build_drawing.
+        size (tuple): The (width, height) of the drawing in user units.
+        scale (float): Pixels of the embedded images per user unit.
+        max_canvases (float): Pixels to embed for all filters together, in canvases of size * scale.
+        max_bytes (int): Size of the largest data: URI to embed.
+
+    Returns:
+        list: Descriptions of what was and wasn't baked.
+    """
+    users = {}
+    filter_users(dwg, users)
+    area_left = max_canvases * size[0] * size[1] * scale ** 2
+    log = []
+    for element in dwg.elements:
+        if element.elementname != "defs": continue
+        for definition in element.elements:
+            if definition.elementname == "filter" and definition.attribs.get("id") in users:
+                area, description = bake_filter(definition, users[definition.attribs["id"]], size, scale, area_left, max_bytes)
+                area_left -= area
+                if description: log.append(description)
+    return log
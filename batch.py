@@ -0,0 +1,102 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from render import BACKENDS, FORMATS, load_presets, resolve_config, write_svg, to_image, open_output, slugify
+
+def parse_seeds(values):
+    # accepts single seeds and inclusive ranges, e.g. ["1", "5-9"]
+    seeds = []
+    for value in values:
+        start, _, end = value.partition("-")
+        seeds.extend(range(int(start), int(end) + 1) if end else [int(start)])
+    return seeds
+
+def parse_size(value):
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height or width)
+
+def make_jobs(presets, seeds=None, sizes=None):
+    """
+    Expand presets x seeds x sizes into render jobs.
+
+    Args:
+        presets (list): Preset dicts as found in presets.json.
+        seeds (list): Seeds to render every preset with. Uses each preset's own SEED if empty.
+        sizes (list): (width, height) tuples. Uses each preset's own size if empty.
+
+    Returns:
+        list: A list of (preset, seed, size) tuples.
+    """
+    return list(product(presets, seeds or [None], sizes or [None]))
+
+def render_job(job, output_dir, backend="svgwrite", compress=False, format="svg", scale=1.0):
+    # runs in a worker process, so everything it needs comes in through the job tuple
+    preset, seed, size = job
+    start = time.perf_counter()
+    C, OTHER_CONFIG = resolve_config(preset, seed, *(size or (None, None)))
+    name = f"{slugify(preset['name'])}-{C['SEED']}-{C['W']}x{C['H']}"
+    if format != "svg":
+        path = os.path.join(output_dir, f"{name}.{format}")
+        with open(path, 'wb') as file:
+            file.write(to_image(C, OTHER_CONFIG, scale, format))
+        return path, time.perf_counter() - start
+
+    path = os.path.join(output_dir, f"{name}.{'svgz' if compress else 'svg'}")
+    with open_output(path, compress) as file:
+        write_svg(C, OTHER_CONFIG, file, backend)
+    return path, time.perf_counter() - start
+
+def run_batch(jobs, output_dir, workers=None, backend="svgwrite", compress=False, format="svg", scale=1.0):
+    """
+    Render all jobs across a process pool, yielding (path, seconds) as each job finishes.
+
+    Every job seeds its own random.Random, so the files are identical to a serial run.
+    With workers=1 the jobs run in this process, in order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if workers == 1:
+        for job in jobs:
+            yield render_job(job, output_dir, backend, compress, format, scale)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_job, job, output_dir, backend, compress, format, scale) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render presets over seed ranges and canvas sizes on all cores.")
+    parser.add_argument("--presets", default="presets.json", help="preset file to read from")
+    parser.add_argument("-p", "--preset", action="append", default=[], help="preset name to render (repeatable), defaults to all presets")
+    parser.add_argument("-s", "--seeds", nargs="+", default=[], help="seeds or inclusive seed ranges, e.g. 1 5-9")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[], help="canvas sizes, e.g. 600x600 1200x800")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("-o", "--output-dir", default="output", help="directory to write the SVG files to")
+    parser.add_argument("--backend", choices=BACKENDS, default="svgwrite", help="how the SVG is built, 'stream' keeps memory flat for huge drawings")
+    parser.add_argument("-z", "--gzip", action="store_true", help="write gzip compressed .svgz files")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="svg", help="write SVGs or rasterize to PNG/WebP images")
+    parser.add_argument("--scale", type=float, default=1.0, help="pixels per SVG unit for PNG/WebP images")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    presets = load_presets(args.presets)
+    if args.preset:
+        unknown = set(args.preset) - {preset["name"] for preset in presets}
+        if unknown: parser.error(f"unknown preset(s): {', '.join(sorted(unknown))}")
+        presets = [preset for preset in presets if preset["name"] in args.preset]
+
+    jobs = make_jobs(presets, parse_seeds(args.seeds), args.sizes)
+    start = time.perf_counter()
+    job_seconds = 0
+    for path, seconds in run_batch(jobs, args.output_dir, args.workers, args.backend, args.gzip, args.format, args.scale):
+        job_seconds += seconds
+        if not args.quiet: print(f"{seconds * 1000:8.1f} ms  {path}")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs)} images in {elapsed:.2f}s with {args.workers} worker(s): "
+          f"{len(jobs) / elapsed:.1f} images/s, {1000 * job_seconds / max(len(jobs), 1):.1f} ms/image on average")
+
+if __name__ == "__main__":
+    main()
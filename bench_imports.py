@@ -0,0 +1,75 @@
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+def app_imports(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")):
+    # the imports at the top of app.py, i.e. what it loads before the first widget. read from the file so the ui path
+    # keeps up with the app
+    with open(path, 'r', encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import): modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom): modules.append(node.module)
+        else: break
+    return f"import {', '.join(dict.fromkeys(modules))}"
+
+# what each startup path runs in a fresh interpreter
+PATHS = {
+    "baseline": "pass",
+    "headless": "import render",
+    "headless Bubbles": "import render; render.render({'MODULE': 'Bubbles'})",
+    "headless Filters": "import render; render.render({'MODULE': 'Filters'})",
+    "headless Waves": "import render; render.render({'MODULE': 'Waves'})",
+    "headless Splotches": "import render; render.render({'MODULE': 'Splotches'})",
+    "headless stream": "import render; render.render({'MODULE': 'Bubbles'}, backend='stream')",
+    "ui": app_imports(),
+}
+
+def time_path(code, runs):
+    # wall time of whole interpreter runs, so it includes what -X importtime can't see (e.g. site, native libs)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def heaviest_imports(code, top=5):
+    """
+    Run code once with -X importtime.
+
+    Returns:
+        list: (cumulative microseconds, package) of the top-level imports taking the longest.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], check=True, capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "): # top-level imports only, nested ones are part of their cumulative time
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cold start cost of the headless render path and of the app.")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="interpreter starts per path, the median is reported")
+    parser.add_argument("--top", type=int, default=5, help="number of heaviest imports to list per path")
+    parser.add_argument("path", nargs="*", help=f"paths to measure, defaults to all of: {', '.join(PATHS)}")
+    args = parser.parse_args(argv)
+    unknown = set(args.path) - set(PATHS)
+    if unknown: parser.error(f"unknown path(s): {', '.join(sorted(unknown))}")
+
+    baseline = time_path(PATHS["baseline"], args.runs)
+    print(f"{'baseline':20} {baseline * 1000:8.1f} ms (bare interpreter)")
+    for name in args.path or [name for name in PATHS if name != "baseline"]:
+        seconds = time_path(PATHS[name], args.runs)
+        heaviest = ", ".join(f"{package} {microseconds / 1000:.0f}ms" for microseconds, package in heaviest_imports(PATHS[name], args.top))
+        print(f"{name:20} {seconds * 1000:8.1f} ms (+{(seconds - baseline) * 1000:.1f} ms)  {heaviest}")
+
+if __name__ == "__main__":
+    main()
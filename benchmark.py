@@ -0,0 +1,166 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import stages
+from render import load_presets, resolve_config, build_drawing
+
+# the setting holding the number of elements per graphic type, Filters always draws one
+COUNT_KEYS = {
+    "Bubbles": "NUMBER_OF_BUBBLES",
+    "Waves": "NUMBER_OF_WAVES",
+    "Splotches": "NUMBER_OF_SPLOTCHES",
+}
+
+# canvas sizes and element counts relative to each preset's own
+SIZE_FACTORS = [0.5, 1, 2]
+COUNT_FACTORS = [0.5, 1, 2]
+
+# metrics compared against the baseline, and the smallest change of each that counts as a regression.
+# the floors keep timer noise on cases taking a few milliseconds from failing the run
+METRICS = {"seconds": 0.005, "peak_memory": 64 * 1024, "bytes": 1024}
+
+def make_cases(presets, size_factors=SIZE_FACTORS, count_factors=COUNT_FACTORS):
+    """
+    Expand presets x canvas sizes x element counts into benchmark cases.
+
+    Returns:
+        list: (name, config) tuples, the name identifying the case in results and baselines. Combinations rounding
+        to the same size and count are only listed once.
+    """
+    cases, names = [], set()
+    for preset in presets:
+        count_key = COUNT_KEYS.get(preset.get("MODULE"))
+        C, _ = resolve_config(preset)
+        for size_factor in size_factors:
+            for count_factor in count_factors if count_key else [1]:
+                config = dict(preset, W=round(C['W'] * size_factor), H=round(C['H'] * size_factor))
+                name = f"{preset['name']} {config['W']}x{config['H']}"
+                if count_key:
+                    config[count_key] = max(round(C[count_key] * count_factor), 1)
+                    name += f" n={config[count_key]}"
+                # small sizes and counts can round to ones already used, those would only overwrite their results
+                if name not in names: cases.append((name, config))
+                names.add(name)
+    return cases
+
+def count_elements(element):
+    return 1 + sum(count_elements(child) for child in element.elements)
+
+def run_once(C, OTHER_CONFIG):
+    # generate and serialize, like render.to_svg does with the svgwrite backend
+    dwg = build_drawing(C, OTHER_CONFIG)
+    buffer = io.StringIO()
+    dwg.write(buffer)
+    return dwg, buffer.getvalue()
+
+def measure(config, runs=3):
+    """
+    Benchmark one config.
+
+    Args:
+        config (dict): The preset with the case's size and element count.
+        runs (int): Timed runs, the median is reported. Peak memory is measured in an extra run, as tracing slows it down.
+
+    Returns:
+        dict: seconds (wall time of generating and serializing), peak_memory (bytes allocated by Python at the peak),
+        bytes (size of the SVG), elements and defs (number of elements in the document and in its defs).
+    """
+    C, OTHER_CONFIG = resolve_config(config)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        dwg, svg = run_once(C, OTHER_CONFIG)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run_once(C, OTHER_CONFIG)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    defs = [child for child in dwg.elements if child.elementname == "defs"]
+    return {
+        "seconds": statistics.median(timings),
+        "peak_memory": peak,
+        "bytes": len(svg.encode("utf-8")),
+        "elements": count_elements(dwg),
+        "defs": sum(count_elements(definition) - 1 for definition in defs),
+    }
+
+def find_regressions(results, baseline, threshold):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (dict): Metrics per case name, see measure.
+        baseline (dict): The same for an earlier run. Cases missing from either are skipped.
+        threshold (float): Allowed relative increase, e.g. 0.2 for 20%.
+
+    Returns:
+        list: (case, metric, baseline value, new value) of every metric that grew by more than the threshold
+        (and more than the metric's floor in METRICS).
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline: continue
+        for metric, floor in METRICS.items():
+            old, new = baseline[name][metric], metrics[metric]
+            if new > old * (1 + threshold) and new - old > floor:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generating every preset at several canvas sizes and element counts.")
+    parser.add_argument("--presets", default="presets.json", help="preset file to read")
+    parser.add_argument("-p", "--preset", action="append", default=[], help="name of a preset to benchmark (repeatable), defaults to all")
+    parser.add_argument("-n", "--runs", type=int, default=3, help="timed runs per case, the median is reported")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("-b", "--baseline", default="benchmark_baseline.json", help="results of an earlier run to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline instead of comparing")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2, help="relative increase of a metric that fails the run")
+    args = parser.parse_args(argv)
+
+    # every run has to do the full work, not reuse the stages of the previous one
+    stages.STAGE_CACHE = None
+
+    presets = load_presets(args.presets)
+    unknown = set(args.preset) - {preset["name"] for preset in presets}
+    if unknown: parser.error(f"no preset(s) named {', '.join(sorted(unknown))} in {args.presets}")
+    presets = [preset for preset in presets if not args.preset or preset["name"] in args.preset]
+
+    results = {}
+    for name, config in make_cases(presets):
+        results[name] = metrics = measure(config, args.runs)
+        print(f"{name:60} {metrics['seconds'] * 1000:9.1f} ms {metrics['peak_memory'] / 2**20:8.1f} MiB "
+              f"{metrics['bytes'] / 1024:9.1f} KiB {metrics['elements']:7} elements {metrics['defs']:5} defs")
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "runs": args.runs, "results": results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"saved the baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline to store one")
+        return
+
+    with open(args.baseline, 'r') as file:
+        baseline = json.load(file)["results"]
+    regressions = find_regressions(results, baseline, args.threshold)
+    for name, metric, old, new in regressions:
+        print(f"REGRESSION {name}: {metric} {old:g} -> {new:g} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    print(f"{len(regressions)} regression(s) against {args.baseline} at a {args.threshold:.0%} threshold")
+    if regressions: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,166 @@
-import streamlit as st
 import random
 from utilities import w, h
+from defs import DefsPool
+from placement import PLACEMENTS, place
+from profiling import span
+from svgstream import Element
+from stages import Stage, run_stages
+from streams import substream, uniform, pick
+
+# fallback values for bubble settings a preset doesn't define (used by the sidebar and render.py)
+BUBBLE_DEFAULTS = {
+    "NUMBER_OF_BUBBLES": 20,
+    "INSTANCED": False,
+    "COLOR_CLASSES": 8,
+    "SIZE_CLASSES": 8,
+    "ANIMATION_CLASSES": 16,
+    "PLACEMENT": "Random",
+    "PLACEMENT_SPACING": 0.0,
+    "IS_DISTORTED": True,
+    "HAS_NOISE": False,
+    "MIN_RADIUS": 5.0,
+    "MAX_RADIUS": 30.0,
+    "HAS_GRADIENT": True,
+    "SINGLE_COLOR": False,
+    "FILL_COLOR": "#D412BC",
+    "MIN_X_DISTANCE_PERC": 0.0,
+    "MAX_X_DISTANCE_PERC": 0.0,
+    "MIN_Y_DISTANCE_PERC": 4.0,
+    "MAX_Y_DISTANCE_PERC": 20.0,
+}
 
 def bubble_settings(C, OTHER_CONFIG, sp):
+    import streamlit as st
+
     with st.sidebar.expander("General Bubble Settings"):
-            C["NUMBER_OF_BUBBLES"] = st.number_input("Number of Bubbles", min_value=1, max_value=1000, value=sp.get("NUMBER_OF_BUBBLES", 20), step=1, help="NUMBER_OF_BUBBLES")
-            C["IS_DISTORTED"] = st.checkbox("Distorted", value=sp.get("IS_DISTORTED", True), help="IS_DISTORTED")
-            C["HAS_NOISE"] = st.checkbox("Has Noise", value=sp.get("HAS_NOISE", False), help="HAS_NOISE")
+            C["INSTANCED"] = st.checkbox("Instanced (for up to 100k bubbles)", value=sp.get("INSTANCED", BUBBLE_DEFAULTS["INSTANCED"]), help="INSTANCED")
+            C["NUMBER_OF_BUBBLES"] = st.number_input("Number of Bubbles", min_value=1, max_value=100000 if C["INSTANCED"] else 1000, value=sp.get("NUMBER_OF_BUBBLES", BUBBLE_DEFAULTS["NUMBER_OF_BUBBLES"]), step=1, help="NUMBER_OF_BUBBLES")
+            if C["INSTANCED"]:
+                C["COLOR_CLASSES"] = st.number_input("Number of Bubble Colors", min_value=1, max_value=100, value=sp.get("COLOR_CLASSES", BUBBLE_DEFAULTS["COLOR_CLASSES"]), step=1, help="COLOR_CLASSES")
+                C["SIZE_CLASSES"] = st.number_input("Number of Bubble Sizes", min_value=1, max_value=100, value=sp.get("SIZE_CLASSES", BUBBLE_DEFAULTS["SIZE_CLASSES"]), step=1, help="SIZE_CLASSES")
+                C["ANIMATION_CLASSES"] = st.number_input("Number of Bubble Movements", min_value=1, max_value=100, value=sp.get("ANIMATION_CLASSES", BUBBLE_DEFAULTS["ANIMATION_CLASSES"]), step=1, help="ANIMATION_CLASSES")
+            C["IS_DISTORTED"] = st.checkbox("Distorted", value=sp.get("IS_DISTORTED", BUBBLE_DEFAULTS["IS_DISTORTED"]), help="IS_DISTORTED, instanced bubbles are distorted together in one canvas-sized filter region, so edges aren't clipped per bubble and overlaps warp as one shape" if C["INSTANCED"] else "IS_DISTORTED")
+            C["HAS_NOISE"] = st.checkbox("Has Noise", value=sp.get("HAS_NOISE", BUBBLE_DEFAULTS["HAS_NOISE"]), help="HAS_NOISE")
             
     with st.sidebar.expander("Bubble Settings"):
-        C["MIN_RADIUS"] = st.number_input("Minimum Radius (relative to canvas width)", min_value=0.0, value=sp.get("MIN_RADIUS", 5.0), step=1.0, help="MIN_RADIUS")
-        C["MAX_RADIUS"] = st.number_input("Maximum Radius (relative to canvas width)", min_value=1.0, value=sp.get("MAX_RADIUS", 30.0), step=1.0, help="MAX_RADIUS")
+        C["MIN_RADIUS"] = st.number_input("Minimum Radius (relative to canvas width)", min_value=0.0, value=sp.get("MIN_RADIUS", BUBBLE_DEFAULTS["MIN_RADIUS"]), step=1.0, help="MIN_RADIUS")
+        C["MAX_RADIUS"] = st.number_input("Maximum Radius (relative to canvas width)", min_value=1.0, value=sp.get("MAX_RADIUS", BUBBLE_DEFAULTS["MAX_RADIUS"]), step=1.0, help="MAX_RADIUS")
+        C["PLACEMENT"] = st.selectbox("Placement", PLACEMENTS, index=PLACEMENTS.index(sp.get("PLACEMENT", BUBBLE_DEFAULTS["PLACEMENT"])), help="PLACEMENT")
+        if C["PLACEMENT"] == "Poisson Disk":
+            C["PLACEMENT_SPACING"] = st.number_input("Spacing (relative to canvas width, negative to overlap)", value=sp.get("PLACEMENT_SPACING", BUBBLE_DEFAULTS["PLACEMENT_SPACING"]), step=0.5, help="PLACEMENT_SPACING")
+        else:
+            C["PLACEMENT_SPACING"] = 0.0 # only poisson disk keeps a spacing
 
     with st.sidebar.expander("Color Settings"):
-        C["HAS_GRADIENT"] = st.checkbox("Add Gradient", value=sp.get("HAS_GRADIENT", True), help="HAS_GRADIENT")
-        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", False), help="SINGLE_COLOR")
+        C["HAS_GRADIENT"] = st.checkbox("Add Gradient", value=sp.get("HAS_GRADIENT", BUBBLE_DEFAULTS["HAS_GRADIENT"]), help="HAS_GRADIENT")
+        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", BUBBLE_DEFAULTS["SINGLE_COLOR"]), help="SINGLE_COLOR")
         if (C["SINGLE_COLOR"]):
-            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", "#D412BC"), help="FILL_COLOR")
+            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", BUBBLE_DEFAULTS["FILL_COLOR"]), help="FILL_COLOR")
 
     with st.sidebar.expander("Bubble Animation Settings"):        
-        C["MIN_X_DISTANCE_PERC"] = st.number_input("Min x distance (relative to canvas width)", value=sp.get("MIN_X_DISTANCE_PERC", 0.0), step=1.0, help="MIN_X_DISTANCE_PERC")
-        C["MAX_X_DISTANCE_PERC"] = st.number_input("Max x distance (relative to canvas width)", value=sp.get("MAX_X_DISTANCE_PERC", 0.0), step=1.0, help="MAX_X_DISTANCE_PERC")
+        C["MIN_X_DISTANCE_PERC"] = st.number_input("Min x distance (relative to canvas width)", value=sp.get("MIN_X_DISTANCE_PERC", BUBBLE_DEFAULTS["MIN_X_DISTANCE_PERC"]), step=1.0, help="MIN_X_DISTANCE_PERC")
+        C["MAX_X_DISTANCE_PERC"] = st.number_input("Max x distance (relative to canvas width)", value=sp.get("MAX_X_DISTANCE_PERC", BUBBLE_DEFAULTS["MAX_X_DISTANCE_PERC"]), step=1.0, help="MAX_X_DISTANCE_PERC")
         st.divider()
-        C["MIN_Y_DISTANCE_PERC"] = st.number_input("Min y distance (relative to canvas height)", value=sp.get("MIN_Y_DISTANCE_PERC", 4.0), step=1.0, help="MIN_Y_DISTANCE_PERC")
-        C["MAX_Y_DISTANCE_PERC"] = st.number_input("Max y distance (relative to canvas height)", value=sp.get("MAX_Y_DISTANCE_PERC", 20.0), step=1.0, help="MAX_Y_DISTANCE_PERC")
+        C["MIN_Y_DISTANCE_PERC"] = st.number_input("Min y distance (relative to canvas height)", value=sp.get("MIN_Y_DISTANCE_PERC", BUBBLE_DEFAULTS["MIN_Y_DISTANCE_PERC"]), step=1.0, help="MIN_Y_DISTANCE_PERC")
+        C["MAX_Y_DISTANCE_PERC"] = st.number_input("Max y distance (relative to canvas height)", value=sp.get("MAX_Y_DISTANCE_PERC", BUBBLE_DEFAULTS["MAX_Y_DISTANCE_PERC"]), step=1.0, help="MAX_Y_DISTANCE_PERC")
 
-def generate_bubbles(dwg, C, OTHER_CONFIG):
-    # Define some filters
-    distort_filter = dwg.defs.add(dwg.filter(id='distortFilter'))
-    distort_filter.feTurbulence(type="fractalNoise", baseFrequency=0.05, numOctaves=10, result="turbulence")
-    distort_filter.feDisplacementMap(in2="turbulence", in_="SourceGraphic", scale=100)
+def bubble_layout(C, OTHER_CONFIG, seed):
+    # sizes and positions of all bubbles. instanced ones snap to one of SIZE_CLASSES sizes and join one of the animation classes.
+    # every bubble has its own numbers in each stream, so adding bubbles leaves the existing ones alone
+    radius, group = substream(seed, "radius"), substream(seed, "group")
+    n = C["NUMBER_OF_BUBBLES"]
+    if C["INSTANCED"]:
+        sizes = [C["MIN_RADIUS"] + (C["MAX_RADIUS"] - C["MIN_RADIUS"]) * (k + 0.5) / C["SIZE_CLASSES"] for k in range(C["SIZE_CLASSES"])]
+        size_classes = [int(uniform(radius, i) * len(sizes)) for i in range(n)]
+        groups = [int(uniform(group, i) * C["ANIMATION_CLASSES"]) for i in range(n)]
+        radii = [sizes[k] for k in size_classes]
+    else:
+        sizes, size_classes, groups = [], [], []
+        radii = [(C["MAX_RADIUS"] - C["MIN_RADIUS"]) * uniform(radius, i) + C["MIN_RADIUS"] for i in range(n)]
+    return {"bubbles": place_bubbles(C, radii, substream(seed, "position")), "sizes": sizes, "size_classes": size_classes, "groups": groups}
 
-    noise_filter = dwg.defs.add(dwg.filter(id='noiseFilter'))
-    noise_filter.feTurbulence(type="fractalNoise", baseFrequency=0.8, numOctaves=10, result="turbulence")
-    noise_filter.feComposite(operator="in", in_="turbulence", in2="SourceAlpha", result="composite")
-    noise_filter.feColorMatrix(in_="composite", type="luminanceToAlpha")
-    noise_filter.feBlend(in_="SourceGraphic", in2="composite", mode="multiply")
+def bubble_colors(C, OTHER_CONFIG, seed):
+    # the base color of every bubble and of the noise. instanced bubbles pick from COLOR_CLASSES evenly spaced palette colors
+    palette = [C["FILL_COLOR"]] if C["SINGLE_COLOR"] else OTHER_CONFIG["COLORS"]
+    if C["INSTANCED"]: palette = list(dict.fromkeys(palette[len(palette) * k // C["COLOR_CLASSES"]] for k in range(min(C["COLOR_CLASSES"], len(palette)))))
+    fill = substream(seed, "fill")
+    return {
+        "palette": palette,
+        "fills": [pick(palette, uniform(fill, i)) for i in range(C["NUMBER_OF_BUBBLES"])],
+        "noise": pick(OTHER_CONFIG["COLORS"], uniform(substream(seed, "noise"), 0)) if C["HAS_NOISE"] else "",
+    }
 
-    # Generate the bubbles
-    for i in range(C["NUMBER_OF_BUBBLES"]):
-        # Define the center & size of the circle
-        x = 120 * random.random() - 10
-        y = 120 * random.random() - 10
-        r = (C["MAX_RADIUS"] - C["MIN_RADIUS"]) * random.random() + C["MIN_RADIUS"]
-        base_color = C["FILL_COLOR"] if C["SINGLE_COLOR"] else random.choice(OTHER_CONFIG["COLORS"])
-        
-        # Define a linear gradient
-        gradient_id = f"gradient-{i}"
-        linear_gradient = dwg.linearGradient((0, 0), (1, 1), id=gradient_id)
-        linear_gradient.add_stop_color(0, base_color, 1)
-        linear_gradient.add_stop_color(1, base_color, 0.1)
-        dwg.defs.add(linear_gradient)
-        
-        fill_color = f'url(#{gradient_id})' if C["HAS_GRADIENT"] else base_color
+def bubble_motion(C, OTHER_CONFIG, seed):
+    # how far every bubble (or animation class when instanced) moves, relative to the canvas
+    if not C["IS_ANIMATED"]: return []
+    distance = substream(seed, "distance")
+    # the y distance starts at MIN_X_DISTANCE_PERC, not MIN_Y_DISTANCE_PERC. that's how bubbles have always moved,
+    # so it's kept (for instanced ones too) to not change the look of existing presets
+    return [((C["MAX_X_DISTANCE_PERC"] - C["MIN_X_DISTANCE_PERC"]) * uniform(distance, i, 0) + C["MIN_X_DISTANCE_PERC"],
+             (C["MAX_Y_DISTANCE_PERC"] - C["MIN_Y_DISTANCE_PERC"]) * uniform(distance, i, 1) + C["MIN_X_DISTANCE_PERC"])
+            for i in range(C["ANIMATION_CLASSES"] if C["INSTANCED"] else C["NUMBER_OF_BUBBLES"])]
+
+# the stages of generate_bubbles and the settings each of them depends on, see stages.py.
+# everything else only affects how their results are drawn, which is cheap
+BUBBLE_STAGES = [
+    Stage("layout", bubble_layout, keys=["NUMBER_OF_BUBBLES", "MIN_RADIUS", "MAX_RADIUS", "PLACEMENT", "PLACEMENT_SPACING", "W", "H", "INSTANCED", "SIZE_CLASSES", "ANIMATION_CLASSES"]),
+    Stage("colors", bubble_colors, keys=["NUMBER_OF_BUBBLES", "SINGLE_COLOR", "FILL_COLOR", "COLOR_SCHEME", "HAS_NOISE", "INSTANCED", "COLOR_CLASSES"]),
+    Stage("motion", bubble_motion, keys=["IS_ANIMATED", "NUMBER_OF_BUBBLES", "INSTANCED", "ANIMATION_CLASSES", "MIN_X_DISTANCE_PERC", "MAX_X_DISTANCE_PERC", "MIN_Y_DISTANCE_PERC", "MAX_Y_DISTANCE_PERC"]),
+]
+
+def generate_bubbles(dwg, C, OTHER_CONFIG, rng=random):
+    stages = run_stages("bubbles", BUBBLE_STAGES, C, OTHER_CONFIG, rng)
+
+    with span("defs"): get_fill = add_bubble_definitions(dwg, C)
+    with span("elements"):
+        if C["INSTANCED"]: add_instanced_bubbles(dwg, C, stages, get_fill)
+        else: add_bubbles(dwg, C, stages, get_fill)
+
+    # Add noise if required
+    if C["HAS_NOISE"]:
+        rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=stages["colors"]["noise"], fill_opacity=0.2, filter="url(#noiseFilter)")
+        dwg.add(rect)
         
+    return dwg
+
+def add_bubble_definitions(dwg, C):
+    # Define the filters that are used
+    if C["IS_DISTORTED"]:
+        distort_filter = dwg.defs.add(dwg.filter(id='distortFilter'))
+        distort_filter.feTurbulence(type="fractalNoise", baseFrequency=0.05, numOctaves=10, result="turbulence")
+        distort_filter.feDisplacementMap(in2="turbulence", in_="SourceGraphic", scale=100)
+
+    if C["HAS_NOISE"]:
+        noise_filter = dwg.defs.add(dwg.filter(id='noiseFilter'))
+        noise_filter.feTurbulence(type="fractalNoise", baseFrequency=0.8, numOctaves=10, result="turbulence")
+        noise_filter.feComposite(operator="in", in_="turbulence", in2="SourceAlpha", result="composite")
+        noise_filter.feColorMatrix(in_="composite", type="luminanceToAlpha")
+        noise_filter.feBlend(in_="SourceGraphic", in2="composite", mode="multiply")
+
+    # gradients are shared by all bubbles of the same color
+    gradients = DefsPool(dwg)
+    fills = {}
+    def get_fill(color):
+        if color not in fills:
+            fills[color] = color
+            if C["HAS_GRADIENT"]:
+                linear_gradient = dwg.linearGradient((0, 0), (1, 1))
+                linear_gradient.add_stop_color(0, color, 1)
+                linear_gradient.add_stop_color(1, color, 0.1)
+                fills[color] = f'url(#{gradients.register(linear_gradient, "gradient")})'
+        return fills[color]
+    return get_fill
+
+def add_bubbles(dwg, C, stages, get_fill):
+    # Generate the bubbles
+    for i, (x, y, r) in enumerate(stages["layout"]["bubbles"]):
         # Define the circle itself
-        circle = dwg.circle(center=(w(x, C['W']), h(y, C['H'])), r=w(r, C['W']), fill=fill_color)
+        circle = dwg.circle(center=(w(x, C['W']), h(y, C['H'])), r=w(r, C['W']), fill=get_fill(stages["colors"]["fills"][i]))
         if C["IS_DISTORTED"]:
             circle.attribs['filter'] = "url(#distortFilter)"
         
         if C["IS_ANIMATED"]:
-            distance_x = (C["MAX_X_DISTANCE_PERC"] - C["MIN_X_DISTANCE_PERC"]) * random.random() + C["MIN_X_DISTANCE_PERC"]
+            distance_x, distance_y = stages["motion"][i]
             animate_x = dwg.animate(
                 attributeName="cx",
                 dur=f"{C['ANIMATION_DURATION']}s",
@@ -71,7 +171,6 @@ def generate_bubbles(dwg, C, OTHER_CONFIG):
                 keySplines="0.42 0 0.58 1;0.42 0 0.58 1"
             )
             
-            distance_y = (C["MAX_Y_DISTANCE_PERC"] - C["MIN_Y_DISTANCE_PERC"]) * random.random() + C["MIN_X_DISTANCE_PERC"]
             animate_y = dwg.animate(
                 attributeName="cy",
                 dur=f"{C['ANIMATION_DURATION']}s",
@@ -87,9 +186,66 @@ def generate_bubbles(dwg, C, OTHER_CONFIG):
         
         dwg.add(circle)
 
-    # Add noise if required
-    if C["HAS_NOISE"]:
-        rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=random.choice(OTHER_CONFIG["COLORS"]), fill_opacity=0.2, filter="url(#noiseFilter)")
-        dwg.add(rect)
-        
-    return dwg
+def place_bubbles(C, radii, seed):
+    # (x, y, r) of bubbles with the given radii, relative to the canvas like everywhere else. they're placed in units of
+    # the canvas width on both axes though, so that their distances are the same both ways
+    aspect = C['H'] / C['W']
+    centers = place(radii, seed, (-10, -10 * aspect, 110, 110 * aspect), C["PLACEMENT"], C["PLACEMENT_SPACING"])
+    return [(x, y / aspect, r) for (x, y), r in zip(centers, radii)]
+
+def add_instanced_bubbles(dwg, C, stages, get_fill):
+    """
+    Draw the bubbles as <use>s of a few shared symbols, for counts up to 100k.
+
+    The palette is thinned out to COLOR_CLASSES evenly spaced colors and radii are snapped to SIZE_CLASSES sizes, so
+    there's one gradient per color and one symbol per color and size. Bubbles move along one of
+    ANIMATION_CLASSES paths, each a group with a single animateTransform. Definitions and animations thus only grow with
+    the number of styles, every bubble is one <use> with its position.
+
+    Distortion is applied to all of them at once, through one group with the distortFilter. That looks different
+    from the non-instanced bubbles: there's one filter region around the union of all bubbles (about the whole canvas)
+    instead of one around each bubble, so displaced edges aren't cut off at a bubble's own region and overlapping
+    bubbles are displaced as one shape. A filter per <use> would keep the look, but cost one filter evaluation per
+    bubble and defeat the instancing.
+    """
+    layout, colors = stages["layout"], stages["colors"]
+
+    # one symbol per color and size, centered on 0,0 and visible beyond its (unset) viewport
+    symbols = {}
+    for color in colors["palette"]:
+        for k, size in enumerate(layout["sizes"]):
+            symbol = dwg.symbol(id=f"bubble-{len(symbols)}", overflow="visible")
+            symbol.add(dwg.circle(center=(0, 0), r=w(size, C['W']), fill=get_fill(color)))
+            dwg.defs.add(symbol)
+            symbols[color, k] = f"#{symbol['id']}"
+
+    # one group per animation class, moving all of its bubbles the same way
+    groups = []
+    for i in range(C["ANIMATION_CLASSES"]):
+        group = dwg.g()
+        if C["IS_ANIMATED"]:
+            distance_x, distance_y = stages["motion"][i]
+            animate_translation = dwg.animateTransform(
+                transform="translate",
+                dur=f"{C['ANIMATION_DURATION']}s",
+                repeatCount="indefinite" if C["REPEAT_ANIMATION"] else 1,
+                values=f"0 0;{w(distance_x, C['W'])} {-h(distance_y, C['H'])};0 0",
+                keyTimes="0;0.5;1",
+                calcMode="spline",
+                keySplines="0.42 0 0.58 1;0.42 0 0.58 1"
+            )
+            # same svgwrite issue as the splotches' translations, the attributeName has to be set manually
+            animate_translation["attributeName"] = "transform"
+            group.add(animate_translation)
+        groups.append(group)
+
+    # the bubbles themselves, as plain elements: svgwrite's validation would take longer than everything else
+    position = f"%.{C['PATH_PRECISION']}f"
+    for (x, y, _), color, k, group in zip(layout["bubbles"], colors["fills"], layout["size_classes"], layout["groups"]):
+        groups[group].add(Element("use", x=position % w(x, C['W']), y=position % h(y, C['H']), **{"xlink:href": symbols[color, k]}))
+
+    container = dwg.g(filter="url(#distortFilter)") if C["IS_DISTORTED"] else dwg
+    for group in groups:
+        # animation classes no bubble ended up in stay out of the document
+        if any(child.elementname == "use" for child in group.elements): container.add(group)
+    if C["IS_DISTORTED"]: dwg.add(container)
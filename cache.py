@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+def config_key(C, OTHER_CONFIG):
+    # canonical hash of everything that affects the output: the config and the palette
+    canonical = json.dumps({"C": C, "COLORS": OTHER_CONFIG.get("COLORS", [])}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """
+    Two-tier cache for rendered SVGs, keyed by config_key().
+
+    Args:
+        max_entries (int): Number of renders kept in memory, least recently used ones are dropped first.
+        directory (str): Optional directory for the on-disk tier. Renders dropped from memory can be read back from there.
+        max_bytes (int): Size limit of the on-disk tier, least recently used files are deleted first.
+        max_memory (int): Optional size limit of the in-memory tier, in the units sizeof returns.
+        sizeof (function): Size of a cached value, len by default (characters of an SVG, bytes of an image).
+    """
+    def __init__(self, max_entries=64, directory=None, max_bytes=256 * 1024 * 1024, max_memory=None, sizeof=len):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_memory = max_memory
+        self.sizeof = sizeof
+        self.memory = OrderedDict()
+        self.sizes = {}
+        self.memory_size = 0
+        self.lock = threading.Lock() # the app's sessions share one cache across threads
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory: os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.svg")
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+        svg = self._read_disk(key)
+        with self.lock:
+            if svg is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, svg)
+            return svg
+
+    def put(self, key, svg):
+        with self.lock:
+            self._remember(key, svg)
+        if self.directory: self._write_disk(key, svg)
+
+    def get_or_render(self, key, render):
+        # render is a function without arguments returning the svg, only called on a miss
+        svg = self.get(key)
+        if svg is None:
+            svg = render()
+            self.put(key, svg)
+        return svg
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self.memory), "size": self.memory_size}
+
+    def _remember(self, key, svg):
+        size = self.sizeof(svg)
+        if self.max_memory is not None and size > self.max_memory: return # wouldn't fit even on its own
+        self.memory_size += size - self.sizes.get(key, 0)
+        self.memory[key] = svg
+        self.memory.move_to_end(key)
+        self.sizes[key] = size
+        while len(self.memory) > self.max_entries or (self.max_memory is not None and self.memory_size > self.max_memory):
+            oldest, _ = self.memory.popitem(last=False)
+            self.memory_size -= self.sizes.pop(oldest)
+
+    def _read_disk(self, key):
+        if not self.directory: return None
+        try:
+            with open(self._path(key), 'r', encoding="utf-8") as file:
+                svg = file.read()
+            os.utime(self._path(key)) # mark as recently used for the eviction below
+            return svg
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key, svg):
+        # write to a temporary name first so readers never see half a file
+        temp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding="utf-8") as file:
+            file.write(svg)
+        os.replace(temp_path, self._path(key))
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".svg"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass # another process got there first
+            total -= size
@@ -0,0 +1,48 @@
+from paths import short_number
+from smil import NUMBER
+from svgstream import value_to_string
+
+# attribute values that are what SVG assumes anyway, per element (None for any element)
+DEFAULTS = {
+    ("rect", "x"): "0",
+    ("rect", "y"): "0",
+    (None, "repeatCount"): "1",
+    (None, "additive"): "replace",
+    (None, "calcMode"): "linear",
+    (None, "opacity"): "1",
+    (None, "fill-opacity"): "1",
+    (None, "stroke-opacity"): "1",
+}
+
+# attributes holding coordinates, whose numbers are rounded to PATH_PRECISION
+GEOMETRY = {"transform", "cx", "cy", "r", "rx", "ry", "x", "y", "z", "width", "height", "dx", "dy", "stdDeviation"}
+
+# attributes of animations holding values of the attribute they animate, rounded if that's geometry as well.
+# path data is left alone, it's written compactly in the first place (see paths.compact_path_data)
+ANIMATION_VALUES = {"values", "from", "to", "by"}
+
+# filter primitives that only hold coordinates, the others (e.g. baseFrequency, feColorMatrix values) need their precision
+GEOMETRIC_PRIMITIVES = {"fePointLight", "feSpotLight", "feOffset", "feGaussianBlur"}
+
+def round_numbers(value, precision):
+    return NUMBER.sub(lambda match: short_number(round(float(match.group()) * 10 ** precision), precision), value)
+
+def is_default(element, name, value):
+    default = DEFAULTS.get((element.elementname, name), DEFAULTS.get((None, name)))
+    return default is not None and value_to_string(value).strip() == default
+
+def is_geometry(element, name):
+    if name in ANIMATION_VALUES: return element.elementname == "animateTransform" or element.attribs.get("attributeName") in GEOMETRY
+    return name in GEOMETRY and not (element.elementname.startswith("fe") and element.elementname not in GEOMETRIC_PRIMITIVES)
+
+def compact_attributes(element, precision=2):
+    """
+    Shorten the attributes of a drawing in place: drop the ones set to their default and round coordinates
+    (transforms, positions, sizes and their animations) to precision decimals, e.g. 137.49363689351154 to 137.49.
+    """
+    a = element.attribs
+    for name, value in list(a.items()):
+        if is_default(element, name, value): del a[name]
+        elif is_geometry(element, name): a[name] = round_numbers(value_to_string(value), precision)
+    for child in element.elements:
+        compact_attributes(child, precision)
@@ -0,0 +1,245 @@
+import argparse
+import math
+import re
+import bake
+import raster
+import smil
+from render import load_presets, resolve_config, build_drawing
+
+# rough cost of filter primitives per megapixel of filter region, relative to each other. feTurbulence is per octave
+PRIMITIVE_COSTS = {
+    "feTurbulence": 1.0,
+    "feDiffuseLighting": 2.0,
+    "feSpecularLighting": 2.0,
+    "feGaussianBlur": 3.0,
+    "feDisplacementMap": 1.0,
+    "feImage": 0.2,
+}
+DEFAULT_PRIMITIVE_COST = 0.5
+
+# per frame cost of re-tessellating one point of a morphing path, and of evaluating one animation
+POINT_COST = 0.0002
+ANIMATION_COST = 0.001
+
+def walk(element, parent=None):
+    # (element, parent) for the whole tree, depth first
+    yield element, parent
+    for child in element.elements:
+        yield from walk(child, element)
+
+def filter_definitions(dwg):
+    return {element.attribs["id"]: element for element, _ in walk(dwg) if element.elementname == "filter" and "id" in element.attribs}
+
+def filter_users(dwg):
+    # the elements referencing each defined filter, see bake.filter_users
+    definitions = filter_definitions(dwg)
+    users = {}
+    bake.filter_users(dwg, users)
+    return {filter_id: elements for filter_id, elements in users.items() if filter_id in definitions}
+
+def path_points(element):
+    # coordinate pairs of a path, counting every animated value of its d as well
+    d = " ".join(str(command) for command in getattr(element, "commands", None) or [element.attribs.get("d", "")])
+    values = [value for child in element.elements if child.attribs.get("attributeName") == "d" for value in smil.animation_values(child)]
+    return sum(len(re.findall(raster.NUMBER, str(value))) for value in [d] + values) // 2
+
+def octaves(primitive):
+    return int(raster.number(primitive.attribs.get("numOctaves", 1)))
+
+def filter_cost(filter_element):
+    # cost per megapixel of the filter region
+    total = 0.0
+    for primitive in filter_element.elements:
+        weight = PRIMITIVE_COSTS.get(primitive.elementname, DEFAULT_PRIMITIVE_COST)
+        total += weight * octaves(primitive) if primitive.elementname == "feTurbulence" else weight
+    return total
+
+def filter_area(filter_element, element, transformed, size, definitions=None):
+    # the largest filter region of an element over its animation, in pixels at 1x. untransformed ones are clipped to the canvas
+    area = 0.0
+    for state in bake.element_states(element):
+        box = raster.element_bounds(state, size, definitions)
+        if box is None: continue
+        x, y, width, height = raster.filter_region(filter_element, box, size)
+        x0, y0, x1, y1 = x, y, x + width, y + height
+        if not transformed: x0, y0, x1, y1 = max(x0, 0), max(y0, 0), min(x1, size[0]), min(y1, size[1])
+        area = max(area, max(x1 - x0, 0) * max(y1 - y0, 0))
+    return area
+
+def estimate(dwg, size):
+    """
+    Estimate what it costs a browser to display a drawing, per frame of its animation.
+
+    The weights are rough relative costs, meant for comparing drawings and setting budgets, not for predicting frame times.
+
+    Args:
+        dwg: The svgwrite drawing, see render.build_drawing.
+        size (tuple): The (width, height) of the drawing in user units.
+
+    Returns:
+        dict: filters (distinct filters in use), filtered_elements, filter_area (pixels of all filter regions at 1x),
+        octaves (turbulence octaves over all filtered elements) and max_octaves, animated_elements, path_points (incl. the
+        animated values of d) and cost, the weighted sum in megapixel operations per frame. filter_costs holds each
+        filter's share of it.
+    """
+    definitions = filter_definitions(dwg)
+    references = raster.drawing_definitions(dwg) # what <use>s in filtered groups draw
+    filter_costs = {}
+    area = 0.0
+    total_octaves = max_octaves = 0
+    users = filter_users(dwg)
+    for filter_id, elements in users.items():
+        filter_element = definitions[filter_id]
+        turbulence = [octaves(primitive) for primitive in filter_element.elements if primitive.elementname == "feTurbulence"]
+        pixels = sum(filter_area(filter_element, element, transformed, size, references) for element, transformed in elements)
+        filter_costs[filter_id] = pixels / 1e6 * filter_cost(filter_element)
+        area += pixels
+        total_octaves += sum(turbulence) * len(elements)
+        max_octaves = max([max_octaves] + turbulence)
+
+    animated = [element for element, _ in walk(dwg) if any(child.elementname in smil.ANIMATIONS for child in element.elements)]
+    animations = sum(child.elementname in smil.ANIMATIONS for element in animated for child in element.elements)
+    morphing_points = sum(path_points(element) for element in animated if element.elementname == "path")
+    return {
+        "filters": len(users),
+        "filtered_elements": sum(len(elements) for elements in users.values()),
+        "filter_area": round(area),
+        "octaves": total_octaves,
+        "max_octaves": max_octaves,
+        "animated_elements": len(animated),
+        "path_points": sum(path_points(element) for element, _ in walk(dwg) if element.elementname == "path"),
+        "cost": sum(filter_costs.values()) + morphing_points * POINT_COST + animations * ANIMATION_COST,
+        "filter_costs": filter_costs,
+    }
+
+######## budget ########
+def visible_octaves(frequency):
+    # octaves until the noise is finer than one cycle per user unit, i.e. the pixels of a 2x display
+    return max(1, math.floor(math.log2(1 / frequency)) + 1) if frequency > 0 else 1
+
+def cap_octaves(dwg):
+    changes = []
+    for filter_id, filter_element in filter_definitions(dwg).items():
+        for primitive in filter_element.elements:
+            if primitive.elementname != "feTurbulence": continue
+            frequencies = [raster.number(value) for value in str(primitive.attribs.get("baseFrequency", 0)).replace(",", " ").split()]
+            limit = visible_octaves(max(frequencies))
+            if octaves(primitive) > limit:
+                changes.append(f"capped numOctaves of {filter_id} at {limit} (was {octaves(primitive)})")
+                primitive.attribs["numOctaves"] = limit
+    return changes
+
+def reads_source_graphic(filter_element):
+    # whether the filter draws the element itself, or only an effect of it (e.g. a shadow from SourceAlpha)
+    for index, primitive in enumerate(filter_element.elements):
+        if any(name == "SourceGraphic" or (name is None and index == 0) for name in bake.inputs(primitive)): return True
+    return False
+
+def merge_shadows(dwg):
+    """
+    Draw the elements that only exist for their filter's effect (e.g. shadows) as one filtered group per filter.
+
+    One large filter region costs a lot less than many overlapping ones. Only runs of adjacent siblings are merged,
+    the group takes their place so nothing is drawn in a different order. Elements in transformed groups are left alone.
+    """
+    parents = {id(element): parent for element, parent in walk(dwg)}
+    definitions = filter_definitions(dwg)
+    changes = []
+    for filter_id, users in filter_users(dwg).items():
+        if len(users) < 2 or reads_source_graphic(definitions[filter_id]): continue
+        filtered = {id(element) for element, _ in users}
+
+        # consecutive children of the same parent that all use the filter
+        runs = []
+        for parent in {id(parents[id(element)]): parents[id(element)] for element, _ in users}.values():
+            if any("transform" in node.attribs for node in [parent, *ancestors(parent, parents)]): continue
+            run = []
+            for child in parent.elements + [None]:
+                if child is not None and id(child) in filtered: run.append(child)
+                else:
+                    if len(run) > 1: runs.append((parent, run))
+                    run = []
+
+        for parent, run in runs:
+            group = dwg.g(filter=f"url(#{filter_id})")
+            parent.elements[parent.elements.index(run[0]):parent.elements.index(run[-1]) + 1] = [group]
+            for element in run:
+                del element.attribs["filter"]
+                group.elements.append(element)
+        if runs: changes.append(f"merged {sum(len(run) for _, run in runs)} elements filtered by {filter_id} into {len(runs)} group{'s' if len(runs) > 1 else ''}")
+    return changes
+
+def ancestors(element, parents):
+    parent = parents.get(id(element))
+    while parent is not None:
+        yield parent
+        parent = parents.get(id(parent))
+
+def drawn_elements(element):
+    # how many elements a filter user stands for, the children of a group (e.g. one merge_shadows made) count one each
+    if element.elementname != "g": return 1
+    return sum(1 for child in element.elements if child.elementname not in smil.ANIMATIONS)
+
+def disable_filter(dwg, filter_id):
+    # drop a filter, along with the elements that only exist for its effect
+    parents = {id(element): parent for element, parent in walk(dwg)}
+    effect_only = not reads_source_graphic(filter_definitions(dwg)[filter_id])
+    elements = [element for element, _ in filter_users(dwg)[filter_id]]
+    for element in elements:
+        if effect_only: parents[id(element)].elements.remove(element)
+        else: del element.attribs["filter"]
+    return f"{'removed' if effect_only else 'disabled'} {filter_id} on {sum(map(drawn_elements, elements))} elements"
+
+def stop_morphing(dwg):
+    morphs = [(element, child) for element, _ in walk(dwg) for child in element.elements if child.attribs.get("attributeName") == "d"]
+    for element, animation in morphs: element.elements.remove(animation)
+    return [f"stopped {len(morphs)} path morphs"] if morphs else []
+
+def fit_budget(dwg, size, budget):
+    """
+    Degrade a drawing until its estimated cost (see estimate) fits the budget, starting with what shows the least:
+    capping turbulence octaves at what a 2x display resolves, merging shadows, then disabling filters costliest first,
+    and finally stopping path morphs.
+
+    Returns:
+        list: Descriptions of the changes made, empty if the drawing fits as is.
+    """
+    changes = []
+    for step in (cap_octaves, merge_shadows):
+        if estimate(dwg, size)["cost"] <= budget: return changes
+        changes += step(dwg)
+
+    costs = estimate(dwg, size)
+    while costs["cost"] > budget and costs["filter_costs"]:
+        changes.append(disable_filter(dwg, max(costs["filter_costs"], key=costs["filter_costs"].get)))
+        costs = estimate(dwg, size)
+
+    if costs["cost"] > budget: changes += stop_morphing(dwg)
+    return changes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate what presets cost to display, optionally degrading them to fit a budget.")
+    parser.add_argument("--presets", default="presets.json", help="preset file to read")
+    parser.add_argument("-p", "--preset", action="append", default=[], help="name of a preset to estimate (repeatable), defaults to all")
+    parser.add_argument("-b", "--budget", type=float, help="fit the drawings to this cost and list what was changed")
+    parser.add_argument("--bake", action="store_true", help="bake the filters (after fitting) and list what was and wasn't baked, see bake.py")
+    args = parser.parse_args(argv)
+
+    presets = load_presets(args.presets)
+    for preset in presets:
+        if args.preset and preset["name"] not in args.preset: continue
+        C, OTHER_CONFIG = resolve_config(preset)
+        size = (C['W'], C['H'])
+        dwg = build_drawing(C, OTHER_CONFIG)
+        costs = estimate(dwg, size)
+        print(f"{preset['name']}: cost {costs['cost']:.2f}, {costs['filters']} filters on {costs['filtered_elements']} elements "
+              f"({costs['filter_area'] / 1e6:.2f} MP, {costs['octaves']} octaves, max {costs['max_octaves']}), "
+              f"{costs['animated_elements']} animated elements, {costs['path_points']} path points")
+        if args.budget is not None:
+            for change in fit_budget(dwg, size, args.budget): print(f"    {change}")
+            print(f"    cost after fitting: {estimate(dwg, size)['cost']:.2f}")
+        if args.bake:
+            for description in bake.bake_filters(dwg, size): print(f"    {description}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+class DefsPool:
+    """
+    Content-addressed registry for reusable definitions (filters, gradients) of a drawing.
+
+    Definitions are built without an id and registered once they're complete. Identical markup
+    is written only once, everything that registers it gets the same id back.
+
+    Args:
+        dwg: The svgwrite or svgstream drawing whose defs the definitions are added to.
+    """
+    def __init__(self, dwg):
+        self.dwg = dwg
+        self.ids = {} # serialized definition -> id
+        self.counts = {} # id prefix -> number of distinct definitions so far
+
+    def register(self, element, prefix):
+        """
+        Add element to the drawing's defs unless an identical definition was added before.
+
+        Args:
+            element: The complete definition, without an id.
+            prefix (str): Readable start of the id, e.g. "gradient" gives "gradient-0", "gradient-1", ...
+
+        Returns:
+            str: The id to reference the definition by, i.e. f"url(#{id})".
+        """
+        markup = element.tostring()
+        if markup not in self.ids: self.ids[markup] = self.add(element, prefix)
+        return self.ids[markup]
+
+    def add(self, element, prefix):
+        # add a definition known to be unique (e.g. one with its own animations) without comparing its markup
+        index = self.counts.get(prefix, 0)
+        self.counts[prefix] = index + 1
+        element["id"] = f"{prefix}-{index}"
+        self.dwg.defs.add(element)
+        return element["id"]
@@ -1,40 +1,67 @@
-import streamlit as st
 import random
 from utilities import w, h
+from profiling import span
+
+# fallback values for the filter settings
+FILTER_DEFAULTS = {
+    "SHAPE": "Circle",
+    "SHAPE_DIMENSIONS": 80.0,
+    "TEXTURE_TYPE": "fractalNoise",
+    "BASE_FREQUENCY": 0.05,
+    "NUM_OCTAVES": 20,
+    "SINGLE_COLOR": True,
+    "FILL_COLOR": "#D412BC",
+    "SURFACE_SCALE": 20.0,
+    "DIFFUSE_CONSTANT": 1.0,
+    "LIGHTING_COLOR_INPUT": "#fff",
+    "MIN_X_PERC": 10.0,
+    "MAX_X_PERC": 90.0,
+    "MIN_Y_PERC": 10.0,
+    "MAX_Y_PERC": 10.0,
+    "MIN_Z": 5.0,
+    "MAX_Z": 500.0,
+}
 
 def filter_settings(C, OTHER_CONFIG, sp):
+    import streamlit as st
+
     with st.sidebar.expander("Shape Settings"):
         shapes = ["Square", "Circle"]
-        C["SHAPE"] = st.selectbox("Shape", shapes, index=shapes.index(sp.get("SHAPE", "Circle")), help="SHAPE")
-        C["SHAPE_DIMENSIONS"] = st.number_input("Shape Dimensions (relative to canvas width)", value=sp.get("SHAPE_DIMENSIONS", 80.0), step=1.0, help="SHAPE_DIMENSIONS")
+        C["SHAPE"] = st.selectbox("Shape", shapes, index=shapes.index(sp.get("SHAPE", FILTER_DEFAULTS["SHAPE"])), help="SHAPE")
+        C["SHAPE_DIMENSIONS"] = st.number_input("Shape Dimensions (relative to canvas width)", value=sp.get("SHAPE_DIMENSIONS", FILTER_DEFAULTS["SHAPE_DIMENSIONS"]), step=1.0, help="SHAPE_DIMENSIONS")
         
     with st.sidebar.expander("Texture Settings"):
         texture_types = ["fractalNoise", "turbulence"]
-        C["TEXTURE_TYPE"] = st.selectbox("Color Scheme", texture_types, index=texture_types.index(sp.get("TEXTURE_TYPE", "fractalNoise")), help="TEXTURE_TYPE")
-        C["BASE_FREQUENCY"] = st.number_input("Base Frequency", value=sp.get("BASE_FREQUENCY", 0.05), step=0.1, help="BASE_FREQUENCY")
-        C["NUM_OCTAVES"] = st.number_input("Number of Octaves", value=sp.get("NUM_OCTAVES", 20), step=1, help="NUM_OCTAVES")
+        C["TEXTURE_TYPE"] = st.selectbox("Color Scheme", texture_types, index=texture_types.index(sp.get("TEXTURE_TYPE", FILTER_DEFAULTS["TEXTURE_TYPE"])), help="TEXTURE_TYPE")
+        C["BASE_FREQUENCY"] = st.number_input("Base Frequency", value=sp.get("BASE_FREQUENCY", FILTER_DEFAULTS["BASE_FREQUENCY"]), step=0.1, help="BASE_FREQUENCY")
+        C["NUM_OCTAVES"] = st.number_input("Number of Octaves", value=sp.get("NUM_OCTAVES", FILTER_DEFAULTS["NUM_OCTAVES"]), step=1, help="NUM_OCTAVES")
     
     with st.sidebar.expander("Color Settings"):
-        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", True), help="SINGLE_COLOR")
+        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", FILTER_DEFAULTS["SINGLE_COLOR"]), help="SINGLE_COLOR")
         if (C["SINGLE_COLOR"]):
-            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", "#D412BC"), help="FILL_COLOR")
+            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", FILTER_DEFAULTS["FILL_COLOR"]), help="FILL_COLOR")
     
     with st.sidebar.expander("Lighting Settings"):
-        C["SURFACE_SCALE"] = st.number_input("Surface Scale", value=sp.get("SURFACE_SCALE", 20.0), step=1.0, help="SURFACE_SCALE")
-        C["DIFFUSE_CONSTANT"] = st.number_input("Diffuse Constant", value=sp.get("DIFFUSE_CONSTANT", 1.0), step=1.0, help="DIFFUSE_CONSTANT")
-        C["LIGHTING_COLOR_INPUT"] = st.color_picker("Lighting Color", value=sp.get("LIGHTING_COLOR_INPUT", "#fff"), help="LIGHTING_COLOR_INPUT")
+        C["SURFACE_SCALE"] = st.number_input("Surface Scale", value=sp.get("SURFACE_SCALE", FILTER_DEFAULTS["SURFACE_SCALE"]), step=1.0, help="SURFACE_SCALE")
+        C["DIFFUSE_CONSTANT"] = st.number_input("Diffuse Constant", value=sp.get("DIFFUSE_CONSTANT", FILTER_DEFAULTS["DIFFUSE_CONSTANT"]), step=1.0, help="DIFFUSE_CONSTANT")
+        C["LIGHTING_COLOR_INPUT"] = st.color_picker("Lighting Color", value=sp.get("LIGHTING_COLOR_INPUT", FILTER_DEFAULTS["LIGHTING_COLOR_INPUT"]), help="LIGHTING_COLOR_INPUT")
         
     with st.sidebar.expander("Filter Animation Settings"):        
-        C["MIN_X_PERC"] = st.number_input("min x (relative to canvas width)", value=sp.get("MIN_X_PERC", 10.0), step=1.0, help="MIN_X_PERC")
-        C["MAX_X_PERC"] = st.number_input("max x (relative to canvas width)", value=sp.get("MAX_X_PERC", 90.0), step=1.0, help="MAX_X_PERC")
+        C["MIN_X_PERC"] = st.number_input("min x (relative to canvas width)", value=sp.get("MIN_X_PERC", FILTER_DEFAULTS["MIN_X_PERC"]), step=1.0, help="MIN_X_PERC")
+        C["MAX_X_PERC"] = st.number_input("max x (relative to canvas width)", value=sp.get("MAX_X_PERC", FILTER_DEFAULTS["MAX_X_PERC"]), step=1.0, help="MAX_X_PERC")
         st.divider()
-        C["MIN_Y_PERC"] = st.number_input("min y (relative to canvas width)", value=sp.get("MIN_Y_PERC", 10.0), step=1.0, help="MIN_Y_PERC")
-        C["MAX_Y_PERC"] = st.number_input("max y (relative to canvas width)", value=sp.get("MAX_Y_PERC", 10.0), step=1.0, help="MAX_Y_PERC")
+        C["MIN_Y_PERC"] = st.number_input("min y (relative to canvas width)", value=sp.get("MIN_Y_PERC", FILTER_DEFAULTS["MIN_Y_PERC"]), step=1.0, help="MIN_Y_PERC")
+        C["MAX_Y_PERC"] = st.number_input("max y (relative to canvas width)", value=sp.get("MAX_Y_PERC", FILTER_DEFAULTS["MAX_Y_PERC"]), step=1.0, help="MAX_Y_PERC")
         st.divider()
-        C["MIN_Z"] = st.number_input("min z", value=sp.get("MIN_Z", 5.0), step=1.0, help="MIN_Z")
-        C["MAX_Z"] = st.number_input("max z", value=sp.get("MAX_Z", 500.0), step=1.0, help="MAX_Z")
+        C["MIN_Z"] = st.number_input("min z", value=sp.get("MIN_Z", FILTER_DEFAULTS["MIN_Z"]), step=1.0, help="MIN_Z")
+        C["MAX_Z"] = st.number_input("max z", value=sp.get("MAX_Z", FILTER_DEFAULTS["MAX_Z"]), step=1.0, help="MAX_Z")
         
-def generate_filters(dwg, C, OTHER_CONFIG):
+def generate_filters(dwg, C, OTHER_CONFIG, rng=random):
+    with span("defs"): add_filter_definitions(dwg, C)
+    with span("elements"): add_shape(dwg, C, OTHER_CONFIG, rng)
+    return dwg
+
+def add_filter_definitions(dwg, C):
     ######## filter definitions ########
     ### textured filter ###
     filter_textured = dwg.defs.add(dwg.filter(id='filterTextured'))
@@ -92,8 +119,9 @@ def generate_filters(dwg, C, OTHER_CONFIG):
         circle_enabler.add(animation_enabler)
         dwg.add(circle_enabler)
 
+def add_shape(dwg, C, OTHER_CONFIG, rng):
     ######## draw shapes ########
-    fill_color = C["FILL_COLOR"] if C["SINGLE_COLOR"] else random.choice(OTHER_CONFIG["COLORS"])
+    fill_color = C["FILL_COLOR"] if C["SINGLE_COLOR"] else rng.choice(OTHER_CONFIG["COLORS"])
     shape = None
     if C["SHAPE"] == "Circle": 
         shape = dwg.circle(center=(w(50, C['W']), h(50, C['H'])), r=w(C["SHAPE_DIMENSIONS"]/2, C['W']), fill=fill_color, filter=f"url(#filterTextured)")
@@ -101,6 +129,4 @@ def generate_filters(dwg, C, OTHER_CONFIG):
         shape = dwg.rect(insert=(w((100-C["SHAPE_DIMENSIONS"])/2, C['W']), h((100-C["SHAPE_DIMENSIONS"])/2, C['H'])), size=(w(C["SHAPE_DIMENSIONS"], C['W']), w(C["SHAPE_DIMENSIONS"], C['W'])), fill=fill_color, filter=f"url(#filterTextured)")
         
     dwg.add(shape)
-    
-    return dwg
    
\ No newline at end of file
@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import raster
+import smil
+from render import load_presets, resolve_config, build_drawing, slugify
+
+# animated image types and the Pillow format writing them
+FRAME_FORMATS = {"gif": "GIF", "apng": "PNG", "webp": "WEBP"}
+
+# the drawing a worker process samples its frames from, built once per process by init_worker
+worker_state = {}
+
+def init_worker(C, OTHER_CONFIG, scale):
+    dwg = build_drawing(C | {"ANIMATION_BACKEND": "smil"}, OTHER_CONFIG) # smil.sample reads SMIL animations only
+    worker_state.update(dwg=dwg, size=(C['W'], C['H']), scale=scale)
+
+def render_frame(t):
+    return raster.rasterize(smil.sample(worker_state["dwg"], t), worker_state["size"], worker_state["scale"])
+
+def frame_times(seconds, fps):
+    return [i / fps for i in range(max(round(seconds * fps), 1))]
+
+def render_frames(C, OTHER_CONFIG, seconds=None, fps=12, scale=1.0, workers=None):
+    """
+    Rasterize the animation frame by frame, one frame per task across a process pool.
+
+    Args:
+        seconds (float): Length of the exported animation, defaults to ANIMATION_DURATION.
+        fps (float): Frames per second.
+        scale (float): Pixels per SVG unit.
+        workers (int): Number of worker processes, 1 renders in this process.
+
+    Returns:
+        list: The (height, width, 4) uint8 RGBA frames in order.
+    """
+    times = frame_times(C["ANIMATION_DURATION"] if seconds is None else seconds, fps)
+    if workers == 1:
+        init_worker(C, OTHER_CONFIG, scale)
+        return [render_frame(t) for t in times]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(C, OTHER_CONFIG, scale)) as executor:
+        return list(executor.map(render_frame, times))
+
+def save_frames(frames, fileobj, format="gif", fps=12):
+    from PIL import Image # only needed for writing files
+    images = [Image.fromarray(frame, "RGBA") for frame in frames]
+    options = {"save_all": True, "append_images": images[1:], "duration": round(1000 / fps), "loop": 0}
+    if format == "gif": options["disposal"] = 2 # clear each frame first, or transparent parts show the previous ones
+    images[0].save(fileobj, format=FRAME_FORMATS[format], **options)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export animated previews (GIF/APNG/WebP) by sampling the SMIL animations.")
+    parser.add_argument("--presets", default="presets.json", help="preset file to read --preset names from")
+    parser.add_argument("-p", "--preset", action="append", default=[], help="name of a preset to export (repeatable)")
+    parser.add_argument("-c", "--config", action="append", default=[], help="path to a config JSON file to export (repeatable)")
+    parser.add_argument("-s", "--seed", type=int, help="seed override")
+    parser.add_argument("-f", "--format", choices=FRAME_FORMATS, default="gif", help="animated image type")
+    parser.add_argument("--fps", type=float, default=12, help="frames per second")
+    parser.add_argument("--seconds", type=float, help="length of the export, defaults to the config's ANIMATION_DURATION")
+    parser.add_argument("--scale", type=float, default=0.5, help="pixels per SVG unit")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("-o", "--output-dir", default="output", help="directory to write the files to")
+    args = parser.parse_args(argv)
+
+    presets = load_presets(args.presets)
+    configs = []
+    for name in args.preset:
+        preset = next((preset for preset in presets if preset["name"] == name), None)
+        if preset is None: parser.error(f"no preset named '{name}' in {args.presets}")
+        configs.append((slugify(name), preset))
+    for path in args.config:
+        with open(path, 'r') as file:
+            configs.append((slugify(os.path.splitext(os.path.basename(path))[0]), json.load(file)))
+    if not configs: parser.error("nothing to export, pass --preset and/or --config")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for slug, config in configs:
+        start = time.perf_counter()
+        C, OTHER_CONFIG = resolve_config(config, args.seed)
+        frames = render_frames(C, OTHER_CONFIG, args.seconds, args.fps, args.scale, args.workers)
+        path = os.path.join(args.output_dir, f"{slug}-{C['SEED']}.{'png' if args.format == 'apng' else args.format}")
+        with open(path, 'wb') as file:
+            save_frames(frames, file, args.format, args.fps)
+        print(f"{path}: {len(frames)} frames in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
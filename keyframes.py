@@ -0,0 +1,175 @@
+import re
+from paths import short_number
+from smil import ANIMATIONS, NUMBER, animation_values, clock_value
+from svgstream import value_to_string
+
+# animated attributes of shapes that are really a movement, they become a translation relative to the static value.
+# the same attributes of anything else (e.g. the x/y of fePointLight) can't be reached by CSS
+MOTIONS = {
+    ("circle", "cx"): 0, ("circle", "cy"): 1,
+    ("ellipse", "cx"): 0, ("ellipse", "cy"): 1,
+    ("rect", "x"): 0, ("rect", "y"): 1,
+    ("use", "x"): 0, ("use", "y"): 1,
+}
+
+# attributes a CSS animation has an equivalent for. animations with anything else (begin, fill, by, accumulate, ...) stay SMIL
+SUPPORTED = {"attributeName", "type", "values", "from", "to", "additive", "dur", "repeatCount", "calcMode", "keyTimes", "keySplines"}
+
+TRANSLATE = re.compile(rf"\s*translate\(\s*({NUMBER.pattern})(?:[\s,]+({NUMBER.pattern}))?\s*\)\s*")
+
+def numbers(value):
+    return [float(number) for number in NUMBER.findall(value_to_string(value))]
+
+def static_translation(element):
+    # the transform attribute as an x, y offset, (0, 0) without one and None if it's anything but a translation
+    transform = element.attribs.get("transform")
+    if not transform: return (0.0, 0.0)
+    match = TRANSLATE.fullmatch(value_to_string(transform))
+    if match is None: return None
+    return (float(match.group(1)), float(match.group(2) or 0))
+
+def timing(animation):
+    """
+    The CSS timing of a SMIL animation.
+
+    Returns:
+        tuple: The key times (0-1), then duration, timing function and iteration count as CSS, i.e. everything but the
+        values. None if the animation can't be expressed in CSS, e.g. discrete values or splines that differ per segment.
+    """
+    a = animation.attribs
+    values = animation_values(animation)
+    if set(a) - SUPPORTED or len(values) < 2 or None in values: return None
+
+    mode = a.get("calcMode", "linear")
+    if mode == "spline":
+        splines = {tuple(numbers(spline)) for spline in value_to_string(a.get("keySplines", "")).split(";")}
+        if len(splines) != 1: return None
+        function = f"cubic-bezier({','.join(f'{number:g}' for number in splines.pop())})"
+    elif mode == "linear" or (mode == "paced" and len(values) == 2):
+        function = "linear"
+    else:
+        return None
+
+    if a.get("keyTimes") is not None: key_times = tuple(numbers(a["keyTimes"]))
+    else: key_times = tuple(i / (len(values) - 1) for i in range(len(values)))
+    if len(key_times) != len(values): return None
+
+    try:
+        duration = clock_value(a.get("dur"))
+    except (TypeError, ValueError):
+        return None
+    repeat = a.get("repeatCount", 1)
+    iterations = "infinite" if repeat == "indefinite" else f"{float(repeat):g}"
+    return key_times, f"{duration:g}s", function, iterations
+
+def transform_animations(element, precision):
+    """
+    The translate and rotate animateTransforms of an element as CSS animations of the translate and rotate properties.
+
+    CSS applies translate, then rotate, then the transform attribute. That's what SMIL does if the transform attribute
+    is a translation as well and the rotation is additive, the rotation's origin just needs to include that translation.
+
+    Returns:
+        tuple: ([(animations, property, frames, timing)], transform origin), one entry per animateTransform. None if
+        any of them has to stay SMIL, as mixing CSS and SMIL transforms would apply them in the wrong order.
+    """
+    animations = [child for child in element.elements if child.elementname == "animateTransform"]
+    offset = static_translation(element)
+    if not animations or offset is None: return None
+
+    converted, origin, kinds = [], None, set()
+    for i, animation in enumerate(animations):
+        kind = animation.attribs.get("type", "translate")
+        times = timing(animation)
+        additive = animation.attribs.get("additive") == "sum"
+        # a replacing translation has to come first and takes the place of the transform attribute
+        if times is None or kind in kinds or kind not in ("translate", "rotate") or (not additive and i > 0): return None
+        if kind == "rotate" and not additive and element.attribs.get("transform"): return None
+        kinds.add(kind)
+
+        values = [numbers(value) for value in animation_values(animation)]
+        if kind == "translate":
+            shift = (0.0, 0.0) if additive else offset
+            frames = [(value[0] - shift[0], (value[1] if len(value) > 1 else 0) - shift[1]) for value in values]
+            frames = [f"{format_number(x, precision)}px {format_number(y, precision)}px" for x, y in frames]
+        else:
+            centers = {tuple(value[1:]) for value in values}
+            center = centers.pop() or (0.0, 0.0)
+            if centers or len(center) != 2: return None
+            origin = (center[0] + offset[0], center[1] + offset[1])
+            frames = [f"{format_number(value[0], precision)}deg" for value in values]
+        converted.append(([animation], kind, frames, times))
+    return converted, origin
+
+def motion_animations(element, precision):
+    """
+    Animations of a shape's position (cx/cy, x/y) as one CSS translation, relative to the static position.
+
+    Returns:
+        list: A single (animations, property, frames, timing) entry, see transform_animations. Empty unless all of them
+        share the same timing, which they need to be a single translation.
+    """
+    motions = [child for child in element.elements if child.elementname == "animate" and (element.elementname, child.attribs.get("attributeName")) in MOTIONS]
+    if not motions or any(child.elementname == "animateTransform" for child in element.elements): return []
+    # nothing to gain from moving an empty shape, and the Filters module moves one to keep its SMIL lights updating
+    if value_to_string(element.attribs.get("r", "")).strip() == "0": return []
+    if static_translation(element) is None or any(motion.attribs.get("additive") == "sum" for motion in motions): return []
+
+    timings = {timing(motion) for motion in motions}
+    axes = [MOTIONS[element.elementname, motion.attribs["attributeName"]] for motion in motions]
+    if len(timings) != 1 or None in timings or len(set(axes)) != len(axes): return []
+
+    times = timings.pop()
+    frames = [[0.0, 0.0] for _ in times[0]]
+    for motion, axis in zip(motions, axes):
+        base = float(element.attribs.get(motion.attribs["attributeName"], 0))
+        for frame, value in zip(frames, animation_values(motion)):
+            frame[axis] = float(value) - base
+    frames = [f"{format_number(x, precision)}px {format_number(y, precision)}px" for x, y in frames]
+    return [(motions, "translate", frames, times)]
+
+def format_number(number, precision):
+    return short_number(round(number * 10 ** precision), precision)
+
+def keyframes_name(kind, key_times):
+    return "-".join([kind] + [f"{key_time * 100:g}".replace(".", "_") for key_time in key_times])
+
+def css_animations(dwg, precision=2):
+    """
+    Replace the SMIL animations of a drawing that CSS can express with CSS animations, in place.
+
+    Translations, rotations and cx/cy (x/y) movements become the CSS translate and rotate properties, which browsers
+    animate off the main thread. Elements only get variables with their values and the timing, the @keyframes reading
+    those variables are shared by all elements with the same key times and added to the defs as one <style>.
+    Everything else (path morphs, lights, ...) stays SMIL.
+
+    Args:
+        dwg: The svgwrite drawing render.build_drawing returns.
+        precision (int): Decimals of the translations and angles.
+    """
+    keyframes = {}
+    def convert(element):
+        animations = motion_animations(element, precision)
+        transforms = transform_animations(element, precision)
+        origin = None
+        if transforms is not None: animations, origin = transforms[0] + animations, transforms[1]
+
+        if animations:
+            style, timings, done = [], [], set()
+            for converted, kind, frames, (key_times, duration, function, iterations) in animations:
+                done.update(id(animation) for animation in converted)
+                name = keyframes_name(kind, key_times)
+                keyframes[name] = "@keyframes %s{%s}" % (name, "".join(f"{key_time * 100:g}%{{{kind}:var(--{kind}-{i})}}" for i, key_time in enumerate(key_times)))
+                style.extend(f"--{kind}-{i}:{frame}" for i, frame in enumerate(frames))
+                timings.append(f"{name} {duration} {function} {iterations}")
+            style.append(f"animation:{','.join(timings)}")
+            if origin is not None: style.append(f"transform-origin:{format_number(origin[0], precision)}px {format_number(origin[1], precision)}px")
+            if element.attribs.get("style"): style.insert(0, value_to_string(element.attribs["style"]).rstrip(";"))
+            element.attribs["style"] = ";".join(style)
+            element.elements = [child for child in element.elements if id(child) not in done]
+
+        for child in element.elements:
+            if child.elementname not in ANIMATIONS: convert(child)
+
+    convert(dwg)
+    if keyframes: dwg.defs.add(dwg.style("".join(keyframes.values())))
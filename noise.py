@@ -0,0 +1,172 @@
+import math
+from functools import lru_cache
+import numpy as np
+
+# constants of the reference implementation in the SVG 1.1 spec (feTurbulence)
+RAND_M = 2147483647
+RAND_A = 16807
+RAND_Q = 127773
+RAND_R = 2836
+B_SIZE = 0x100
+B_MASK = 0xff
+PERLIN_N = 0x1000
+
+# octaves past this add less than half an 8 bit step, so they're skipped (numOctaves goes up to 20 in our presets)
+MAX_OCTAVES = 10
+
+def setup_seed(seed):
+    # C's % keeps the sign of the dividend, math.fmod does the same
+    if seed <= 0: seed = -int(math.fmod(seed, RAND_M - 1)) + 1
+    if seed > RAND_M - 1: seed = RAND_M - 1
+    return seed
+
+def next_random(seed):
+    # C division truncates towards 0, seeds are positive here so // does the same
+    result = RAND_A * (seed % RAND_Q) - RAND_R * (seed // RAND_Q)
+    return result + RAND_M if result <= 0 else result
+
+@lru_cache(maxsize=64)
+def lattice(seed):
+    """
+    The spec's init(): the lattice selector and the four channels' gradients for a seed.
+
+    Returns:
+        tuple: The (2 * 256 + 2,) lattice selector and the x and y components of the gradients, each (2 * 256 + 2, 4)
+        with a column per channel.
+    """
+    seed = setup_seed(int(seed))
+    selector = list(range(B_SIZE)) + [0] * (B_SIZE + 2)
+    gradients = [[[0.0, 0.0] for _ in range(B_SIZE + B_SIZE + 2)] for _ in range(4)]
+    for k in range(4):
+        for i in range(B_SIZE):
+            for j in range(2):
+                seed = next_random(seed)
+                gradients[k][i][j] = ((seed % (B_SIZE + B_SIZE)) - B_SIZE) / B_SIZE
+            length = math.sqrt(gradients[k][i][0] ** 2 + gradients[k][i][1] ** 2)
+            gradients[k][i] = [gradients[k][i][0] / length, gradients[k][i][1] / length]
+
+    for i in range(B_SIZE - 1, 0, -1):
+        seed = next_random(seed)
+        j = seed % B_SIZE
+        selector[i], selector[j] = selector[j], selector[i]
+
+    for i in range(B_SIZE + 2):
+        selector[B_SIZE + i] = selector[i]
+        for k in range(4):
+            gradients[k][B_SIZE + i] = list(gradients[k][i])
+    gradients = np.array(gradients, dtype=np.float32) # (channel, index, axis)
+    return np.array(selector), (np.ascontiguousarray(gradients[..., 0].T), np.ascontiguousarray(gradients[..., 1].T))
+
+def lattice_cells(coordinates):
+    # lattice cell, its neighbour and the position within the cell along one axis, like noise2() does for each coordinate
+    t = coordinates + PERLIN_N
+    whole = t.astype(np.int64)
+    fraction = (t - whole).astype(np.float32)
+    return whole & B_MASK, (whole + 1) & B_MASK, fraction
+
+def noise2(selector, gradients, x, y):
+    """
+    The spec's noise2() for all four channels on the grid of lattice coordinates x (columns) and y (rows).
+
+    Cells and fractions only depend on the column or the row, so they're computed once per axis and only the gradient
+    lookups are per pixel.
+
+    Returns:
+        numpy.ndarray: The (len(y), len(x), 4) noise values.
+    """
+    bx0, bx1, rx0 = lattice_cells(x)
+    by0, by1, ry0 = lattice_cells(y)
+    rx0, ry0 = rx0[None, :, None], ry0[:, None, None]
+    rx1, ry1 = rx0 - 1, ry0 - 1
+    sx, sy = rx0 * rx0 * (3 - 2 * rx0), ry0 * ry0 * (3 - 2 * ry0)
+
+    i, j = selector[bx0][None, :], selector[bx1][None, :]
+    by0, by1 = by0[:, None], by1[:, None]
+    def dot(corner, rx, ry):
+        index = selector.take(corner)
+        return rx * gradients[0].take(index, axis=0) + ry * gradients[1].take(index, axis=0)
+
+    u, v = dot(i + by0, rx0, ry0), dot(j + by0, rx1, ry0)
+    a = u + sx * (v - u)
+    u, v = dot(i + by1, rx0, ry1), dot(j + by1, rx1, ry1)
+    b = u + sx * (v - u)
+    return a + sy * (b - a)
+
+@lru_cache(maxsize=32)
+def turbulence_tile(kind, base_frequency, octaves, seed, region, scale):
+    """
+    feTurbulence over a region of device pixels, cached as many filters and frames share the same noise.
+
+    Args:
+        kind (str): "fractalNoise" or "turbulence".
+        base_frequency (tuple): (x, y) base frequencies in user units.
+        octaves (int): numOctaves.
+        seed (float): The seed attribute.
+        region (tuple): (top, left, height, width) in device pixels.
+        scale (float): Device pixels per user unit. The noise is sampled at the pixel centers in user space.
+
+    Returns:
+        numpy.ndarray: Straight (non-premultiplied) (height, width, 4) RGBA values, quantized to 8 bits like browsers do.
+    """
+    top, left, height, width = region
+    selector, gradients = lattice(seed)
+    x = (np.arange(left, left + width) + 0.5) / scale * base_frequency[0]
+    y = (np.arange(top, top + height) + 0.5) / scale * base_frequency[1]
+
+    total = np.zeros((height, width, 4), dtype=np.float32)
+    ratio = 1.0
+    for _ in range(min(int(octaves), MAX_OCTAVES)):
+        octave = noise2(selector, gradients, x, y)
+        total += (octave if kind == "fractalNoise" else np.abs(octave)) / ratio
+        x, y, ratio = x * 2, y * 2, ratio * 2
+
+    values = (total * 255 + 255) / 2 if kind == "fractalNoise" else total * 255
+    tile = np.round(np.clip(values, 0, 255)).astype(np.uint8)
+    tile.flags.writeable = False # shared through the cache
+    return tile
+
+def surface_normals(alpha, surface_scale):
+    """
+    The spec's Sobel normals of the surface height surface_scale * alpha, including its edge and corner kernels.
+
+    Returns:
+        tuple: The (h, w) x and y components of the (unnormalized) normal, z being 1.
+    """
+    padded = np.pad(alpha, 1, mode="edge")
+    height, width = alpha.shape
+    # differences across each pixel, one-sided at the edges (where the padding repeats the pixel itself)
+    dx = padded[:, 2:] - padded[:, :-2]
+    dy = padded[2:, :] - padded[:-2, :]
+    rows, columns = np.arange(height)[:, None], np.arange(width)[None, :]
+
+    # rows/columns outside the image weigh 0 instead of 1, the factor makes up for the lost weights and the shorter distance
+    above, below = (rows > 0).astype(float), (rows < height - 1).astype(float)
+    before, after = (columns > 0).astype(float), (columns < width - 1).astype(float)
+    sum_x = above * dx[:-2] + 2 * dx[1:-1] + below * dx[2:]
+    sum_y = before * dy[:, :-2] + 2 * dy[:, 1:-1] + after * dy[:, 2:]
+    nx = -surface_scale * 2 / ((2 + above + below) * (before + after)) * sum_x
+    ny = -surface_scale * 2 / ((2 + before + after) * (above + below)) * sum_y
+    return nx, ny
+
+def diffuse_point_light(alpha, surface_scale, diffuse_constant, light, color, origin):
+    """
+    feDiffuseLighting with an fePointLight.
+
+    Args:
+        alpha (numpy.ndarray): (h, w) alpha of the input, the height map.
+        light (tuple): (x, y, z) of the light in device pixels.
+        color (numpy.ndarray): The lighting color, in the filter's color space.
+        origin (tuple): (top, left) of the region in device pixels.
+
+    Returns:
+        numpy.ndarray: The opaque (h, w, 4) RGBA result.
+    """
+    nx, ny = surface_normals(alpha, surface_scale)
+    height, width = alpha.shape
+    ys, xs = np.mgrid[origin[0]:origin[0] + height, origin[1]:origin[1] + width]
+    lx, ly, lz = light[0] - xs, light[1] - ys, light[2] - surface_scale * alpha
+    dot = (nx * lx + ny * ly + lz) / (np.sqrt(nx * nx + ny * ny + 1) * np.maximum(np.sqrt(lx * lx + ly * ly + lz * lz), 1e-12))
+
+    result = np.ones((height, width, 4), dtype=np.float32)
+    result[..., :3] = np.clip(diffuse_constant * np.maximum(dot, 0)[..., None] * color, 0, 1)
+    return result
@@ -0,0 +1,43 @@
+import json
+import os
+from functools import lru_cache
+
+# generated lookup of every listed matplotlib colormap, regenerate with `python palettes.py`
+PALETTES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "palettes.json")
+
+def build_palettes():
+    # only listed colormaps (e.g. 'viridis', 'tab10') have a fixed list of colors to pick from
+    import matplotlib
+    import matplotlib.colors as mcolors
+
+    return {
+        name: [mcolors.rgb2hex(color) for color in matplotlib.colormaps[name].colors]
+        for name in matplotlib.colormaps
+        if hasattr(matplotlib.colormaps[name], 'colors')
+    }
+
+@lru_cache(maxsize=None)
+def get_palettes():
+    """
+    Get all color schemes, loaded once per process.
+
+    Returns:
+        dict: Color scheme names (in matplotlib's order) mapped to their hex colors.
+        Read from palettes.json, or built from matplotlib if that file is missing.
+    """
+    try:
+        with open(PALETTES_FILE, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return build_palettes()
+
+def get_colors(color_scheme):
+    # a copy, so callers can't change the shared palette
+    return list(get_palettes()[color_scheme])
+
+if __name__ == "__main__":
+    palettes = build_palettes()
+    with open(PALETTES_FILE, 'w') as file:
+        # one palette per line keeps the file readable and diffable
+        file.write("{\n" + ",\n".join(f"    {json.dumps(name)}: {json.dumps(colors)}" for name, colors in palettes.items()) + "\n}\n")
+    print(f"wrote {len(palettes)} palettes to {PALETTES_FILE}")
@@ -0,0 +1,81 @@
+import numpy as np
+from functools import lru_cache
+
+# number of coordinate pairs each path command takes
+COMMAND_PAIRS = {"M": 1, "L": 1, "S": 2, "Z": 0}
+
+def to_canvas(coordinates, C):
+    # vectorized w()/h(): relative (0-100) x,y pairs to canvas coordinates
+    return np.asarray(coordinates) / 100 * np.array([C['W'], C['H']])
+
+@lru_cache(maxsize=1024)
+def path_template(commands, precision):
+    pair = f"%.{precision}f,%.{precision}f"
+    return " ".join(" ".join([command] + COMMAND_PAIRS[command] * [pair]) for command in commands)
+
+def path_data(commands, coordinates, precision=2):
+    """
+    Serialize a path in a single formatting pass.
+
+    NOTE: The animation of d only works if x and y coordinates in the path are comma separated, and points are space separated
+    i.e. 'S 50 50, 20 20' doesn't work, but 'S 50,50 20,20' does, so that's the only format written here.
+
+    Args:
+        commands (str): The path commands in order, e.g. "MSSSZ". Supports M, L, S and Z.
+        coordinates (array-like): The (k, 2) coordinate pairs of all commands in order.
+        precision (int): The number of decimals per coordinate.
+
+    Returns:
+        str: The path data, e.g. "M 1.00,2.00 S 3.00,4.00 5.00,6.00 Z".
+    """
+    return path_template(commands, precision) % tuple(np.ravel(coordinates).tolist())
+
+@lru_cache(maxsize=65536)
+def short_number(units, precision):
+    # a number given in units of 10^-precision, without trailing zeros or a leading zero, e.g. 1250 -> '12.5', -50 -> '-.5'
+    sign = "-" if units < 0 else ""
+    whole, fraction = divmod(abs(units), 10 ** precision)
+    fraction = f"{fraction:0{precision}d}".rstrip("0") if precision else ""
+    if not fraction: return f"{sign}{whole}"
+    return f"{sign}{whole or ''}.{fraction}"
+
+def quantize(coordinates, precision):
+    return np.round(np.asarray(coordinates, dtype=float) * 10 ** precision).astype(np.int64)
+
+def compact_path_data(commands, keyframes, precision=2):
+    """
+    Serialize the keyframes of an animated path as short as possible, e.g. 'M1,2s3,4 5.5,6Z'.
+
+    Every command is written relative to the current point where that's shorter over all keyframes, and absolute
+    otherwise, so the keyframes share one command structure and SMIL can still interpolate them. Coordinates are
+    quantized before the relative ones are taken, so rounding errors don't add up along the path.
+
+    Args:
+        commands (str): The path commands in order, e.g. "MSSSZ". Supports M, L, S and Z.
+        keyframes (list): The (k, 2) coordinate pairs of all commands in order, per keyframe.
+        precision (int): The number of decimals per coordinate.
+
+    Returns:
+        list: The path data of each keyframe.
+    """
+    units = quantize(np.stack(keyframes), precision) # (keyframes, k, 2)
+    paths = [[] for _ in keyframes]
+    current = start = np.zeros((len(keyframes), 2), dtype=np.int64)
+    index = 0
+    for command in commands:
+        pairs = units[:, index:index + COMMAND_PAIRS[command]]
+        index += COMMAND_PAIRS[command]
+        if command == "Z":
+            for path in paths: path.append("Z")
+            current = start
+            continue
+
+        absolute = [" ".join(f"{short_number(x, precision)},{short_number(y, precision)}" for x, y in pair) for pair in pairs.tolist()]
+        relative = [" ".join(f"{short_number(x, precision)},{short_number(y, precision)}" for x, y in pair) for pair in (pairs - current[:, None]).tolist()]
+        # the first moveto is absolute either way
+        use_relative = index > 1 and sum(map(len, relative)) < sum(map(len, absolute))
+        for path, text in zip(paths, relative if use_relative else absolute):
+            path.append((command.lower() if use_relative else command) + text)
+        current = pairs[:, -1]
+        if command == "M": start = current
+    return ["".join(path) for path in paths]
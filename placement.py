@@ -0,0 +1,107 @@
+import math
+from streams import uniform
+
+# how bubbles and splotches are spread over the canvas
+PLACEMENTS = ["Random", "Poisson Disk", "Min Overlap"]
+
+# candidate positions drawn per element: poisson disk takes the first that keeps its distance, min overlap the best of all
+CANDIDATES = {"Poisson Disk": 30, "Min Overlap": 12}
+
+class SpatialGrid:
+    """
+    Grids over the circles placed so far, so that finding the ones close to a point only visits a few cells instead of
+    every circle.
+
+    Circles are sorted into classes by radius (powers of two) and every class has its own grid, with cells about the
+    size of its largest circles. Small circles are thus looked up in small cells, even when a few large ones are around.
+
+    Args:
+        padding (float): Added to the edge length of the cells, e.g. the spacing searched around every circle.
+        min_cell_size (float): Smallest edge length of the cells, so that tiny radii don't make for tiny cells.
+    """
+    def __init__(self, padding=0.0, min_cell_size=1e-9):
+        self.padding = padding
+        self.min_cell_size = min_cell_size
+        self.classes = {} # radius class -> [cell size, largest radius, cells], in the order they were first used
+
+    def add(self, x, y, r):
+        # the class of r is the exponent of the next power of two, so its circles are less than 2 ** (e + 1) across
+        e = math.frexp(r)[1] if r > 0 else -math.inf
+        if e not in self.classes: self.classes[e] = [max(2.0 ** (e + 1) + self.padding, self.min_cell_size), 0.0, {}]
+        radius_class = self.classes[e]
+        cell_size, _, cells = radius_class
+        cells.setdefault((math.floor(x / cell_size), math.floor(y / cell_size)), []).append((x, y, r))
+        radius_class[1] = max(radius_class[1], r)
+
+    def near(self, x, y, r, horizon):
+        # circles within horizon of a circle of radius r at x, y, plus a few from the corners of the visited cells.
+        # in every class the cell of x, y comes first, the closest circles are most likely in it
+        for cell_size, max_radius, cells in self.classes.values():
+            reach = r + max_radius + horizon
+            center = (math.floor(x / cell_size), math.floor(y / cell_size))
+            yield from cells.get(center, ())
+            left, top = math.floor((x - reach) / cell_size), math.floor((y - reach) / cell_size)
+            right, bottom = math.floor((x + reach) / cell_size), math.floor((y + reach) / cell_size)
+            for i in range(left, right + 1):
+                for j in range(top, bottom + 1):
+                    if (i, j) != center: yield from cells.get((i, j), ())
+
+    def clearance(self, x, y, r, horizon, floor=-math.inf):
+        """
+        The smallest gap between a circle of radius r at x, y and the circles added so far, negative if they overlap.
+
+        Only gaps up to horizon are looked for, if no circle is that close horizon is returned. The search stops early
+        once the gap is at most floor, e.g. the gap of a better candidate.
+        """
+        clearance = horizon
+        for other_x, other_y, other_r in self.near(x, y, r, horizon):
+            clearance = min(clearance, math.hypot(x - other_x, y - other_y) - r - other_r)
+            if clearance <= floor: break
+        return clearance
+
+def place(radii, seed, bounds, mode="Random", spacing=0.0):
+    """
+    Find centers for circles of the given radii, one after the other from the largest.
+
+    Args:
+        radii (list): The radius of each circle, in the same units as bounds.
+        seed (int): The stream of the candidate positions, see streams.py. Circle i always gets the same candidates,
+            so with Random the centers of the other circles stay put when circles are added.
+        bounds (tuple): left, top, right and bottom of the area the centers are drawn from.
+        mode (str): One of PLACEMENTS. Random draws every center uniformly. Poisson Disk keeps at least spacing between
+            circles, trying up to CANDIDATES positions per circle and taking the least overlapping one if none fits.
+            Min Overlap takes the first candidate at least its own radius away from all other circles, otherwise the
+            one furthest from them.
+        spacing (float): The gap Poisson Disk keeps between circles, negative to allow some overlap. Ignored by the
+            other modes.
+
+    Returns:
+        list: The (x, y) center of each circle.
+    """
+    left, top, right, bottom = bounds
+    if mode != "Poisson Disk" or spacing is None: spacing = 0.0 # the other modes keep no spacing
+    def candidate(i, k): return (left + (right - left) * uniform(seed, i, 2 * k), top + (bottom - top) * uniform(seed, i, 2 * k + 1))
+    if mode == "Random": return [candidate(i, 0) for i in range(len(radii))]
+
+    # gaps beyond the horizon don't matter (poisson disk only needs to know if there's enough space, min overlap if a
+    # circle is clear of the others by its own radius). as circles are placed from the largest, every class of radii the
+    # grid holds is at least as large as the circle looked up, so a lookup visits a few cells per class. placing n
+    # circles thus takes about n * CANDIDATES lookups, however skewed the radii are
+    grid = SpatialGrid(max(spacing, 0.0), max((right - left) / 1000, 1e-9))
+
+    # the largest circles are placed first, while there's still room for them. the small ones fill the gaps
+    centers = [None] * len(radii)
+    for i in sorted(range(len(radii)), key=lambda i: -radii[i]):
+        r = radii[i]
+        horizon = max(spacing, 0.0) if mode == "Poisson Disk" else r
+        good_enough = spacing if mode == "Poisson Disk" else horizon
+        best, best_clearance = None, -math.inf
+        for k in range(CANDIDATES[mode]):
+            x, y = candidate(i, k)
+            # candidates whose centers are covered by another circle are all equally bad, no need to find out by how much
+            clearance = grid.clearance(x, y, r, horizon, max(best_clearance, -r))
+            if clearance > best_clearance: best, best_clearance = (x, y), clearance
+            if clearance >= good_enough: break
+        grid.add(*best, r)
+        centers[i] = best
+    return centers
@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from cache import RenderCache, config_key
+from render import GENERAL_DEFAULTS, MODULES, get_defaults, resolve_config, to_image
+
+# presets tagged with this are selected when the app opens, otherwise the first one is
+DEFAULT_TAG = "default"
+
+# edge length of the longer side of thumbnails, in pixels
+THUMBNAIL_SIZE = 160
+
+@lru_cache(maxsize=None)
+def preset_schema(module):
+    # the type of every setting a preset of module can have, taken from the defaults
+    return {key: type(value) for key, value in (GENERAL_DEFAULTS | get_defaults(module)).items()}
+
+def check_type(value, expected):
+    # floats also take ints (JSON doesn't tell 5 and 5.0 apart), but no number takes a bool
+    if isinstance(value, bool) != (expected is bool): return False
+    return isinstance(value, (int, float) if expected is float else expected)
+
+def validate_metadata(preset, source):
+    # what the index needs: a name, a known module and a list of tags
+    if not isinstance(preset, dict) or not isinstance(preset.get("name"), str):
+        raise ValueError(f"{source}: presets need to be objects with a name")
+    where = f"{source}: preset '{preset['name']}'"
+    if preset.get("MODULE") not in MODULES:
+        raise ValueError(f"{where}: unknown module '{preset.get('MODULE')}', expected one of {list(MODULES)}")
+    tags = preset.get("tags", [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError(f"{where}: tags need to be a list of strings")
+
+def validate_preset(preset, source):
+    """
+    Check a preset against the schema of its module.
+
+    Settings no module reads are fine, older presets still carry some. Settings of the wrong type aren't, the sidebar
+    would only fail on them once the preset is picked.
+
+    Args:
+        preset (dict): The preset as read from its file.
+        source (str): Where it's from, for the error message.
+
+    Raises:
+        ValueError: If the name, module or tags are missing or wrong, or a setting has the wrong type.
+    """
+    validate_metadata(preset, source)
+    where = f"{source}: preset '{preset['name']}'"
+    schema = preset_schema(preset["MODULE"])
+    wrong = [f"{key} ({type(value).__name__} instead of {schema[key].__name__})" for key, value in preset.items() if key in schema and not check_type(value, schema[key])]
+    if wrong: raise ValueError(f"{where}: wrong type of {', '.join(wrong)}")
+
+@lru_cache(maxsize=64)
+def read_file(path, mtime):
+    # the presets of a file, a list of them or a single one. mtime only keys the cache, edited files are read again
+    with open(path, 'r', encoding="utf-8") as file:
+        presets = json.load(file)
+    return presets if isinstance(presets, list) else [presets]
+
+class PresetStore:
+    """
+    Presets from a file or a directory of them (*.json, searched recursively), indexed by name, module and tag.
+
+    Files are only read once the store is first used. Indexing keeps the name, module and tags of each preset and
+    where to find it, the preset itself is loaded and validated against its module's schema when it's first asked for.
+
+    Args:
+        path (str): A preset file (a JSON list of presets, or a single one) or a directory of them.
+    """
+    def __init__(self, path="presets.json"):
+        self.path = path
+        self.lock = threading.Lock() # the app's sessions share one store
+        self.entries = None
+        self.presets = {}
+
+    def files(self):
+        if not os.path.isdir(self.path): return [self.path]
+        files = []
+        for directory, _, names in os.walk(self.path):
+            files.extend(os.path.join(directory, name) for name in names if name.endswith(".json"))
+        return sorted(files)
+
+    def index(self):
+        """
+        The index, built on first use.
+
+        Returns:
+            dict: name -> (path, position in the file, module, tags), in file order.
+
+        Raises:
+            ValueError: If two presets share a name, or one has no name, an unknown module or broken tags.
+        """
+        with self.lock:
+            if self.entries is not None: return self.entries
+            entries = {}
+            for path in self.files():
+                for position, preset in enumerate(read_file(path, os.path.getmtime(path))):
+                    validate_metadata(preset, path)
+                    name = preset["name"]
+                    if name in entries: raise ValueError(f"{path}: preset '{name}' is already defined in {entries[name][0]}")
+                    entries[name] = (path, position, preset["MODULE"], tuple(preset.get("tags", [])))
+            self.entries = entries
+            return entries
+
+    def names(self, module=None, tag=None):
+        # names of all presets, or those of a module and/or with a tag, in file order
+        return [name for name, (_, _, preset_module, tags) in self.index().items()
+                if (module is None or preset_module == module) and (tag is None or tag in tags)]
+
+    def modules(self):
+        return sorted({module for _, _, module, _ in self.index().values()})
+
+    def tags(self):
+        return sorted({tag for _, _, _, tags in self.index().values() for tag in tags})
+
+    def default_name(self):
+        names = self.names(tag=DEFAULT_TAG) or self.names()
+        return names[0]
+
+    def get(self, name):
+        """
+        A preset by name, validated the first time it's loaded.
+
+        Raises:
+            KeyError: If there's no such preset.
+            ValueError: If it doesn't match its module's schema.
+        """
+        preset = self.presets.get(name)
+        if preset is not None: return preset
+        path, position, _, _ = self.index()[name]
+        preset = read_file(path, os.path.getmtime(path))[position]
+        validate_preset(preset, path)
+        with self.lock:
+            self.presets[name] = preset
+        return preset
+
+    def reload(self):
+        # forget the index and loaded presets, e.g. after presets were added or edited
+        with self.lock:
+            self.entries = None
+            self.presets = {}
+
+def thumbnail_config(preset, size=THUMBNAIL_SIZE):
+    # a still of the preset at its first frame, and the scale that fits it into size x size pixels
+    C, OTHER_CONFIG = resolve_config(preset | {"IS_ANIMATED": False})
+    return C, OTHER_CONFIG, size / max(C['W'], C['H'])
+
+def render_thumbnail(preset, size=THUMBNAIL_SIZE):
+    # runs in the pool's workers (threads or processes), so everything it needs comes in as arguments
+    C, OTHER_CONFIG, scale = thumbnail_config(preset, size)
+    return to_image(C, OTHER_CONFIG, scale, "png")
+
+class ThumbnailRenderer:
+    """
+    Renders PNG thumbnails of presets on a pool in the background and keeps them in a cache, e.g. for a gallery.
+
+    Args:
+        executor (concurrent.futures.Executor): The pool thumbnails render on, threads or processes.
+        size (int): See THUMBNAIL_SIZE.
+        cache (RenderCache): Where finished thumbnails are kept. Memory only, as the disk tier stores text.
+    """
+    def __init__(self, executor, size=THUMBNAIL_SIZE, cache=None):
+        self.executor = executor
+        self.size = size
+        self.cache = cache or RenderCache(max_entries=1024)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.failed = {}
+
+    def key(self, preset):
+        C, OTHER_CONFIG, scale = thumbnail_config(preset, self.size)
+        return f"{config_key(C, OTHER_CONFIG)}-{scale}"
+
+    def request(self, preset):
+        """
+        The thumbnail of a preset if it's ready, otherwise start rendering it (unless that already happened).
+
+        Returns:
+            bytes: The PNG, or None while it's rendering.
+
+        Raises:
+            Exception: Whatever rendering the thumbnail raised, it isn't tried again.
+        """
+        key = self.key(preset)
+        thumbnail = self.cache.get(key)
+        if thumbnail is not None: return thumbnail
+        with self.lock:
+            if key in self.failed: raise self.failed[key]
+            if key in self.pending: return None
+            self.pending[key] = future = self.executor.submit(render_thumbnail, preset, self.size)
+        future.add_done_callback(lambda future: self.finish(key, future))
+        return None
+
+    def finish(self, key, future):
+        # the thumbnail is cached before it stops pending, so requests in between don't render it again
+        if future.exception() is None: self.cache.put(key, future.result())
+        with self.lock:
+            if future.exception() is not None: self.failed[key] = future.exception()
+            del self.pending[key]
@@ -0,0 +1,104 @@
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# the profiler of the current render, None when profiling is off. a context variable, so that the app's sessions
+# (one thread each) only record their own spans
+current = ContextVar("profiler", default=None)
+
+# what span() returns while profiling is off, so instrumented code pays for one lookup and nothing else
+NO_SPAN = nullcontext()
+
+class Profiler:
+    """
+    Records named, nested spans of a render with their wall time and allocations.
+
+    Args:
+        trace_memory (bool): Also trace the bytes allocated per span with tracemalloc, which slows everything down.
+            Without it spans count the change in allocated memory blocks only.
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.stack = []
+
+    @contextmanager
+    def span(self, name):
+        # the record is added when the span opens, so spans are listed in the order they started
+        record = {"name": " / ".join(self.stack + [name]), "depth": len(self.stack)}
+        self.spans.append(record)
+        self.stack.append(name)
+        blocks = sys.getallocatedblocks()
+        if self.trace_memory:
+            import tracemalloc # pulls in pickle, only loaded when it's used
+            traced = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            record["blocks"] = sys.getallocatedblocks() - blocks
+            if self.trace_memory: record["bytes"] = tracemalloc.get_traced_memory()[0] - traced
+            self.stack.pop()
+
+    def totals(self):
+        """
+        Spans with the same name added up, in the order they were first entered.
+
+        Returns:
+            list: Dicts with name, depth, calls, seconds, blocks (net allocated memory blocks) and bytes (net allocated
+            bytes, only when memory was traced).
+        """
+        totals = {}
+        for record in self.spans:
+            total = totals.setdefault(record["name"], {"name": record["name"], "depth": record["depth"], "calls": 0})
+            total["calls"] += 1
+            for key in ("seconds", "blocks", "bytes"):
+                if key in record: total[key] = total.get(key, 0) + record[key]
+        return list(totals.values())
+
+    def to_json(self):
+        return json.dumps({"spans": self.spans, "totals": self.totals()}, indent=2)
+
+def span(name):
+    """
+    Time a stage of the render, e.g. `with span("geometry"): ...`. Spans nest, their names are joined with ' / '.
+
+    Costs nothing but a context variable lookup while no profile() is active.
+    """
+    profiler = current.get()
+    return NO_SPAN if profiler is None else profiler.span(name)
+
+def active():
+    # whether a profile() is recording, e.g. to skip caches that would leave the spans of cached work empty
+    return current.get() is not None
+
+@contextmanager
+def profile(enabled=True, trace_memory=False):
+    """
+    Record the spans entered within, e.g. `with profile() as profiler: render(...)`.
+
+    Args:
+        enabled (bool): Whether to record anything, if not the profiler is None.
+        trace_memory (bool): See Profiler.
+
+    Yields:
+        Profiler: The profiler holding the spans once the block is done, or None.
+    """
+    if not enabled:
+        yield None
+        return
+
+    profiler = Profiler(trace_memory)
+    token = current.set(profiler)
+    if trace_memory:
+        import tracemalloc
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing: tracemalloc.start()
+    try:
+        yield profiler
+    finally:
+        if trace_memory and started_tracing: tracemalloc.stop()
+        current.reset(token)
@@ -0,0 +1,740 @@
+import base64
+import io
+import math
+import re
+from functools import lru_cache
+import numpy as np
+from noise import turbulence_tile, diffuse_point_light
+from utilities import to_rgb
+
+# sub-scanlines per pixel row, i.e. the vertical anti-aliasing. horizontally the coverage is exact
+DEFAULT_SUPERSAMPLE = 4
+
+# maximum distance in pixels between a curve and the polygon it is flattened to
+FLATTEN_TOLERANCE = 0.1
+
+# cubic bezier approximation of a quarter circle
+KAPPA = 4 * (math.sqrt(2) - 1) / 3
+
+NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+PATH_TOKEN = re.compile(rf"([MmLlHhVvCcSsZz])|({NUMBER})")
+TRANSFORM = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+
+######## attribute parsing ########
+def number(value, reference=1.0):
+    # svg length/number, percentages are relative to reference
+    value = str(value).strip()
+    if value.endswith("%"): return float(value[:-1]) / 100 * reference
+    return float(value)
+
+def parse_color(value):
+    # (r, g, b) in the 0-1 range, None for 'none'
+    value = str(value).strip().lower()
+    if value in ("none", "transparent"): return None
+    return np.array(to_rgb(value))
+
+def parse_transform(value):
+    # the 3x3 affine matrix of a transform attribute
+    matrix = np.eye(3)
+    for name, arguments in TRANSFORM.findall(value or ""):
+        a = [float(argument) for argument in re.split(r"[\s,]+", arguments.strip()) if argument]
+        step = np.eye(3)
+        if name == "matrix":
+            step[:2] = [[a[0], a[2], a[4]], [a[1], a[3], a[5]]]
+        elif name == "translate":
+            step[:2, 2] = [a[0], a[1] if len(a) > 1 else 0]
+        elif name == "scale":
+            step[0, 0], step[1, 1] = a[0], a[1] if len(a) > 1 else a[0]
+        elif name == "rotate":
+            angle = math.radians(a[0])
+            cx, cy = a[1:3] if len(a) == 3 else (0, 0)
+            cos, sin = math.cos(angle), math.sin(angle)
+            step[:2] = [[cos, -sin, cx - cos * cx + sin * cy], [sin, cos, cy - sin * cx - cos * cy]]
+        elif name == "skewX":
+            step[0, 1] = math.tan(math.radians(a[0]))
+        elif name == "skewY":
+            step[1, 0] = math.tan(math.radians(a[0]))
+        matrix = matrix @ step
+    return matrix
+
+######## geometry ########
+def parse_path(d):
+    """
+    Turn path data into cubic bezier segments. Lines become straight cubics, so everything is flattened the same way.
+
+    Args:
+        d (str): The path data. Supports M, L, H, V, C, S and Z, absolute and relative.
+
+    Returns:
+        list: One (start, segments) tuple per subpath, start being the (2,) first point and segments a (k, 3, 2)
+        array with the two control points and the end point of every cubic.
+    """
+    tokens = [(command, float(value) if value else None) for command, value in PATH_TOKEN.findall(d)]
+    subpaths = []
+    segments = []
+    position = start = np.zeros(2)
+    control = None # second control point of the previous C/S, reflected by S
+    command = None
+    i = 0
+
+    def take(count):
+        nonlocal i
+        values = [value for _, value in tokens[i:i + count]]
+        i += count
+        return np.array(values)
+
+    def close_subpath():
+        if segments: subpaths.append((start, np.array(segments)))
+        segments.clear()
+
+    while i < len(tokens):
+        if tokens[i][0]:
+            command = tokens[i][0]
+            i += 1
+        if command is None: raise ValueError(f"Path data has coordinates without a command: {d[:40]}")
+        relative = command.islower()
+        origin = position if relative else np.zeros(2)
+        kind = command.upper()
+
+        if kind == "Z":
+            if not np.array_equal(position, start): segments.append((position, start, start))
+            close_subpath()
+            position, control, command = start, None, None
+            continue
+
+        if kind == "M":
+            close_subpath()
+            position = start = origin + take(2)
+            command = "l" if relative else "L" # further pairs are implicit lines
+            control = None
+        elif kind in "LHV":
+            if kind == "L": end = origin + take(2)
+            elif kind == "H": end = np.array([take(1)[0] + origin[0], position[1]])
+            else: end = np.array([position[0], take(1)[0] + origin[1]])
+            segments.append((position, end, end))
+            position, control = end, None
+        elif kind == "C":
+            first, second, end = origin + take(2), origin + take(2), origin + take(2)
+            segments.append((first, second, end))
+            position, control = end, second
+        elif kind == "S":
+            first = position if control is None else 2 * position - control
+            second, end = origin + take(2), origin + take(2)
+            segments.append((first, second, end))
+            position, control = end, second
+
+    close_subpath()
+    return subpaths
+
+def circle_path(cx, cy, r):
+    # four quarter circle cubics, clockwise from the right
+    k = KAPPA * r
+    start = np.array([cx + r, cy])
+    segments = np.array([
+        [[cx + r, cy + k], [cx + k, cy + r], [cx, cy + r]],
+        [[cx - k, cy + r], [cx - r, cy + k], [cx - r, cy]],
+        [[cx - r, cy - k], [cx - k, cy - r], [cx, cy - r]],
+        [[cx + k, cy - r], [cx + r, cy - k], [cx + r, cy]],
+    ])
+    return [(start, segments)]
+
+def rect_path(x, y, width, height):
+    corners = np.array([[x + width, y], [x + width, y + height], [x, y + height], [x, y]])
+    return [(np.array([x, y]), np.repeat(corners[:, None], 3, axis=1))]
+
+def element_path(element, viewport):
+    # the outline of circles, rects and paths in user units, None for anything else
+    a = element.attribs
+    if element.elementname == "circle":
+        return circle_path(number(a.get("cx", 0), viewport[0]), number(a.get("cy", 0), viewport[1]), number(a.get("r", 0), math.hypot(*viewport) / math.sqrt(2)))
+    if element.elementname == "rect":
+        return rect_path(number(a.get("x", 0), viewport[0]), number(a.get("y", 0), viewport[1]), number(a.get("width", 0), viewport[0]), number(a.get("height", 0), viewport[1]))
+    if element.elementname == "path":
+        # svgwrite keeps a path's commands apart from its attributes until it's serialized
+        commands = getattr(element, "commands", None)
+        return parse_path(" ".join(str(command) for command in commands) if commands else a.get("d") or "")
+    return None
+
+def bounds(subpaths):
+    # bounding box of all points incl. control points, exact for circles and rects
+    points = np.concatenate([np.concatenate((start[None], segments.reshape(-1, 2))) for start, segments in subpaths])
+    return points.min(axis=0), points.max(axis=0)
+
+def use_target(element, definitions):
+    # the definition a <use> references, None if it doesn't exist
+    reference = re.fullmatch(r"#(.+)", str(element.attribs.get("xlink:href", element.attribs.get("href", ""))).strip())
+    return definitions.get(reference.group(1)) if reference and definitions else None
+
+def use_offset(element, viewport):
+    return number(element.attribs.get("x", 0), viewport[0]), number(element.attribs.get("y", 0), viewport[1])
+
+def collect_definitions(element, definitions):
+    # every element with an id below element, by id
+    for child in element.elements:
+        if "id" in child.attribs: definitions[child.attribs["id"]] = child
+        collect_definitions(child, definitions)
+
+def drawing_definitions(dwg):
+    # what url(#...) and <use>s of a drawing can reference, i.e. everything in its defs
+    definitions = {}
+    for element in dwg.elements:
+        if element.elementname == "defs": collect_definitions(element, definitions)
+    return definitions
+
+def element_bounds(element, viewport, definitions=None):
+    # bounding box of a shape, or of a group's shapes in the group's user space. None if nothing is drawn.
+    # <use>s count if the definitions they reference are given
+    if element.elementname == "use":
+        target = use_target(element, definitions)
+        box = element_bounds(target, viewport, definitions) if target is not None else None
+        if box is None: return None
+        offset = np.array(use_offset(element, viewport))
+        return box[0] + offset, box[1] + offset
+    if element.elementname not in ("g", "symbol"):
+        subpaths = element_path(element, viewport)
+        return bounds(subpaths) if subpaths else None
+    corners = []
+    for child in element.elements:
+        box = element_bounds(child, viewport, definitions)
+        if box is None: continue
+        (x0, y0), (x1, y1) = box
+        corners.append(np.array([[x0, y0, 1], [x1, y0, 1], [x0, y1, 1], [x1, y1, 1]]) @ parse_transform(child.attribs.get("transform")).T)
+    if not corners: return None
+    points = np.concatenate(corners)[:, :2]
+    return points.min(axis=0), points.max(axis=0)
+
+def flatten(subpaths, matrix, tolerance=FLATTEN_TOLERANCE):
+    """
+    Flatten bezier subpaths into polygons in device (pixel) space.
+
+    The number of steps per cubic follows Wang's formula for the whole subpath, so every cubic
+    of a subpath is evaluated at the same parameters in one vectorized pass.
+    """
+    polygons = []
+    for start, segments in subpaths:
+        points = np.concatenate((start[None], segments.reshape(-1, 2))) @ matrix[:2, :2].T + matrix[:2, 2]
+        p0 = points[0:-1:3]
+        c1, c2, p3 = points[1::3], points[2::3], points[3::3]
+        second_differences = np.maximum(np.linalg.norm(p0 - 2 * c1 + c2, axis=1), np.linalg.norm(c1 - 2 * c2 + p3, axis=1))
+        steps = int(min(max(math.ceil(math.sqrt(0.75 * second_differences.max() / tolerance)), 1), 64))
+
+        t = (np.arange(1, steps + 1) / steps)[None, :, None]
+        curve = (1 - t) ** 3 * p0[:, None] + 3 * (1 - t) ** 2 * t * c1[:, None] + 3 * (1 - t) * t ** 2 * c2[:, None] + t ** 3 * p3[:, None]
+        polygons.append(np.concatenate((points[:1], curve.reshape(-1, 2))))
+    return polygons
+
+def coverage(polygons, width, height, supersample=DEFAULT_SUPERSAMPLE):
+    """
+    Scanline fill of polygons with the nonzero rule, vectorized over all edges and scanlines at once.
+
+    Every pixel row is sampled by supersample sub-scanlines, along each of them the covered
+    spans are accumulated with their exact fractional ends.
+
+    Returns:
+        tuple: (top, left, coverage) with coverage a (h, w) array of 0-1 values for the pixels starting at (top, left),
+        or None if nothing is covered.
+    """
+    edges = np.concatenate([np.stack((polygon, np.roll(polygon, -1, axis=0)), axis=1) for polygon in polygons])
+    x0, y0, x1, y1 = edges[:, 0, 0], edges[:, 0, 1], edges[:, 1, 0], edges[:, 1, 1]
+    sloped = y0 != y1
+    x0, y0, x1, y1 = x0[sloped], y0[sloped], x1[sloped], y1[sloped]
+
+    # sub-scanline j samples y = (j + 0.5) / supersample, an edge crosses the ones with min(y) <= y < max(y)
+    rows = height * supersample
+    first = np.clip(np.ceil(np.minimum(y0, y1) * supersample - 0.5), 0, rows).astype(np.int64)
+    last = np.clip(np.ceil(np.maximum(y0, y1) * supersample - 0.5), 0, rows).astype(np.int64)
+    counts = last - first
+    if counts.sum() == 0: return None
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    j = first[edge] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    y = (j + 0.5) / supersample
+    x = x0[edge] + (y - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+    winding = np.where(y1 > y0, 1, -1)[edge]
+
+    # sort the crossings along each sub-scanline. closed polygons wind back to 0 at the end of every
+    # sub-scanline, so the running sum tells which crossings start a covered span
+    order = np.lexsort((x, j))
+    j, x, winding = j[order], x[order], winding[order]
+    span = np.flatnonzero(np.cumsum(winding)[:-1] != 0)
+    if span.size == 0: return None
+
+    left = max(int(math.floor(x[span].min())), 0)
+    right = min(int(math.ceil(x[span + 1].max())), width)
+    top = int(j[span].min()) // supersample
+    bottom = int(j[span].max()) // supersample + 1
+    if left >= right: return None
+
+    # each span end adds a fractional step to a difference array, whose running sum is the coverage
+    columns = right - left + 2
+    sub_row = j[span] - top * supersample
+    a = np.clip(x[span], left, right) - left
+    b = np.clip(x[span + 1], left, right) - left
+    whole_a, whole_b = np.floor(a).astype(np.int64), np.floor(b).astype(np.int64)
+    fraction_a, fraction_b = a - whole_a, b - whole_b
+    index_a, index_b = sub_row * columns + whole_a, sub_row * columns + whole_b
+    steps = np.bincount(
+        np.concatenate((index_a, index_a + 1, index_b, index_b + 1)),
+        np.concatenate((1 - fraction_a, fraction_a, fraction_b - 1, -fraction_b)),
+        (bottom - top) * supersample * columns,
+    )
+
+    covered = np.cumsum(steps.reshape(-1, columns), axis=1)[:, :columns - 2]
+    covered = covered.reshape(bottom - top, supersample, -1).mean(axis=1)
+    return top, left, np.clip(covered, 0, 1)
+
+######## painting ########
+def composite(destination, source, top, left):
+    # source-over of the premultiplied source placed at (top, left), clipped to the destination
+    height, width = source.shape[:2]
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(top + height, destination.shape[0]), min(left + width, destination.shape[1])
+    if y0 >= y1 or x0 >= x1: return
+    layer = source[y0 - top:y1 - top, x0 - left:x1 - left]
+    region = destination[y0:y1, x0:x1]
+    region *= 1 - layer[..., 3:]
+    region += layer
+
+def pixel_centers(top, left, height, width, matrix):
+    # user space coordinates of the pixel centers of a region, for gradients
+    ys, xs = np.mgrid[top:top + height, left:left + width] + 0.5
+    inverse = np.linalg.inv(matrix)
+    return inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2], inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2]
+
+def gradient_paint(gradient, bbox, top, left, height, width, matrix):
+    # straight (h, w, 3) colors and (h, w) opacities of a linear gradient over a region
+    a = gradient.attribs
+    stops = [stop for stop in gradient.elements if stop.elementname == "stop"]
+    if not stops: return None, None
+    offsets = np.maximum.accumulate([min(max(number(stop.attribs.get("offset", 0)), 0), 1) for stop in stops])
+    colors = np.array([parse_color(stop.attribs.get("stop-color", "black")) for stop in stops])
+    opacities = np.array([number(stop.attribs.get("stop-opacity", 1)) for stop in stops])
+
+    x, y = pixel_centers(top, left, height, width, matrix)
+    if a.get("gradientUnits", "objectBoundingBox") == "objectBoundingBox":
+        (bx0, by0), (bx1, by1) = bbox
+        x, y = (x - bx0) / max(bx1 - bx0, 1e-12), (y - by0) / max(by1 - by0, 1e-12)
+    x1, y1 = number(a.get("x1", 0)), number(a.get("y1", 0))
+    x2, y2 = number(a.get("x2", 1)), number(a.get("y2", 0))
+    dx, dy = x2 - x1, y2 - y1
+    t = np.clip(((x - x1) * dx + (y - y1) * dy) / max(dx * dx + dy * dy, 1e-12), 0, 1) # spreadMethod pad
+
+    rgb = np.stack([np.interp(t, offsets, colors[:, channel]) for channel in range(3)], axis=-1)
+    return rgb, np.interp(t, offsets, opacities)
+
+def fill_layer(element, subpaths, matrix, opacity, scene):
+    """
+    Rasterize the fill of one shape.
+
+    Returns:
+        tuple: (top, left, layer) with layer the premultiplied (h, w, 4) RGBA pixels, or None if nothing is drawn.
+    """
+    a = element.attribs
+    fill = str(a.get("fill", "black")).strip()
+    opacity = opacity * number(a.get("opacity", 1)) * number(a.get("fill-opacity", 1))
+    polygons = flatten(subpaths, matrix @ scene.device)
+    covered = coverage(polygons, scene.width, scene.height, scene.supersample)
+    if covered is None or opacity <= 0: return None
+    top, left, alpha = covered
+    height, width = alpha.shape
+
+    reference = re.fullmatch(r"url\(#(.+)\)", fill)
+    if reference:
+        gradient = scene.definitions.get(reference.group(1))
+        if gradient is None or gradient.elementname != "linearGradient": return None
+        rgb, stop_opacity = gradient_paint(gradient, bounds(subpaths), top, left, height, width, scene.device @ matrix)
+        if rgb is None: return None
+        alpha = alpha * stop_opacity
+    else:
+        rgb = parse_color(fill)
+        if rgb is None: return None
+
+    layer = np.empty((height, width, 4), dtype=np.float32)
+    layer[..., 3] = alpha * opacity
+    layer[..., :3] = rgb * layer[..., 3:]
+    return top, left, layer
+
+######## filters ########
+def to_linear(rgb):
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+def to_srgb(rgb):
+    return np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.maximum(rgb, 0) ** (1 / 2.4) - 0.055)
+
+def unpremultiply(layer):
+    alpha = layer[..., 3:]
+    return np.clip(np.divide(layer[..., :3], alpha, out=np.zeros_like(layer[..., :3]), where=alpha > 0), 0, 1), alpha
+
+# the transfer functions sampled for converting whole layers, 12 bits are plenty for 8 bit output
+TRANSFER_STEPS = 4096
+TO_LINEAR = to_linear(np.linspace(0, 1, TRANSFER_STEPS)).astype(np.float32)
+TO_SRGB = to_srgb(np.linspace(0, 1, TRANSFER_STEPS)).astype(np.float32)
+
+def convert(layer, table):
+    # apply a color space conversion table to the straight colors of a premultiplied layer
+    rgb, alpha = unpremultiply(layer)
+    return np.concatenate((table[np.rint(rgb * (TRANSFER_STEPS - 1)).astype(np.int32)] * alpha, alpha), axis=-1)
+
+def alpha_only(layer):
+    return np.concatenate((np.zeros_like(layer[..., :3]), layer[..., 3:]), axis=-1)
+
+def box_blur(image, axis, size, offset):
+    # mean over image[x - offset : x - offset + size] along axis, transparent outside
+    padding = [(0, 0)] * image.ndim
+    padding[axis] = (size + 1, size)
+    sums = np.cumsum(np.pad(image, padding), axis=axis)
+    start = np.arange(image.shape[axis]) - offset + size
+    return (np.take(sums, start + size, axis=axis) - np.take(sums, start, axis=axis)) / size
+
+def gaussian_blur(image, axis, deviation):
+    # the spec's three box blurs for larger deviations, a sampled gaussian for small ones
+    if deviation <= 0: return image
+    if deviation < 2:
+        radius = math.ceil(3 * deviation)
+        weights = np.exp(-0.5 * (np.arange(-radius, radius + 1) / deviation) ** 2)
+        padding = [(0, 0)] * image.ndim
+        padding[axis] = (radius, radius)
+        padded = np.pad(image, padding)
+        length = image.shape[axis]
+        return sum(weight * np.take(padded, np.arange(k, k + length), axis=axis) for k, weight in enumerate(weights / weights.sum()))
+
+    d = math.floor(deviation * 3 * math.sqrt(2 * math.pi) / 4 + 0.5)
+    if d % 2: return box_blur(box_blur(box_blur(image, axis, d, d // 2), axis, d, d // 2), axis, d, d // 2)
+    return box_blur(box_blur(box_blur(image, axis, d, d // 2), axis, d, d // 2 - 1), axis, d + 1, d // 2)
+
+def shift(image, dx, dy):
+    # move by whole pixels, transparent where nothing moves in
+    result = np.zeros_like(image)
+    height, width = image.shape[:2]
+    if abs(dx) >= width or abs(dy) >= height: return result
+    result[max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)] = image[max(-dy, 0):height - max(dy, 0), max(-dx, 0):width - max(dx, 0)]
+    return result
+
+def fe_gaussian_blur(primitive, source, _, context):
+    deviations = [number(value) * context["scale"] for value in str(primitive.attribs.get("stdDeviation", 0)).replace(",", " ").split()]
+    deviation_x, deviation_y = deviations[0], deviations[-1]
+    if not source[..., :3].any():
+        # e.g. SourceAlpha, only the alpha channel needs blurring
+        return alpha_only(gaussian_blur(gaussian_blur(source[..., 3:], 1, deviation_x), 0, deviation_y).repeat(4, axis=-1))
+    return gaussian_blur(gaussian_blur(source, 1, deviation_x), 0, deviation_y)
+
+def fe_offset(primitive, source, _, context):
+    return shift(source, round(number(primitive.attribs.get("dx", 0)) * context["scale"]), round(number(primitive.attribs.get("dy", 0)) * context["scale"]))
+
+def fe_flood(primitive, source, _, context):
+    rgb = parse_color(primitive.attribs.get("flood-color", "black"))
+    opacity = number(primitive.attribs.get("flood-opacity", 1))
+    if rgb is None: return np.zeros_like(source)
+    layer = np.empty_like(source)
+    layer[..., :3] = context["color"](rgb) * opacity
+    layer[..., 3] = opacity
+    return layer
+
+def fe_composite(primitive, a, b, _):
+    alpha_a, alpha_b = a[..., 3:], b[..., 3:]
+    operator = primitive.attribs.get("operator", "over")
+    if operator == "in": return a * alpha_b
+    if operator == "out": return a * (1 - alpha_b)
+    if operator == "atop": return a * alpha_b + b * (1 - alpha_a)
+    if operator == "xor": return a * (1 - alpha_b) + b * (1 - alpha_a)
+    if operator == "arithmetic":
+        k1, k2, k3, k4 = (number(primitive.attribs.get(f"k{i}", 0)) for i in range(1, 5))
+        result = np.clip(k1 * a * b + k2 * a + k3 * b + k4, 0, 1)
+        result[..., :3] = np.minimum(result[..., :3], result[..., 3:])
+        return result
+    return a + b * (1 - alpha_a)
+
+def fe_blend(primitive, a, b, _):
+    # premultiplied blend modes, a on top of b
+    alpha_a, alpha_b = a[..., 3:], b[..., 3:]
+    ca, cb = a[..., :3], b[..., :3]
+    mode = primitive.attribs.get("mode", "normal")
+    if mode == "multiply": rgb = (1 - alpha_a) * cb + (1 - alpha_b) * ca + ca * cb
+    elif mode == "screen": rgb = cb + ca - ca * cb
+    elif mode == "darken": rgb = np.minimum((1 - alpha_a) * cb + ca, (1 - alpha_b) * ca + cb)
+    elif mode == "lighten": rgb = np.maximum((1 - alpha_a) * cb + ca, (1 - alpha_b) * ca + cb)
+    else: rgb = ca + (1 - alpha_a) * cb
+    return np.concatenate((rgb, alpha_a + alpha_b - alpha_a * alpha_b), axis=-1)
+
+def fe_color_matrix(primitive, source, _, __):
+    kind = primitive.attribs.get("type", "matrix")
+    values = [float(value) for value in str(primitive.attribs.get("values", "")).replace(",", " ").split()]
+    if kind == "luminanceToAlpha":
+        matrix = np.zeros((4, 5))
+        matrix[3, :3] = [0.2125, 0.7154, 0.0721]
+    elif kind == "saturate":
+        s = values[0] if values else 1
+        matrix = np.zeros((4, 5))
+        matrix[:3, :3] = [[0.213 + 0.787 * s, 0.715 - 0.715 * s, 0.072 - 0.072 * s],
+                          [0.213 - 0.213 * s, 0.715 + 0.285 * s, 0.072 - 0.072 * s],
+                          [0.213 - 0.213 * s, 0.715 - 0.715 * s, 0.072 + 0.928 * s]]
+        matrix[3, 3] = 1
+    elif kind == "hueRotate":
+        angle = math.radians(values[0] if values else 0)
+        cos, sin = math.cos(angle), math.sin(angle)
+        matrix = np.zeros((4, 5))
+        matrix[:3, :3] = np.array([[0.213, 0.715, 0.072]] * 3) + cos * np.array([[0.787, -0.715, -0.072], [-0.213, 0.285, -0.072], [-0.213, -0.715, 0.928]]) \
+            + sin * np.array([[-0.213, -0.715, 0.928], [0.143, 0.140, -0.283], [-0.787, 0.715, 0.072]])
+        matrix[3, 3] = 1
+    else:
+        matrix = np.array(values).reshape(4, 5) if len(values) == 20 else np.eye(4, 5)
+
+    rgb, alpha = unpremultiply(source)
+    result = np.clip(np.concatenate((rgb, alpha), axis=-1) @ matrix[:, :4].T + matrix[:, 4], 0, 1)
+    return np.concatenate((result[..., :3] * result[..., 3:], result[..., 3:]), axis=-1)
+
+def fe_merge(primitive, _, __, context):
+    result = np.zeros_like(context["source"])
+    for node in primitive.elements:
+        layer = context["input"](node.attribs.get("in"))
+        result = layer + result * (1 - layer[..., 3:])
+    return result
+
+def fe_turbulence(primitive, source, _, context):
+    a = primitive.attribs
+    frequencies = [number(value) for value in str(a.get("baseFrequency", 0)).replace(",", " ").split()]
+    region = (*context["origin"], *source.shape[:2])
+    tile = turbulence_tile(a.get("type", "turbulence"), (frequencies[0], frequencies[-1]), int(number(a.get("numOctaves", 1))), number(a.get("seed", 0)), region, context["scale"])
+    alpha = tile[..., 3:] / np.float32(255)
+    return np.concatenate((tile[..., :3] / np.float32(255) * alpha, alpha), axis=-1)
+
+def fe_diffuse_lighting(primitive, source, _, context):
+    a = primitive.attribs
+    light = next(node for node in primitive.elements if node.elementname == "fePointLight").attribs
+    position = [number(light.get(axis, 0)) * context["scale"] for axis in "xyz"]
+    color = parse_color(a.get("lighting-color", "white"))
+    if color is None: color = np.zeros(3)
+    surface_scale = number(a.get("surfaceScale", 1)) * context["scale"] # heights are in user units, the normals are taken per pixel
+    return diffuse_point_light(source[..., 3], surface_scale, number(a.get("diffuseConstant", 1)), position, context["color"](color), context["origin"])
+
+def fe_displacement_map(primitive, source, displacement, context):
+    # every pixel takes the source pixel the map points it to (nearest neighbour), transparent outside
+    a = primitive.attribs
+    rgb, alpha = unpremultiply(displacement)
+    channels = np.concatenate((rgb, alpha), axis=-1)
+    selectors = {"R": 0, "G": 1, "B": 2, "A": 3}
+    scale = number(a.get("scale", 0)) * context["scale"]
+    height, width = source.shape[:2]
+    ys, xs = np.mgrid[0:height, 0:width]
+    xs = np.floor(xs + scale * (channels[..., selectors[a.get("xChannelSelector", "A")]] - 0.5) + 0.5).astype(int)
+    ys = np.floor(ys + scale * (channels[..., selectors[a.get("yChannelSelector", "A")]] - 0.5) + 0.5).astype(int)
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    result = np.zeros_like(source)
+    result[inside] = source[ys[inside], xs[inside]]
+    return result
+
+@lru_cache(maxsize=32)
+def image_layer(href, width, height, linear):
+    # premultiplied pixels of a data: URI image stretched to (width, height) pixels
+    from PIL import Image # only needed for filters embedding images
+    header, _, data = href.partition(",")
+    image = Image.open(io.BytesIO(base64.b64decode(data) if header.endswith(";base64") else data.encode())).convert("RGBA")
+    pixels = np.asarray(image.resize((width, height), Image.BILINEAR), dtype=np.float32) / 255
+    layer = np.concatenate((pixels[..., :3] * pixels[..., 3:], pixels[..., 3:]), axis=-1)
+    layer = convert(layer, TO_LINEAR) if linear else layer
+    layer.flags.writeable = False # shared through the cache
+    return layer
+
+def fe_image(primitive, source, _, context):
+    a = primitive.attribs
+    href = str(a.get("xlink:href", a.get("href", "")))
+    result = np.zeros_like(source)
+    if not href.startswith("data:") or "width" not in a or "height" not in a: return result # only embedded images with a subregion
+    scale = context["scale"]
+    x, y = round(number(a.get("x", 0)) * scale), round(number(a.get("y", 0)) * scale)
+    width, height = round(number(a["width"]) * scale), round(number(a["height"]) * scale)
+    if width > 0 and height > 0:
+        composite(result, image_layer(href, width, height, context["linear"]), y - context["origin"][0], x - context["origin"][1])
+    return result
+
+# supported filter primitives: fn(primitive, in, in2, context) -> premultiplied layer. in2 is only passed to the ones using it
+FILTER_PRIMITIVES = {
+    "feGaussianBlur": fe_gaussian_blur,
+    "feOffset": fe_offset,
+    "feFlood": fe_flood,
+    "feComposite": fe_composite,
+    "feBlend": fe_blend,
+    "feColorMatrix": fe_color_matrix,
+    "feMerge": fe_merge,
+    "feTurbulence": fe_turbulence,
+    "feDiffuseLighting": fe_diffuse_lighting,
+    "feDisplacementMap": fe_displacement_map,
+    "feImage": fe_image,
+}
+TWO_INPUTS = {"feComposite", "feBlend", "feDisplacementMap"}
+
+def filter_region(filter_element, bbox, viewport):
+    # (x, y, width, height) of the region a filter applies to, in the user units of the filtered element
+    (bx0, by0), (bx1, by1) = bbox
+    a = filter_element.attribs
+    if a.get("filterUnits", "objectBoundingBox") == "objectBoundingBox":
+        x, y = bx0 + number(a.get("x", "-10%")) * (bx1 - bx0), by0 + number(a.get("y", "-10%")) * (by1 - by0)
+        return x, y, number(a.get("width", "120%")) * (bx1 - bx0), number(a.get("height", "120%")) * (by1 - by0)
+    x, y = number(a.get("x", "-10%"), viewport[0]), number(a.get("y", "-10%"), viewport[1])
+    return x, y, number(a.get("width", "120%"), viewport[0]), number(a.get("height", "120%"), viewport[1])
+
+def filter_margin(primitives):
+    # how far outside their region (in user units) primitives read pixels from, e.g. an feOffset shifting noise in
+    margin = 0.0
+    for primitive in primitives:
+        a = primitive.attribs
+        if primitive.elementname == "feOffset": margin += max(abs(number(a.get("dx", 0))), abs(number(a.get("dy", 0))))
+        elif primitive.elementname == "feGaussianBlur": margin += 3 * max(number(value) for value in str(a.get("stdDeviation", 0)).replace(",", " ").split())
+        elif primitive.elementname == "feDisplacementMap": margin += abs(number(a.get("scale", 0))) / 2
+    return margin
+
+def supported(primitive):
+    if primitive.elementname == "feDiffuseLighting": return any(node.elementname == "fePointLight" for node in primitive.elements)
+    return primitive.elementname in FILTER_PRIMITIVES
+
+def run_primitives(primitives, source, scale, origin, linear):
+    """
+    Run filter primitives on the premultiplied RGBA pixels of a filter region.
+
+    Args:
+        primitives (list): The primitive elements, all supported.
+        source (numpy.ndarray): SourceGraphic of the region.
+        scale (float): Pixels per user unit.
+        origin (tuple): (top, left) of the region on the canvas in pixels.
+        linear (bool): Whether the primitives work in linearRGB (the default of color-interpolation-filters).
+
+    Returns:
+        tuple: The named results and the last primitive's result (None without primitives), in the filter's color space.
+    """
+    # the standard inputs are only prepared if a primitive uses them
+    sources = {
+        "SourceGraphic": lambda: convert(source, TO_LINEAR) if linear else source,
+        "SourceAlpha": lambda: alpha_only(source),
+    }
+    results = {}
+    previous = None
+    def input(name):
+        if name is None and previous is not None: return previous
+        name = name or "SourceGraphic"
+        if name not in results and name in sources: results[name] = sources[name]()
+        return results.get(name, np.zeros_like(source)) # BackgroundImage etc. aren't available
+
+    context = {"scale": scale, "origin": origin, "linear": linear, "source": source, "input": input, "color": to_linear if linear else (lambda rgb: rgb)}
+    for primitive in primitives:
+        a = primitive.attribs
+        second = input(a.get("in2")) if primitive.elementname in TWO_INPUTS else None
+        previous = FILTER_PRIMITIVES[primitive.elementname](primitive, input(a.get("in")), second, context)
+        if a.get("result"): results[a["result"]] = previous
+    return results, previous
+
+def apply_filter(filter_element, source, scale, origin=(0, 0)):
+    """
+    Run a filter's primitives on the premultiplied RGBA pixels of its filter region, whose top left pixel is origin.
+
+    Returns:
+        numpy.ndarray: The filtered layer, or None if the filter uses a primitive that isn't supported.
+    """
+    if not all(supported(primitive) for primitive in filter_element.elements): return None
+    linear = filter_element.attribs.get("color-interpolation-filters", "linearRGB") != "sRGB"
+    _, result = run_primitives(filter_element.elements, source, scale, origin, linear)
+    if result is None: return source
+    return convert(result, TO_SRGB) if linear else result
+
+class Scene:
+    """
+    Rasterizes an element tree into a premultiplied RGBA array.
+
+    Args:
+        dwg: The root of the tree, i.e. the svgwrite drawing render.build_drawing returns or a frame from smil.sample().
+            The stream backend doesn't keep its elements, so it can't be rasterized.
+        size (tuple): The (width, height) of the drawing in user units, i.e. (C['W'], C['H']).
+        scale (float): Pixels per user unit, 2 gives an image twice the size of the SVG.
+        supersample (int): Sub-scanlines per pixel row for anti-aliasing.
+    """
+    def __init__(self, dwg, size, scale=1.0, supersample=DEFAULT_SUPERSAMPLE):
+        self.dwg = dwg
+        self.size = size
+        self.scale = scale
+        self.supersample = supersample
+        self.width, self.height = max(round(size[0] * scale), 1), max(round(size[1] * scale), 1)
+        self.device = np.diag([scale, scale, 1.0]) # user space -> pixels
+        self.definitions = drawing_definitions(dwg)
+
+    def rasterize(self):
+        canvas = np.zeros((self.height, self.width, 4), dtype=np.float32)
+        for element in self.dwg.elements:
+            if element.elementname != "defs": self.draw(canvas, element, np.eye(3), 1.0)
+        return canvas
+
+    def draw(self, canvas, element, matrix, opacity):
+        matrix = matrix @ parse_transform(element.attribs.get("transform"))
+        filter_element = self.filter_of(element)
+        if element.elementname == "use":
+            # the referenced shape, or a symbol's content, moved by x and y. filters on the <use> itself are ignored
+            target = use_target(element, self.definitions)
+            if target is None: return
+            matrix = matrix @ parse_transform(f"translate({' '.join(map(str, use_offset(element, self.size)))})")
+            opacity = opacity * number(element.attribs.get("opacity", 1))
+            for child in target.elements if target.elementname == "symbol" else [target]:
+                self.draw(canvas, child, matrix, opacity)
+            return
+        if element.elementname == "g":
+            # group opacity is applied to every child, which only differs from the real thing where children overlap
+            opacity = opacity * number(element.attribs.get("opacity", 1))
+            if filter_element is not None and self.draw_filtered(canvas, element, None, matrix, opacity, filter_element): return
+            for child in element.elements:
+                self.draw(canvas, child, matrix, opacity)
+            return
+
+        subpaths = element_path(element, self.size)
+        if not subpaths: return
+        if filter_element is not None and self.draw_filtered(canvas, element, subpaths, matrix, opacity, filter_element): return
+
+        # no filter, or one referencing a filter that doesn't exist/isn't supported: the shape as is
+        layer = fill_layer(element, subpaths, matrix, opacity, self)
+        if layer is not None: composite(canvas, layer[2], layer[0], layer[1])
+
+    def filter_of(self, element):
+        reference = re.fullmatch(r"url\(#(.+)\)", str(element.attribs.get("filter", "")).strip())
+        return self.definitions.get(reference.group(1)) if reference else None
+
+    def draw_filtered(self, canvas, element, subpaths, matrix, opacity, filter_element):
+        # render the shape (or the group, if subpaths is None) into the filter region, run the primitives on it and composite the result
+        bbox = bounds(subpaths) if subpaths is not None else element_bounds(element, self.size, self.definitions)
+        if bbox is None: return True # an empty group
+        x, y, width, height = filter_region(filter_element, bbox, self.size)
+        corners = np.array([[x, y, 1], [x + width, y, 1], [x, y + height, 1], [x + width, y + height, 1]]) @ (self.device @ matrix).T
+        # the region is clipped to the canvas, plus what the primitives may pull in from outside of it
+        margin = math.ceil(filter_margin(filter_element.elements) * self.scale)
+        left, top = np.maximum(np.floor(corners[:, :2].min(axis=0)).astype(int), -margin)
+        right, bottom = np.ceil(corners[:, :2].max(axis=0)).astype(int)
+        right, bottom = min(right, self.width + margin), min(bottom, self.height + margin)
+        if left >= right or top >= bottom or right <= 0 or bottom <= 0 or left >= self.width or top >= self.height: return True # the filter region is off canvas
+
+        source = np.zeros((bottom - top, right - left, 4), dtype=np.float32)
+        if subpaths is not None:
+            layer = fill_layer(element, subpaths, matrix, 1.0, self)
+            if layer is not None: composite(source, layer[2], layer[0] - top, layer[1] - left)
+        else:
+            children = np.zeros((self.height, self.width, 4), dtype=np.float32)
+            for child in element.elements: self.draw(children, child, matrix, 1.0)
+            composite(source, children, -top, -left)
+
+        result = apply_filter(filter_element, source, self.scale, (top, left))
+        if result is None: return False
+        composite(canvas, result * opacity, top, left)
+        return True
+
+def to_pixels(canvas):
+    # premultiplied floats to straight uint8 RGBA
+    alpha = canvas[..., 3:]
+    rgb = np.divide(canvas[..., :3], alpha, out=np.zeros_like(canvas[..., :3]), where=alpha > 0)
+    return np.round(np.clip(np.concatenate((rgb, alpha), axis=-1), 0, 1) * 255).astype(np.uint8)
+
+def rasterize(dwg, size, scale=1.0, supersample=DEFAULT_SUPERSAMPLE):
+    """
+    Rasterize an svgwrite drawing (or a frame of one, see smil.sample()).
+
+    Returns:
+        numpy.ndarray: The (height, width, 4) uint8 RGBA pixels. Identical for identical drawings, no randomness involved.
+    """
+    return to_pixels(Scene(dwg, size, scale, supersample).rasterize())
+
+def save_image(pixels, fileobj, format="PNG"):
+    from PIL import Image # only needed for writing files
+    Image.fromarray(pixels, "RGBA").save(fileobj, format=format)
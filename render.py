@@ -0,0 +1,261 @@
+import argparse
+import gzip
+import importlib
+import io
+import json
+import os
+import random
+import svgstream
+from palettes import get_colors
+from profiling import span
+from background import checkpoint
+
+GENERAL_DEFAULTS = {
+    "SEED": 3,
+    "W": 600,
+    "H": 600,
+    "COLOR_SCHEME": "viridis",
+    "HAS_BACKGROUND": True,
+    "BACKGROUND_COLOR": "#fff",
+    "IS_ANIMATED": True,
+    "REPEAT_ANIMATION": True,
+    "ANIMATION_DURATION": 5.0,
+    "PATH_PRECISION": 2,
+    "BAKE_FILTERS": False,
+    "COST_BUDGET": 0.0,
+    "COMPACT_OUTPUT": False,
+    "ANIMATION_BACKEND": "smil",
+    "MODULE": "Waves",
+}
+
+# svgwrite keeps the whole element tree until it's written, the stream backend writes elements as they're drawn
+BACKENDS = ["svgwrite", "stream"]
+
+# how translations and rotations are animated, css turns them into shared @keyframes (see keyframes.py)
+ANIMATION_BACKENDS = ["smil", "css"]
+
+# output file types, everything but svg is rasterized by raster.py
+FORMATS = ["svg", "png", "webp"]
+
+# what draft renders leave out: everything that takes long to draw (filters, shadows, noise) or only shows over time.
+# the Filters module is nothing without its filter, its turbulence gets a single octave instead
+DRAFT_OVERRIDES = {
+    "IS_ANIMATED": False,
+    "HAS_NOISE": False,
+    "HAS_SHADOW": False,
+    "IS_TEXTURED": False,
+    "IS_DISTORTED": False,
+    "NUM_OCTAVES": 1,
+    "BAKE_FILTERS": False,
+    "COST_BUDGET": 0.0,
+}
+
+# keys of presets that describe them rather than the graphic
+PRESET_METADATA = ("name", "tags")
+
+# python module, generator function and defaults per graphic type. the modules are only imported once a
+# graphic of that type is rendered, so e.g. bubbles never pull in numpy
+MODULES = {
+    "Bubbles": ("bubbles", "generate_bubbles", "BUBBLE_DEFAULTS"),
+    "Filters": ("filters", "generate_filters", "FILTER_DEFAULTS"),
+    "Waves": ("waves", "generate_waves", "WAVE_DEFAULTS"),
+    "Splotches": ("splotches", "generate_splotches", "SPLOTCH_DEFAULTS"),
+}
+
+def get_generator(module):
+    module_name, generate, _ = MODULES[module]
+    return getattr(importlib.import_module(module_name), generate)
+
+def get_defaults(module):
+    module_name, _, defaults = MODULES[module]
+    return getattr(importlib.import_module(module_name), defaults)
+
+def load_presets(path="presets.json"):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def resolve_config(config, seed=None, width=None, height=None):
+    """
+    Turn a preset (or a config dumped from the app) into a complete config.
+
+    Args:
+        config (dict): The preset. Missing settings fall back to the defaults of its module.
+        seed (int): Overrides SEED if given.
+        width (int): Overrides W if given.
+        height (int): Overrides H if given.
+
+    Returns:
+        tuple: The config dict C and the OTHER_CONFIG dict holding the palette colors.
+    """
+    module = config.get("MODULE", GENERAL_DEFAULTS["MODULE"])
+    if module not in MODULES:
+        raise ValueError(f"Unknown module '{module}', expected one of {list(MODULES)}.")
+
+    C = GENERAL_DEFAULTS | get_defaults(module) | {key: value for key, value in config.items() if key not in PRESET_METADATA}
+    if seed is not None: C["SEED"] = seed
+    if width is not None: C['W'] = width
+    if height is not None: C['H'] = height
+
+    OTHER_CONFIG = {"COLORS": get_colors(C["COLOR_SCHEME"])}
+    return C, OTHER_CONFIG
+
+def draft_config(C):
+    # a copy of C for a quick draft of the same graphic, see DRAFT_OVERRIDES
+    return C | {key: value for key, value in DRAFT_OVERRIDES.items() if key in C}
+
+def build_drawing(C, OTHER_CONFIG, stream=None, log=None):
+    # set up the drawing environment. every drawing gets its own random stream so that
+    # renders in parallel processes/threads give the same output as serial ones.
+    # if a stream (file object) is given, elements are written to it right away instead of building an svgwrite tree.
+    # if a log (list) is given, what fitting the budget and baking changed is appended to it
+    rng = random.Random(C["SEED"])
+    if stream is None:
+        import svgwrite # only the svgwrite backend needs it
+        dwg = svgwrite.Drawing(size=(C['W'], C['H']))
+    else:
+        dwg = svgstream.Drawing(stream, size=(C['W'], C['H']))
+
+    # add the default background
+    if C["HAS_BACKGROUND"]:
+        bg_rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=C["BACKGROUND_COLOR"].strip().lower())
+        dwg.add(bg_rect)
+
+    checkpoint()
+    if C["MODULE"] in MODULES:
+        with span("import"): generate = get_generator(C["MODULE"])
+        with span(f"generate {C['MODULE']}"): dwg = generate(dwg, C, OTHER_CONFIG, rng)
+
+    if stream is not None:
+        dwg.close()
+        return dwg
+    checkpoint()
+    if C["COST_BUDGET"] > 0:
+        from cost import fit_budget # pulls in numpy and the rasterizer
+        with span("fit budget"): changes = fit_budget(dwg, (C['W'], C['H']), C["COST_BUDGET"])
+        if log is not None: log += changes
+    if C["BAKE_FILTERS"]:
+        from bake import bake_filters
+        with span("bake filters"): baked = bake_filters(dwg, (C['W'], C['H']))
+        if log is not None: log += baked
+    if C["ANIMATION_BACKEND"] == "css":
+        from keyframes import css_animations
+        with span("css animations"): css_animations(dwg, C["PATH_PRECISION"])
+    if C["COMPACT_OUTPUT"]:
+        from compact import compact_attributes
+        with span("compact"): compact_attributes(dwg, C["PATH_PRECISION"])
+    return dwg
+
+def write_svg(C, OTHER_CONFIG, fileobj, backend="svgwrite", log=None):
+    # baking, fitting a budget and css animations rewrite the drawing once it's done, the stream backend has written it by then
+    rewritten = C["BAKE_FILTERS"] or C["COST_BUDGET"] or C["ANIMATION_BACKEND"] != "smil"
+    if backend == "stream" and not rewritten: build_drawing(C, OTHER_CONFIG, fileobj)
+    else:
+        dwg = build_drawing(C, OTHER_CONFIG, log=log)
+        checkpoint()
+        with span("serialize"): dwg.write(fileobj)
+
+def to_svg(C, OTHER_CONFIG, backend="svgwrite"):
+    buffer = io.StringIO()
+    write_svg(C, OTHER_CONFIG, buffer, backend)
+    return buffer.getvalue()
+
+def to_image(C, OTHER_CONFIG, scale=1.0, format="png", log=None):
+    """
+    Rasterize the drawing without a browser, see raster.py.
+
+    Args:
+        scale (float): Pixels per SVG unit, i.e. the image is scale * W by scale * H pixels.
+        format (str): Any image format Pillow can write with an alpha channel, e.g. "png" or "webp".
+        log (list): If given, what fitting the budget and baking changed is appended to it, see build_drawing.
+
+    Returns:
+        bytes: The encoded image, identical for identical configs.
+    """
+    from raster import rasterize, save_image
+    buffer = io.BytesIO()
+    dwg = build_drawing(C | {"ANIMATION_BACKEND": "smil"}, OTHER_CONFIG, log=log) # the rasterizer samples SMIL animations only
+    with span("rasterize"): pixels = rasterize(dwg, (C['W'], C['H']), scale)
+    with span("encode"): save_image(pixels, buffer, format)
+    return buffer.getvalue()
+
+def render(config, seed=None, width=None, height=None, backend="svgwrite"):
+    """
+    Render a preset or config to an SVG document without going through streamlit.
+
+    Returns:
+        str: The SVG document. With the default svgwrite backend it's identical to what the app writes for
+        the same config, the stream backend writes the same elements but places definitions next to where they're first used.
+    """
+    C, OTHER_CONFIG = resolve_config(config, seed, width, height)
+    return to_svg(C, OTHER_CONFIG, backend)
+
+def compress_svg(svg):
+    # gzip for .svgz files/downloads, mtime=0 keeps the bytes deterministic
+    return gzip.compress(svg.encode("utf-8"), mtime=0)
+
+def open_output(path, compress=False):
+    # text file to write an SVG to, gzipped (.svgz) if compress is set
+    if compress: return io.TextIOWrapper(gzip.GzipFile(path, 'wb', mtime=0), encoding="utf-8")
+    return open(path, 'w', encoding="utf-8")
+
+def slugify(name):
+    return "".join(c if c.isalnum() else "-" for c in name.lower()).strip("-")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render bubbles presets to SVG files without the streamlit app.")
+    parser.add_argument("--presets", default="presets.json", help="preset file to read --preset names from")
+    parser.add_argument("-p", "--preset", action="append", default=[], help="name of a preset to render (repeatable)")
+    parser.add_argument("-c", "--config", action="append", default=[], help="path to a config JSON file to render (repeatable)")
+    parser.add_argument("-s", "--seed", type=int, nargs="+", help="seed(s) to render each config with, defaults to the config's SEED")
+    parser.add_argument("--width", type=int, help="canvas width override")
+    parser.add_argument("--height", type=int, help="canvas height override")
+    parser.add_argument("-o", "--output-dir", default="output", help="directory to write the SVG files to")
+    parser.add_argument("--backend", choices=BACKENDS, default="svgwrite", help="how the SVG is built, 'stream' keeps memory flat for huge drawings")
+    parser.add_argument("-z", "--gzip", action="store_true", help="write gzip compressed .svgz files")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="svg", help="write SVGs or rasterize to PNG/WebP images")
+    parser.add_argument("--scale", type=float, default=1.0, help="pixels per SVG unit for PNG/WebP images")
+    parser.add_argument("--bake", action="store_true", help="embed pre-rendered images of the static parts of filters (BAKE_FILTERS)")
+    parser.add_argument("--compact", action="store_true", help="write short relative path data and round/drop attributes (COMPACT_OUTPUT), best combined with -z")
+    parser.add_argument("--animation", choices=ANIMATION_BACKENDS, help="animate translations and rotations with SMIL or CSS @keyframes (ANIMATION_BACKEND)")
+    parser.add_argument("--budget", type=float, help="degrade the drawings until their estimated render cost fits (COST_BUDGET, see cost.py)")
+    parser.add_argument("--list", action="store_true", help="list the available presets and exit")
+    args = parser.parse_args(argv)
+
+    presets = load_presets(args.presets)
+    if args.list:
+        for preset in presets:
+            print(f"{preset['name']} ({preset.get('MODULE', GENERAL_DEFAULTS['MODULE'])})")
+        return
+
+    configs = []
+    for name in args.preset:
+        preset = next((preset for preset in presets if preset["name"] == name), None)
+        if preset is None: parser.error(f"no preset named '{name}' in {args.presets}")
+        configs.append((slugify(name), preset))
+    for path in args.config:
+        with open(path, 'r') as file:
+            configs.append((slugify(os.path.splitext(os.path.basename(path))[0]), json.load(file)))
+    if not configs: parser.error("nothing to render, pass --preset and/or --config")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for slug, config in configs:
+        for seed in args.seed or [None]:
+            C, OTHER_CONFIG = resolve_config(config, seed, args.width, args.height)
+            if args.bake: C["BAKE_FILTERS"] = True
+            if args.budget is not None: C["COST_BUDGET"] = args.budget
+            if args.compact: C["COMPACT_OUTPUT"] = True
+            if args.animation: C["ANIMATION_BACKEND"] = args.animation
+            log = []
+            if args.format != "svg":
+                path = os.path.join(args.output_dir, f"{slug}-{C['SEED']}.{args.format}")
+                with open(path, 'wb') as file:
+                    file.write(to_image(C, OTHER_CONFIG, args.scale, args.format, log))
+            else:
+                path = os.path.join(args.output_dir, f"{slug}-{C['SEED']}.{'svgz' if args.gzip else 'svg'}")
+                with open_output(path, args.gzip) as file:
+                    write_svg(C, OTHER_CONFIG, file, args.backend, log)
+            print(path)
+            for change in log: print(f"    {change}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,7 @@
 import streamlit as st
-import matplotlib.colors as mcolors
-import matplotlib.pyplot as plt
-from bubbles import bubble_settings
-from filters import filter_settings
-from waves import wave_settings
-from splotches import splotch_settings
+from palettes import get_palettes, get_colors
+from render import GENERAL_DEFAULTS, ANIMATION_BACKENDS
+from profiling import span
 import pprint
 import json
 
@@ -24,40 +21,56 @@ def show_config_modal(CONFIG, sp):
     formatted_config = json.dumps(config, indent=4, sort_keys=sort_items) if is_json else pprint.pformat(config, indent=4, sort_dicts=sort_items).replace("{", "{\n ").replace("'", '"')
     st.code(formatted_config, language='json' if is_json else "python")
 
-def settings_component(C, OTHER_CONFIG, presets):
+def settings_component(C, OTHER_CONFIG, store):
     ##### PRESETS #####
-    preset_names = [preset["name"] for preset in presets]
-    PRESET = st.sidebar.selectbox("Choose Preset", preset_names, index=preset_names.index("Textured Animated Splotch"))
-    sp = next(preset for preset in presets if preset["name"] == PRESET) # selected preset
+    preset_names = store.names()
+    if "preset" not in st.session_state: st.session_state.preset = store.default_name()
+    PRESET = st.sidebar.selectbox("Choose Preset", preset_names, key="preset")
+    sp = store.get(PRESET) # selected preset
 
     ##### GENERAL SETTINGS #####
     st.sidebar.header("General Settings")
-    C["SEED"] = st.sidebar.number_input("Random Seed", value = sp.get("SEED", 3), help="SEED")
+    C["SEED"] = st.sidebar.number_input("Random Seed", value = sp.get("SEED", GENERAL_DEFAULTS["SEED"]), help="SEED")
     with st.sidebar.expander("General Settings"):
-        C['W'] = st.number_input("Width", value=sp.get("W", 600), step=1, help="W")
-        C['H'] = st.number_input("Height", value=sp.get("H", 600), step=1, help="H")
-        valid_color_schemes = [cmap_name for cmap_name in plt.colormaps() if hasattr(plt.get_cmap(cmap_name), 'colors')]
-        C["COLOR_SCHEME"] = st.selectbox("Color Scheme", valid_color_schemes, index=valid_color_schemes.index(sp.get("COLOR_SCHEME", 600)), help="COLOR_SCHEME")
-        OTHER_CONFIG["COLORS"] = [mcolors.rgb2hex(color) for color in plt.get_cmap(C["COLOR_SCHEME"]).colors]
-        C["HAS_BACKGROUND"] = st.checkbox("Add Background", value=sp.get("HAS_BACKGROUND", True), help="HAS_BACKGROUND")
+        C['W'] = st.number_input("Width", value=sp.get("W", GENERAL_DEFAULTS["W"]), step=1, help="W")
+        C['H'] = st.number_input("Height", value=sp.get("H", GENERAL_DEFAULTS["H"]), step=1, help="H")
+        C["PATH_PRECISION"] = st.number_input("Path Precision (decimals)", min_value=0, max_value=10, value=sp.get("PATH_PRECISION", GENERAL_DEFAULTS["PATH_PRECISION"]), step=1, help="PATH_PRECISION")
+        C["COMPACT_OUTPUT"] = st.checkbox("Compact Output (relative paths, rounded attributes)", value=sp.get("COMPACT_OUTPUT", GENERAL_DEFAULTS["COMPACT_OUTPUT"]), help="COMPACT_OUTPUT")
+        C["BAKE_FILTERS"] = st.checkbox("Bake Filters (embed static noise/lighting as images)", value=sp.get("BAKE_FILTERS", GENERAL_DEFAULTS["BAKE_FILTERS"]), help="BAKE_FILTERS")
+        C["COST_BUDGET"] = st.number_input("Cost Budget (0 = off, ~10 for phones)", min_value=0.0, value=float(sp.get("COST_BUDGET", GENERAL_DEFAULTS["COST_BUDGET"])), step=1.0, help="COST_BUDGET")
+        with span("palettes"): valid_color_schemes = list(get_palettes())
+        C["COLOR_SCHEME"] = st.selectbox("Color Scheme", valid_color_schemes, index=valid_color_schemes.index(sp.get("COLOR_SCHEME", GENERAL_DEFAULTS["COLOR_SCHEME"])), help="COLOR_SCHEME")
+        OTHER_CONFIG["COLORS"] = get_colors(C["COLOR_SCHEME"])
+        C["HAS_BACKGROUND"] = st.checkbox("Add Background", value=sp.get("HAS_BACKGROUND", GENERAL_DEFAULTS["HAS_BACKGROUND"]), help="HAS_BACKGROUND")
         if C["HAS_BACKGROUND"]:
-            C["BACKGROUND_COLOR"] = st.color_picker("Background Color", value=sp.get("BACKGROUND_COLOR", 600), help="BACKGROUND_COLOR")
+            C["BACKGROUND_COLOR"] = st.color_picker("Background Color", value=sp.get("BACKGROUND_COLOR", GENERAL_DEFAULTS["BACKGROUND_COLOR"]), help="BACKGROUND_COLOR")
             
     ##### GENERAL ANIMATION SETTINGS #####
     with st.sidebar.expander("General Animation Settings"):
-        C["IS_ANIMATED"] = st.checkbox("Animated", value=sp.get("IS_ANIMATED", True), help="IS_ANIMATED")
-        C["REPEAT_ANIMATION"] = st.checkbox("Repeat Animation", value=sp.get("REPEAT_ANIMATION", True), help="REPEAT_ANIMATION")
-        C["ANIMATION_DURATION"] = st.number_input("Animation Duration in s", value=sp.get("ANIMATION_DURATION", 5.0), step=0.1, help="ANIMATION_DURATION")
+        C["IS_ANIMATED"] = st.checkbox("Animated", value=sp.get("IS_ANIMATED", GENERAL_DEFAULTS["IS_ANIMATED"]), help="IS_ANIMATED")
+        C["REPEAT_ANIMATION"] = st.checkbox("Repeat Animation", value=sp.get("REPEAT_ANIMATION", GENERAL_DEFAULTS["REPEAT_ANIMATION"]), help="REPEAT_ANIMATION")
+        C["ANIMATION_DURATION"] = st.number_input("Animation Duration in s", value=sp.get("ANIMATION_DURATION", GENERAL_DEFAULTS["ANIMATION_DURATION"]), step=0.1, help="ANIMATION_DURATION")
+        C["ANIMATION_BACKEND"] = st.selectbox("Animation Backend (css moves and rotates off the main thread)", ANIMATION_BACKENDS, index=ANIMATION_BACKENDS.index(sp.get("ANIMATION_BACKEND", GENERAL_DEFAULTS["ANIMATION_BACKEND"])), help="ANIMATION_BACKEND")
 
     ##### TYPE SELECTION AND SETTINGS #####
     st.sidebar.header("Type Settings")
     modules = ["Bubbles", "Filters", "Waves", "Radial Waves", "Splotches"]
-    C["MODULE"] = st.sidebar.selectbox("Type of Graphic", modules, index=modules.index(sp.get("MODULE", "Waves")), help="MODULE")
+    C["MODULE"] = st.sidebar.selectbox("Type of Graphic", modules, index=modules.index(sp.get("MODULE", GENERAL_DEFAULTS["MODULE"])), help="MODULE")
 
-    if C["MODULE"] == "Bubbles": bubble_settings(C, OTHER_CONFIG, sp)
-    if C["MODULE"] == "Filters": filter_settings(C, OTHER_CONFIG, sp)
-    if C["MODULE"] == "Waves": wave_settings(C, OTHER_CONFIG, sp)
-    if C["MODULE"] == "Splotches": splotch_settings(C, OTHER_CONFIG, sp)
+    with span("type settings"):
+        # only the selected type's module is imported
+        if C["MODULE"] == "Bubbles":
+            from bubbles import bubble_settings
+            bubble_settings(C, OTHER_CONFIG, sp)
+        if C["MODULE"] == "Filters":
+            from filters import filter_settings
+            filter_settings(C, OTHER_CONFIG, sp)
+        if C["MODULE"] == "Waves":
+            from waves import wave_settings
+            wave_settings(C, OTHER_CONFIG, sp)
+        if C["MODULE"] == "Splotches":
+            from splotches import splotch_settings
+            splotch_settings(C, OTHER_CONFIG, sp)
         
     if st.sidebar.button("See Config Definition"):
         show_config_modal(C, sp)
@@ -0,0 +1,133 @@
+import bisect
+import re
+from itertools import zip_longest
+from svgstream import Element, value_to_string
+
+# elements that animate their parent instead of being drawn
+ANIMATIONS = {"animate", "animateTransform"}
+
+NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+def clock_value(value):
+    # seconds of a clock value such as '5.0s', '200ms' or '2'
+    value = str(value).strip()
+    for suffix, factor in (("ms", 0.001), ("min", 60), ("h", 3600), ("s", 1)):
+        if value.endswith(suffix): return float(value[:-len(suffix)]) * factor
+    return float(value)
+
+def ease(spline, progress):
+    # y of the keySplines bezier (0,0) (x1,y1) (x2,y2) (1,1) where its x is progress, found by bisection
+    x1, y1, x2, y2 = spline
+    def bezier(s, first, second): return 3 * (1 - s) ** 2 * s * first + 3 * (1 - s) * s ** 2 * second + s ** 3
+
+    low, high = 0.0, 1.0
+    for _ in range(32):
+        middle = (low + high) / 2
+        if bezier(middle, x1, x2) < progress: low = middle
+        else: high = middle
+    return bezier((low + high) / 2, y1, y2)
+
+def interpolate(start, end, amount):
+    """
+    Interpolate two values number by number, e.g. path data of the same shape, '0 0' and '10 20' or plain numbers.
+
+    Values with a different structure (text between the numbers) can't be interpolated and switch halfway, like browsers do.
+    """
+    if isinstance(start, (int, float)) and isinstance(end, (int, float)): return start + (end - start) * amount
+    template_start, template_end = NUMBER.split(str(start)), NUMBER.split(str(end))
+    if template_start != template_end: return start if amount < 0.5 else end
+
+    numbers = [repr(a + (b - a) * amount) for a, b in zip(map(float, NUMBER.findall(str(start))), map(float, NUMBER.findall(str(end))))]
+    return "".join(text + number for text, number in zip_longest(template_start, numbers, fillvalue=""))
+
+def animation_values(animation):
+    a = animation.attribs
+    if a.get("values") is not None:
+        values = a["values"]
+        return list(values) if isinstance(values, (list, tuple)) else [value.strip() for value in value_to_string(values).split(";")]
+    return [a.get("from"), a.get("to")]
+
+def value_at(animation, progress):
+    """
+    The value of an animation at progress (0-1) through its simple duration, following calcMode, keyTimes and keySplines.
+    """
+    a = animation.attribs
+    values = animation_values(animation)
+    mode = a.get("calcMode", "linear")
+    if len(values) == 1: return values[0]
+
+    if a.get("keyTimes") is not None:
+        key_times = [float(key_time) for key_time in value_to_string(a["keyTimes"]).split(";")]
+    else:
+        segments = len(values) if mode == "discrete" else len(values) - 1
+        key_times = [i / segments for i in range(segments + (mode != "discrete"))]
+
+    i = min(max(bisect.bisect_right(key_times, progress) - 1, 0), len(values) - 1)
+    if mode == "discrete": return values[i]
+    i = min(i, len(values) - 2)
+    span = key_times[i + 1] - key_times[i]
+    amount = min(max((progress - key_times[i]) / span, 0), 1) if span > 0 else 1
+    if mode == "spline":
+        splines = [[float(number) for number in NUMBER.findall(spline)] for spline in value_to_string(a["keySplines"]).split(";")]
+        amount = ease(splines[i], amount)
+    return interpolate(values[i], values[i + 1], amount) # paced is treated like linear
+
+def animation_value(animation, t):
+    """
+    The value of an animation at t seconds into the document's timeline.
+
+    Returns:
+        The animated value, or None while the animation doesn't apply (before begin, or after its end unless fill="freeze").
+    """
+    a = animation.attribs
+    try:
+        begin = clock_value(a.get("begin", 0))
+        duration = clock_value(a.get("dur"))
+    except (TypeError, ValueError):
+        return None # event based begins and indefinite durations never start on their own
+
+    repeat = a.get("repeatCount", 1)
+    active = float("inf") if repeat == "indefinite" else duration * float(repeat)
+    elapsed = t - begin
+    if elapsed < 0 or duration <= 0: return None
+    if elapsed >= active:
+        if a.get("fill") != "freeze": return None
+        progress = (active / duration) % 1 or 1.0 # frozen at the end of the last (possibly partial) repeat
+    else:
+        progress = (elapsed % duration) / duration
+    return value_at(animation, progress)
+
+def apply_animation(frame, animation, t):
+    value = animation_value(animation, t)
+    if value is None: return
+    a = animation.attribs
+    if animation.elementname == "animateTransform":
+        transform = f"{a.get('type', 'translate')}({value})"
+        if a.get("additive") == "sum": transform = f"{frame.attribs.get('transform', '')} {transform}".strip()
+        frame.attribs["transform"] = transform
+    else:
+        name = a.get("attributeName")
+        if a.get("additive") == "sum": value = float(value) + float(frame.attribs.get(name, 0))
+        frame.attribs[name] = value
+
+def sample(element, t):
+    """
+    Evaluate all SMIL animations of an element tree at t seconds.
+
+    Args:
+        element: The root of the tree, e.g. the svgwrite drawing render.build_drawing returns.
+        t (float): Seconds since the document started.
+
+    Returns:
+        svgstream.Element: A copy of the tree holding the animated attribute values, without the animation elements.
+        It can be rasterized (see raster.py) or serialized like any other element.
+    """
+    frame = Element(element.elementname)
+    frame.attribs = dict(element.attribs)
+    commands = getattr(element, "commands", None) # svgwrite keeps path data apart until it's serialized
+    if commands: frame.attribs["d"] = " ".join(str(command) for command in commands)
+
+    for child in element.elements:
+        if child.elementname in ANIMATIONS: apply_animation(frame, child, t)
+        else: frame.elements.append(sample(child, t))
+    return frame
@@ -1,88 +1,234 @@
-import streamlit as st
+import numpy as np
 import utilities as utils
 from utilities import w, h
+from paths import path_data, compact_path_data, to_canvas
+from defs import DefsPool
+from placement import PLACEMENTS, place
+from profiling import span
+from stages import Stage, run_stages
+from streams import substream, uniform, uniforms, pick
 import random
 
+# fallback values for splotch settings, also used when rendering headless
+SPLOTCH_DEFAULTS = {
+    "NUMBER_OF_SPLOTCHES": 20,
+    "SPLOTCH_SIZE_MIN": 5.0,
+    "SPLOTCH_SIZE_MAX": 30.0,
+    "PLACEMENT": "Random",
+    "PLACEMENT_SPACING": 0.0,
+    "NUMBER_OF_SPLOTCH_POINTS_MIN": 5,
+    "NUMBER_OF_SPLOTCH_POINTS_MAX": 10,
+    "SPLOTCH_POINT_SPACING_RANDOMNESS": 1.0,
+    "SPLOTCH_POINT_RADIAL_RANDOMNESS": 5.0,
+    "CONTROL_ARM_LENGTH": 0.2,
+    "SINGLE_COLOR": True,
+    "FILL_COLOR": "#FF4800",
+    "HAS_NOISE": True,
+    "HAS_SHADOW": False,
+    "SHADOW_COLOR_COMPLEMENTARY": False,
+    "SHADOW_COLOR": "#000",
+    "SHADOW_BLURRINESS": 20,
+    "SHADOW_OPACITY": 0.2,
+    "SHADOW_OFFSET_X": 2.0,
+    "SHADOW_OFFSET_Y": 2.0,
+    "IS_TEXTURED": False,
+    "TEXTURE_TYPE": "fractalNoise",
+    "BASE_FREQUENCY": 0.05,
+    "NUM_OCTAVES": 20,
+    "SURFACE_SCALE_BASE": 20.0,
+    "DIFFUSE_CONSTANT": 1.0,
+    "LIGHTING_COLOR_INPUT": "#fff",
+    "LIGHTING_X": 20.0,
+    "LIGHTING_Y": 20.0,
+    "LIGHTING_Z": 30.0,
+    "SPLOTCH_POINTS_ANIMATED": True,
+    "SPLOTCH_POINT_ANIMATION_DURATION": 5.0,
+    "SPLOTCH_POINT_ANIMATION_STRENGTH": 0.25,
+    "SPLOTCHES_TRANSLATE": True,
+    "SPLOTCH_TRANSLATION_DURATION": 5.0,
+    "MIN_X_DISTANCE_PERC": 0.0,
+    "MAX_X_DISTANCE_PERC": 0.0,
+    "MIN_Y_DISTANCE_PERC": 4.0,
+    "MAX_Y_DISTANCE_PERC": 20.0,
+    "SPLOTCHES_ROTATE": True,
+    "MIN_SPLOTCH_ROTATION_DURATION": 5.0,
+    "MAX_SPLOTCH_ROTATION_DURATION": 5.0,
+    "ADD_FADING_EFFECT": False,
+    "MIN_BASE_FREQUENCY": 0.01,
+    "MAX_BASE_FREQUENCY": 0.05,
+}
+
 def splotch_settings(C, OTHER_CONFIG, sp):
+    import streamlit as st
+
     with st.sidebar.expander("Layout Settings"):
-        C["NUMBER_OF_SPLOTCHES"] = st.number_input("Number of Splotches", min_value=1, max_value=1000, value=sp.get("NUMBER_OF_SPLOTCHES", 20), step=1, help="NUMBER_OF_SPLOTCHES")
+        C["NUMBER_OF_SPLOTCHES"] = st.number_input("Number of Splotches", min_value=1, max_value=50000, value=sp.get("NUMBER_OF_SPLOTCHES", SPLOTCH_DEFAULTS["NUMBER_OF_SPLOTCHES"]), step=1, help="NUMBER_OF_SPLOTCHES")
+        C["PLACEMENT"] = st.selectbox("Placement", PLACEMENTS, index=PLACEMENTS.index(sp.get("PLACEMENT", SPLOTCH_DEFAULTS["PLACEMENT"])), help="PLACEMENT")
+        if C["PLACEMENT"] == "Poisson Disk":
+            C["PLACEMENT_SPACING"] = st.number_input("Spacing (relative to the canvas, negative to overlap)", value=sp.get("PLACEMENT_SPACING", SPLOTCH_DEFAULTS["PLACEMENT_SPACING"]), step=0.5, help="PLACEMENT_SPACING")
+        else:
+            C["PLACEMENT_SPACING"] = 0.0 # only poisson disk keeps a spacing
 
     with st.sidebar.expander("Splotch Settings"):
-        C["SPLOTCH_SIZE_MIN"] = st.number_input("Minimum Size (relative to canvas width)", min_value=0.0, value=sp.get("SPLOTCH_SIZE_MIN", 5.0), step=1.0, help="SPLOTCH_SIZE_MIN")
-        C["SPLOTCH_SIZE_MAX"] = st.number_input("Maximum Size (relative to canvas width)", min_value=1.0, value=sp.get("SPLOTCH_SIZE_MAX", 30.0), step=1.0, help="SPLOTCH_SIZE_MAX")
+        C["SPLOTCH_SIZE_MIN"] = st.number_input("Minimum Size (relative to canvas width)", min_value=0.0, value=sp.get("SPLOTCH_SIZE_MIN", SPLOTCH_DEFAULTS["SPLOTCH_SIZE_MIN"]), step=1.0, help="SPLOTCH_SIZE_MIN")
+        C["SPLOTCH_SIZE_MAX"] = st.number_input("Maximum Size (relative to canvas width)", min_value=1.0, value=sp.get("SPLOTCH_SIZE_MAX", SPLOTCH_DEFAULTS["SPLOTCH_SIZE_MAX"]), step=1.0, help="SPLOTCH_SIZE_MAX")
         st.divider()
-        C["NUMBER_OF_SPLOTCH_POINTS_MIN"] = st.number_input("Min number of Splotch Points", min_value=2, value=sp.get("NUMBER_OF_SPLOTCH_POINTS_MIN", 5), step=1, help="NUMBER_OF_SPLOTCH_POINTS_MIN")
-        C["NUMBER_OF_SPLOTCH_POINTS_MAX"] = st.number_input("Max number of Splotch Points", min_value=2, value=sp.get("NUMBER_OF_SPLOTCH_POINTS_MAX", 10), step=1, help="NUMBER_OF_SPLOTCH_POINTS_MAX")
+        C["NUMBER_OF_SPLOTCH_POINTS_MIN"] = st.number_input("Min number of Splotch Points", min_value=2, value=sp.get("NUMBER_OF_SPLOTCH_POINTS_MIN", SPLOTCH_DEFAULTS["NUMBER_OF_SPLOTCH_POINTS_MIN"]), step=1, help="NUMBER_OF_SPLOTCH_POINTS_MIN")
+        C["NUMBER_OF_SPLOTCH_POINTS_MAX"] = st.number_input("Max number of Splotch Points", min_value=2, value=sp.get("NUMBER_OF_SPLOTCH_POINTS_MAX", SPLOTCH_DEFAULTS["NUMBER_OF_SPLOTCH_POINTS_MAX"]), step=1, help="NUMBER_OF_SPLOTCH_POINTS_MAX")
         st.divider()
-        C["SPLOTCH_POINT_SPACING_RANDOMNESS"] = st.number_input("Splotch Point Spacing Randomness", min_value=0.0, value=sp.get("SPLOTCH_POINT_SPACING_RANDOMNESS", 1.0), step=0.5, help="SPLOTCH_POINT_SPACING_RANDOMNESS")
-        C["SPLOTCH_POINT_RADIAL_RANDOMNESS"] = st.number_input("Splotch Point Radial Randomness", value=sp.get("SPLOTCH_POINT_RADIAL_RANDOMNESS", 5.0), step=0.1, help="SPLOTCH_POINT_RADIAL_RANDOMNESS")
-        C["CONTROL_ARM_LENGTH"] = st.number_input("Control Arm Length (Relative)", value=sp.get("CONTROL_ARM_LENGTH", 0.2), min_value=0.0, step=0.01, help="CONTROL_ARM_LENGTH")
+        C["SPLOTCH_POINT_SPACING_RANDOMNESS"] = st.number_input("Splotch Point Spacing Randomness", min_value=0.0, value=sp.get("SPLOTCH_POINT_SPACING_RANDOMNESS", SPLOTCH_DEFAULTS["SPLOTCH_POINT_SPACING_RANDOMNESS"]), step=0.5, help="SPLOTCH_POINT_SPACING_RANDOMNESS")
+        C["SPLOTCH_POINT_RADIAL_RANDOMNESS"] = st.number_input("Splotch Point Radial Randomness", value=sp.get("SPLOTCH_POINT_RADIAL_RANDOMNESS", SPLOTCH_DEFAULTS["SPLOTCH_POINT_RADIAL_RANDOMNESS"]), step=0.1, help="SPLOTCH_POINT_RADIAL_RANDOMNESS")
+        C["CONTROL_ARM_LENGTH"] = st.number_input("Control Arm Length (Relative)", value=sp.get("CONTROL_ARM_LENGTH", SPLOTCH_DEFAULTS["CONTROL_ARM_LENGTH"]), min_value=0.0, step=0.01, help="CONTROL_ARM_LENGTH")
     
     with st.sidebar.expander("Color Settings"):
-        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", True), help="SINGLE_COLOR")
+        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", SPLOTCH_DEFAULTS["SINGLE_COLOR"]), help="SINGLE_COLOR")
         if (C["SINGLE_COLOR"]):
-            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", "#FF4800"), help="FILL_COLOR")
+            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", SPLOTCH_DEFAULTS["FILL_COLOR"]), help="FILL_COLOR")
         
-        C["HAS_NOISE"] = st.checkbox("Has Noise", value=sp.get("HAS_NOISE", True), help="HAS_NOISE")
+        C["HAS_NOISE"] = st.checkbox("Has Noise", value=sp.get("HAS_NOISE", SPLOTCH_DEFAULTS["HAS_NOISE"]), help="HAS_NOISE")
     
     with st.sidebar.expander("Shadow Settings"):
-        C["HAS_SHADOW"] = st.checkbox("Add Splotch Shadow", value=sp.get("HAS_SHADOW", False), help="HAS_SHADOW")
+        C["HAS_SHADOW"] = st.checkbox("Add Splotch Shadow", value=sp.get("HAS_SHADOW", SPLOTCH_DEFAULTS["HAS_SHADOW"]), help="HAS_SHADOW")
         if C["HAS_SHADOW"]:
             if C["SINGLE_COLOR"]:
-                C["SHADOW_COLOR_COMPLEMENTARY"] = st.checkbox("Complementary Color", value=sp.get("SHADOW_COLOR_COMPLEMENTARY", False), help="SHADOW_COLOR_COMPLEMENTARY")
-            C["SHADOW_COLOR"] = st.color_picker("Shadow Color", utils.complementary_color(C["FILL_COLOR"]) if C["SINGLE_COLOR"] and C["SHADOW_COLOR_COMPLEMENTARY"] else sp.get("SHADOW_COLOR", "#000"), help="SHADOW_COLOR")
-            C["SHADOW_BLURRINESS"] = st.number_input("Shadow Blurriness", value=sp.get("SHADOW_BLURRINESS", 20), min_value=0, step=1, help="SHADOW_BLURRINESS")
-            C["SHADOW_OPACITY"] = st.number_input("Shadow Opacity", min_value=0.0, max_value=1.0, value=sp.get("SHADOW_OPACITY", 0.2), step=0.05, help="SHADOW_OPACITY")
-            C['SHADOW_OFFSET_X'] = st.number_input("Shadow Offset X (relative to canvas width)", value=sp.get("SHADOW_OFFSET_X", 2.0), step=1.0, help="SHADOW_OFFSET_X")
-            C['SHADOW_OFFSET_Y'] = st.number_input("Shadow Offset Y (relative to canvas width)", value=sp.get("SHADOW_OFFSET_Y", 2.0), step=1.0, help="SHADOW_OFFSET_Y")
+                C["SHADOW_COLOR_COMPLEMENTARY"] = st.checkbox("Complementary Color", value=sp.get("SHADOW_COLOR_COMPLEMENTARY", SPLOTCH_DEFAULTS["SHADOW_COLOR_COMPLEMENTARY"]), help="SHADOW_COLOR_COMPLEMENTARY")
+            C["SHADOW_COLOR"] = st.color_picker("Shadow Color", utils.complementary_color(C["FILL_COLOR"]) if C["SINGLE_COLOR"] and C["SHADOW_COLOR_COMPLEMENTARY"] else sp.get("SHADOW_COLOR", SPLOTCH_DEFAULTS["SHADOW_COLOR"]), help="SHADOW_COLOR")
+            C["SHADOW_BLURRINESS"] = st.number_input("Shadow Blurriness", value=sp.get("SHADOW_BLURRINESS", SPLOTCH_DEFAULTS["SHADOW_BLURRINESS"]), min_value=0, step=1, help="SHADOW_BLURRINESS")
+            C["SHADOW_OPACITY"] = st.number_input("Shadow Opacity", min_value=0.0, max_value=1.0, value=sp.get("SHADOW_OPACITY", SPLOTCH_DEFAULTS["SHADOW_OPACITY"]), step=0.05, help="SHADOW_OPACITY")
+            C['SHADOW_OFFSET_X'] = st.number_input("Shadow Offset X (relative to canvas width)", value=sp.get("SHADOW_OFFSET_X", SPLOTCH_DEFAULTS["SHADOW_OFFSET_X"]), step=1.0, help="SHADOW_OFFSET_X")
+            C['SHADOW_OFFSET_Y'] = st.number_input("Shadow Offset Y (relative to canvas width)", value=sp.get("SHADOW_OFFSET_Y", SPLOTCH_DEFAULTS["SHADOW_OFFSET_Y"]), step=1.0, help="SHADOW_OFFSET_Y")
     
     with st.sidebar.expander("Texture Settings"):
-        C["IS_TEXTURED"] = st.checkbox("Add Splotch Texture", value=sp.get("IS_TEXTURED", False), help="IS_TEXTURED")
+        C["IS_TEXTURED"] = st.checkbox("Add Splotch Texture", value=sp.get("IS_TEXTURED", SPLOTCH_DEFAULTS["IS_TEXTURED"]), help="IS_TEXTURED")
         if C["IS_TEXTURED"]:
             texture_types = ["fractalNoise", "turbulence"]
-            C["TEXTURE_TYPE"] = st.selectbox("Color Scheme", texture_types, index=texture_types.index(sp.get("TEXTURE_TYPE", "fractalNoise")), help="TEXTURE_TYPE")
-            C["BASE_FREQUENCY"] = st.number_input("Base Frequency", value=sp.get("BASE_FREQUENCY", 0.05), step=0.1, help="BASE_FREQUENCY")
-            C["NUM_OCTAVES"] = st.number_input("Number of Octaves", value=sp.get("NUM_OCTAVES", 20), step=1, help="NUM_OCTAVES")
+            C["TEXTURE_TYPE"] = st.selectbox("Color Scheme", texture_types, index=texture_types.index(sp.get("TEXTURE_TYPE", SPLOTCH_DEFAULTS["TEXTURE_TYPE"])), help="TEXTURE_TYPE")
+            C["BASE_FREQUENCY"] = st.number_input("Base Frequency", value=sp.get("BASE_FREQUENCY", SPLOTCH_DEFAULTS["BASE_FREQUENCY"]), step=0.1, help="BASE_FREQUENCY")
+            C["NUM_OCTAVES"] = st.number_input("Number of Octaves", value=sp.get("NUM_OCTAVES", SPLOTCH_DEFAULTS["NUM_OCTAVES"]), step=1, help="NUM_OCTAVES")
             st.divider()
-            C["SURFACE_SCALE_BASE"] = st.number_input("Surface Scale Base", value=sp.get("SURFACE_SCALE_BASE", 20.0), step=1.0, help="SURFACE_SCALE_BASE")
-            C["DIFFUSE_CONSTANT"] = st.number_input("Diffuse Constant", value=sp.get("DIFFUSE_CONSTANT", 1.0), step=1.0, help="DIFFUSE_CONSTANT")
-            C["LIGHTING_COLOR_INPUT"] = st.color_picker("Lighting Color", value=sp.get("LIGHTING_COLOR_INPUT", "#fff"), help="LIGHTING_COLOR_INPUT")
-            C["LIGHTING_X"] = st.number_input("Lighting X (relative to canvas width)", value=sp.get("LIGHTING_X", 20.0), step=1.0, help="LIGHTING_X")
-            C["LIGHTING_Y"] = st.number_input("Lighting Y (relative to canvas height)", value=sp.get("LIGHTING_Y", 20.0), step=1.0, help="LIGHTING_Y")
-            C["LIGHTING_Z"] = st.number_input("Lighting Z", value=sp.get("LIGHTING_Z", 30.0), step=1.0, help="LIGHTING_Z_BASE")
+            C["SURFACE_SCALE_BASE"] = st.number_input("Surface Scale Base", value=sp.get("SURFACE_SCALE_BASE", SPLOTCH_DEFAULTS["SURFACE_SCALE_BASE"]), step=1.0, help="SURFACE_SCALE_BASE")
+            C["DIFFUSE_CONSTANT"] = st.number_input("Diffuse Constant", value=sp.get("DIFFUSE_CONSTANT", SPLOTCH_DEFAULTS["DIFFUSE_CONSTANT"]), step=1.0, help="DIFFUSE_CONSTANT")
+            C["LIGHTING_COLOR_INPUT"] = st.color_picker("Lighting Color", value=sp.get("LIGHTING_COLOR_INPUT", SPLOTCH_DEFAULTS["LIGHTING_COLOR_INPUT"]), help="LIGHTING_COLOR_INPUT")
+            C["LIGHTING_X"] = st.number_input("Lighting X (relative to canvas width)", value=sp.get("LIGHTING_X", SPLOTCH_DEFAULTS["LIGHTING_X"]), step=1.0, help="LIGHTING_X")
+            C["LIGHTING_Y"] = st.number_input("Lighting Y (relative to canvas height)", value=sp.get("LIGHTING_Y", SPLOTCH_DEFAULTS["LIGHTING_Y"]), step=1.0, help="LIGHTING_Y")
+            C["LIGHTING_Z"] = st.number_input("Lighting Z", value=sp.get("LIGHTING_Z", SPLOTCH_DEFAULTS["LIGHTING_Z"]), step=1.0, help="LIGHTING_Z_BASE")
     
     with st.sidebar.expander("Splotches Animation Settings"):
-        C["SPLOTCH_POINTS_ANIMATED"] = st.checkbox("Animate Splotch Points", value=sp.get("SPLOTCH_POINTS_ANIMATED", True), help="SPLOTCH_POINTS_ANIMATED")
+        C["SPLOTCH_POINTS_ANIMATED"] = st.checkbox("Animate Splotch Points", value=sp.get("SPLOTCH_POINTS_ANIMATED", SPLOTCH_DEFAULTS["SPLOTCH_POINTS_ANIMATED"]), help="SPLOTCH_POINTS_ANIMATED")
         if C["SPLOTCH_POINTS_ANIMATED"]:
-            C['SPLOTCH_POINT_ANIMATION_DURATION'] = st.number_input("Splotch Point Animation Duration", value=sp.get("SPLOTCH_POINT_ANIMATION_DURATION", 5.0), min_value=0.0, step=1.0, help="SPLOTCH_POINT_ANIMATION_DURATION")
-            C["SPLOTCH_POINT_ANIMATION_STRENGTH"] = st.number_input("Animation Strength", value=sp.get("SPLOTCH_POINT_ANIMATION_STRENGTH", 0.25), min_value=0.0, step=0.05, help="SPLOTCH_POINT_ANIMATION_STRENGTH")
+            C['SPLOTCH_POINT_ANIMATION_DURATION'] = st.number_input("Splotch Point Animation Duration", value=sp.get("SPLOTCH_POINT_ANIMATION_DURATION", SPLOTCH_DEFAULTS["SPLOTCH_POINT_ANIMATION_DURATION"]), min_value=0.0, step=1.0, help="SPLOTCH_POINT_ANIMATION_DURATION")
+            C["SPLOTCH_POINT_ANIMATION_STRENGTH"] = st.number_input("Animation Strength", value=sp.get("SPLOTCH_POINT_ANIMATION_STRENGTH", SPLOTCH_DEFAULTS["SPLOTCH_POINT_ANIMATION_STRENGTH"]), min_value=0.0, step=0.05, help="SPLOTCH_POINT_ANIMATION_STRENGTH")
             st.divider()
             
-        C["SPLOTCHES_TRANSLATE"] = st.checkbox("Splotches Translate", value=sp.get("SPLOTCHES_TRANSLATE", True), help="SPLOTCHES_TRANSLATE")
+        C["SPLOTCHES_TRANSLATE"] = st.checkbox("Splotches Translate", value=sp.get("SPLOTCHES_TRANSLATE", SPLOTCH_DEFAULTS["SPLOTCHES_TRANSLATE"]), help="SPLOTCHES_TRANSLATE")
         if C["SPLOTCHES_TRANSLATE"]:
-            C['SPLOTCH_TRANSLATION_DURATION'] = st.number_input("Splotch Translation Duration", value=sp.get("SPLOTCH_TRANSLATION_DURATION", 5.0), min_value=0.0, step=1.0, help="SPLOTCH_TRANSLATION_DURATION")
+            C['SPLOTCH_TRANSLATION_DURATION'] = st.number_input("Splotch Translation Duration", value=sp.get("SPLOTCH_TRANSLATION_DURATION", SPLOTCH_DEFAULTS["SPLOTCH_TRANSLATION_DURATION"]), min_value=0.0, step=1.0, help="SPLOTCH_TRANSLATION_DURATION")
             st.divider()
-            C["MIN_X_DISTANCE_PERC"] = st.number_input("Min x distance (relative to canvas width)", value=sp.get("MIN_X_DISTANCE_PERC", 0.0), step=1.0, help="MIN_X_DISTANCE_PERC")
-            C["MAX_X_DISTANCE_PERC"] = st.number_input("Max x distance (relative to canvas width)", value=sp.get("MAX_X_DISTANCE_PERC", 0.0), step=1.0, help="MAX_X_DISTANCE_PERC")
+            C["MIN_X_DISTANCE_PERC"] = st.number_input("Min x distance (relative to canvas width)", value=sp.get("MIN_X_DISTANCE_PERC", SPLOTCH_DEFAULTS["MIN_X_DISTANCE_PERC"]), step=1.0, help="MIN_X_DISTANCE_PERC")
+            C["MAX_X_DISTANCE_PERC"] = st.number_input("Max x distance (relative to canvas width)", value=sp.get("MAX_X_DISTANCE_PERC", SPLOTCH_DEFAULTS["MAX_X_DISTANCE_PERC"]), step=1.0, help="MAX_X_DISTANCE_PERC")
             st.divider()
-            C["MIN_Y_DISTANCE_PERC"] = st.number_input("Min y distance (relative to canvas height)", value=sp.get("MIN_Y_DISTANCE_PERC", 4.0), step=1.0, help="MIN_Y_DISTANCE_PERC")
-            C["MAX_Y_DISTANCE_PERC"] = st.number_input("Max y distance (relative to canvas height)", value=sp.get("MAX_Y_DISTANCE_PERC", 20.0), step=1.0, help="MAX_Y_DISTANCE_PERC")
+            C["MIN_Y_DISTANCE_PERC"] = st.number_input("Min y distance (relative to canvas height)", value=sp.get("MIN_Y_DISTANCE_PERC", SPLOTCH_DEFAULTS["MIN_Y_DISTANCE_PERC"]), step=1.0, help="MIN_Y_DISTANCE_PERC")
+            C["MAX_Y_DISTANCE_PERC"] = st.number_input("Max y distance (relative to canvas height)", value=sp.get("MAX_Y_DISTANCE_PERC", SPLOTCH_DEFAULTS["MAX_Y_DISTANCE_PERC"]), step=1.0, help="MAX_Y_DISTANCE_PERC")
             st.divider()
             
-        C["SPLOTCHES_ROTATE"] = st.checkbox("Rotate Splotches", value=sp.get("SPLOTCHES_ROTATE", True), help="SPLOTCHES_ROTATE")
+        C["SPLOTCHES_ROTATE"] = st.checkbox("Rotate Splotches", value=sp.get("SPLOTCHES_ROTATE", SPLOTCH_DEFAULTS["SPLOTCHES_ROTATE"]), help="SPLOTCHES_ROTATE")
         if C["SPLOTCHES_ROTATE"]:
-            C['MIN_SPLOTCH_ROTATION_DURATION'] = st.number_input("Min Splotch Rotation Duration", value=sp.get("MIN_SPLOTCH_ROTATION_DURATION", 5.0), min_value=0.0, step=1.0, help="MIN_SPLOTCH_ROTATION_DURATION")
-            C['MAX_SPLOTCH_ROTATION_DURATION'] = st.number_input("Max Splotch Rotation Duration", value=sp.get("MAX_SPLOTCH_ROTATION_DURATION", 5.0), min_value=0.0, step=1.0, help="MAX_SPLOTCH_ROTATION_DURATION")
+            C['MIN_SPLOTCH_ROTATION_DURATION'] = st.number_input("Min Splotch Rotation Duration", value=sp.get("MIN_SPLOTCH_ROTATION_DURATION", SPLOTCH_DEFAULTS["MIN_SPLOTCH_ROTATION_DURATION"]), min_value=0.0, step=1.0, help="MIN_SPLOTCH_ROTATION_DURATION")
+            C['MAX_SPLOTCH_ROTATION_DURATION'] = st.number_input("Max Splotch Rotation Duration", value=sp.get("MAX_SPLOTCH_ROTATION_DURATION", SPLOTCH_DEFAULTS["MAX_SPLOTCH_ROTATION_DURATION"]), min_value=0.0, step=1.0, help="MAX_SPLOTCH_ROTATION_DURATION")
 
     with st.sidebar.expander("Fading Effect Settings"):
-        C["ADD_FADING_EFFECT"] = st.checkbox("Add Fading Effect", value=sp.get("ADD_FADING_EFFECT", False), help="ADD_FADING_EFFECT")
+        C["ADD_FADING_EFFECT"] = st.checkbox("Add Fading Effect", value=sp.get("ADD_FADING_EFFECT", SPLOTCH_DEFAULTS["ADD_FADING_EFFECT"]), help="ADD_FADING_EFFECT")
         
         if C["ADD_FADING_EFFECT"]:
-            C["MIN_BASE_FREQUENCY"] = st.number_input("Min Base Frequency", value=sp.get("MIN_BASE_FREQUENCY", 0.01), step=0.1, help="MIN_BASE_FREQUENCY")
-            C["MAX_BASE_FREQUENCY"] = st.number_input("Max Base Frequency", value=sp.get("MAX_BASE_FREQUENCY", 0.05), step=0.1, help="MAX_BASE_FREQUENCY")
+            C["MIN_BASE_FREQUENCY"] = st.number_input("Min Base Frequency", value=sp.get("MIN_BASE_FREQUENCY", SPLOTCH_DEFAULTS["MIN_BASE_FREQUENCY"]), step=0.1, help="MIN_BASE_FREQUENCY")
+            C["MAX_BASE_FREQUENCY"] = st.number_input("Max Base Frequency", value=sp.get("MAX_BASE_FREQUENCY", SPLOTCH_DEFAULTS["MAX_BASE_FREQUENCY"]), step=0.1, help="MAX_BASE_FREQUENCY")
         
         
-def generate_splotches(dwg, C, OTHER_CONFIG):
+def splotch_outlines(C, OTHER_CONFIG, seed):
+    return splotch_geometry(C, seed)
+
+def splotch_paths(C, OTHER_CONFIG, seed, geometry):
+    # the from and to path data and the center of every splotch, on the canvas
+    points_from, controls_from = to_canvas(geometry["points_from"], C), to_canvas(geometry["controls_from"], C)
+    points_to, controls_to = to_canvas(geometry["points_to"], C), to_canvas(geometry["controls_to"], C)
+    paths = []
+    for i, n in enumerate(geometry["counts"]):
+        from_path, to_path = get_path_data(C, (points_from[i, :n], controls_from[i, :n]), (points_to[i, :n], controls_to[i, :n]))
+        paths.append((from_path, to_path, tuple(geometry["centers"][i].tolist())))
+    return paths
+
+def splotch_colors(C, OTHER_CONFIG, seed):
+    # the fill of every splotch (darkening towards the back when fading) and the noise color
+    fills, fill = [], substream(seed, "fill")
+    for i in range(C["NUMBER_OF_SPLOTCHES"]):
+        fill_color = C["FILL_COLOR"] if C["SINGLE_COLOR"] else pick(OTHER_CONFIG["COLORS"], uniform(fill, i))
+        if C["ADD_FADING_EFFECT"]: fill_color = utils.hex_to_rgb_with_luminosity(fill_color, 0.1 + i * 0.8/C["NUMBER_OF_SPLOTCHES"])
+        fills.append(fill_color)
+    return {"fills": fills, "noise": pick(OTHER_CONFIG["COLORS"], uniform(substream(seed, "noise"), 0)) if C["HAS_NOISE"] else ""}
+
+def splotch_textures(C, OTHER_CONFIG, seed):
+    # (base frequency, surface scale, turbulence offset) of every splotch's texture. the offset is drawn per distinct
+    # texture, not per splotch, so splotches with the same texture can share its filter
+    if not C["IS_TEXTURED"]: return []
+    if C["ADD_FADING_EFFECT"]:
+        texture_surface_scales = utils.linear_interpolation(C["SURFACE_SCALE_BASE"], C["LIGHTING_Z"] - 1, C["NUMBER_OF_SPLOTCHES"])
+        base_frequencies = utils.linear_interpolation(C["MIN_BASE_FREQUENCY"], C["MAX_BASE_FREQUENCY"], C["NUMBER_OF_SPLOTCHES"])[::-1]
+    else:
+        texture_surface_scales = C["NUMBER_OF_SPLOTCHES"] * [C["SURFACE_SCALE_BASE"]]
+        base_frequencies = C["NUMBER_OF_SPLOTCHES"] * [C["BASE_FREQUENCY"]]
+    offset = substream(seed, "offset")
+    textures = {texture: (f"{w(5 + uniform(offset, i, 0) * 20, C['W'])}", f"{h(5 + uniform(offset, i, 1) * 20, C['H'])}")
+                for i, texture in enumerate(dict.fromkeys(zip(base_frequencies, texture_surface_scales)))}
+    return [texture + (textures[texture],) for texture in zip(base_frequencies, texture_surface_scales)]
+
+def splotch_motion(C, OTHER_CONFIG, seed):
+    # (travel distance x, y, rotation duration) of every splotch, None for the movements that are turned off
+    if not C["IS_ANIMATED"]: return []
+    motion, distance, rotation = [], substream(seed, "distance"), substream(seed, "rotation")
+    for i in range(C["NUMBER_OF_SPLOTCHES"]):
+        travel_distance = None
+        if C["SPLOTCHES_TRANSLATE"]:
+            travel_distance = (C["MIN_X_DISTANCE_PERC"] + (C["MAX_X_DISTANCE_PERC"] - C["MIN_X_DISTANCE_PERC"]) * uniform(distance, i, 0),
+                               C["MIN_Y_DISTANCE_PERC"] + (C["MAX_Y_DISTANCE_PERC"] - C["MIN_Y_DISTANCE_PERC"]) * uniform(distance, i, 1))
+        rotation_duration = None
+        if C["SPLOTCHES_ROTATE"]:
+            rotation_duration = C['MIN_SPLOTCH_ROTATION_DURATION'] + (C['MAX_SPLOTCH_ROTATION_DURATION'] - C['MIN_SPLOTCH_ROTATION_DURATION']) * uniform(rotation, i)
+        motion.append((travel_distance, rotation_duration))
+    return motion
+
+# the stages of generate_splotches and the settings each of them depends on, see stages.py.
+# everything else (shadows, lighting, durations, ...) only affects how their results are drawn, which is cheap
+SPLOTCH_STAGES = [
+    Stage("geometry", splotch_outlines, keys=[
+        "NUMBER_OF_SPLOTCHES", "SPLOTCH_SIZE_MIN", "SPLOTCH_SIZE_MAX", "ADD_FADING_EFFECT", "PLACEMENT", "PLACEMENT_SPACING",
+        "NUMBER_OF_SPLOTCH_POINTS_MIN", "NUMBER_OF_SPLOTCH_POINTS_MAX", "SPLOTCH_POINT_SPACING_RANDOMNESS",
+        "SPLOTCH_POINT_RADIAL_RANDOMNESS", "SPLOTCH_POINTS_ANIMATED", "SPLOTCH_POINT_ANIMATION_STRENGTH", "CONTROL_ARM_LENGTH",
+    ]),
+    Stage("paths", splotch_paths, keys=["W", "H", "PATH_PRECISION", "COMPACT_OUTPUT"], inputs=["geometry"]),
+    Stage("colors", splotch_colors, keys=["NUMBER_OF_SPLOTCHES", "SINGLE_COLOR", "FILL_COLOR", "COLOR_SCHEME", "ADD_FADING_EFFECT", "HAS_NOISE"]),
+    Stage("textures", splotch_textures, keys=[
+        "IS_TEXTURED", "NUMBER_OF_SPLOTCHES", "ADD_FADING_EFFECT", "SURFACE_SCALE_BASE", "LIGHTING_Z", "BASE_FREQUENCY",
+        "MIN_BASE_FREQUENCY", "MAX_BASE_FREQUENCY", "W", "H",
+    ]),
+    Stage("motion", splotch_motion, keys=[
+        "IS_ANIMATED", "NUMBER_OF_SPLOTCHES", "SPLOTCHES_TRANSLATE", "MIN_X_DISTANCE_PERC", "MAX_X_DISTANCE_PERC", "MIN_Y_DISTANCE_PERC",
+        "MAX_Y_DISTANCE_PERC", "SPLOTCHES_ROTATE", "MIN_SPLOTCH_ROTATION_DURATION", "MAX_SPLOTCH_ROTATION_DURATION",
+    ]),
+]
+
+def generate_splotches(dwg, C, OTHER_CONFIG, rng=random):
+    stages = run_stages("splotches", SPLOTCH_STAGES, C, OTHER_CONFIG, rng)
+
+    with span("defs"): add_shadow_filter(dwg, C)
+    with span("elements"): add_splotches(dwg, C, stages)
+
+    if C["HAS_NOISE"]:
+        rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=stages["colors"]["noise"], fill_opacity=0.2, filter="url(#noiseFilter)")
+        dwg.add(rect)
+    
+    return dwg
+
+def add_shadow_filter(dwg, C):
     if C["HAS_SHADOW"]: 
         filter_element = dwg.filter(id="shadow", x="-50%", y="-50%", width="200%", height="200%")
         filter_element.feGaussianBlur(in_="SourceAlpha", stdDeviation=C["SHADOW_BLURRINESS"], result="blur")
@@ -90,54 +236,32 @@ def generate_splotches(dwg, C, OTHER_CONFIG):
         filter_element.feComposite(in_="floodShadow", in2="blur", operator="in", result="compositeShadow")
     
         dwg.defs.add(filter_element)
-         
-    if C["IS_TEXTURED"]:
-        if C["ADD_FADING_EFFECT"]:
-            texture_surface_scales = utils.linear_interpolation(C["SURFACE_SCALE_BASE"], C["LIGHTING_Z"] - 1, C["NUMBER_OF_SPLOTCHES"])
-            base_frequencies = utils.linear_interpolation(C["MIN_BASE_FREQUENCY"], C["MAX_BASE_FREQUENCY"], C["NUMBER_OF_SPLOTCHES"])[::-1]
-        else:
-            texture_surface_scales = C["NUMBER_OF_SPLOTCHES"] * [C["SURFACE_SCALE_BASE"]]
-            base_frequencies = C["NUMBER_OF_SPLOTCHES"] * [C["BASE_FREQUENCY"]]
+
+def add_splotches(dwg, C, stages):
+    # splotches with identical texture filters share one definition. lights following a splotch's own translation make
+    # its filter unique, those are added as they are
+    filters = DefsPool(dwg)
     
-    for i in range(C["NUMBER_OF_SPLOTCHES"]):
+    for i, (from_path, to_path, c) in enumerate(stages["paths"]):
         point_light = None
         
         if C["IS_TEXTURED"]:
-            ### textured filter ###
-            filter_textured = dwg.defs.add(dwg.filter(id=f'filterTextured-{i}', x="-150%", y="-150%", width="300%", height="300%"))
-            filter_textured.feTurbulence(type=C["TEXTURE_TYPE"], baseFrequency=base_frequencies[i], numOctaves=C["NUM_OCTAVES"], result="turbulence")
-            filter_textured.feOffset(dx=f"{w(5 + random.random() * 20, C['W'])}", dy=f"{h(5 + random.random() * 20, C['H'])}", in_="turbulence", result="shiftedTurbulence")
+            ### textured filter, registered once its light animations are added ###
+            base_frequency, surface_scale, (dx, dy) = stages["textures"][i]
+            filter_textured = dwg.filter(x="-150%", y="-150%", width="300%", height="300%")
+            filter_textured.feTurbulence(type=C["TEXTURE_TYPE"], baseFrequency=base_frequency, numOctaves=C["NUM_OCTAVES"], result="turbulence")
+            filter_textured.feOffset(dx=dx, dy=dy, in_="turbulence", result="shiftedTurbulence")
             point_light = filter_textured.feDiffuseLighting(
                 in_="shiftedTurbulence",
-                surfaceScale=texture_surface_scales[i], 
+                surfaceScale=surface_scale, 
                 diffuseConstant=C["DIFFUSE_CONSTANT"],
                 lighting_color=C["LIGHTING_COLOR_INPUT"].strip().lower(),
                 result="highlight"
             ).fePointLight(source=(w(C["LIGHTING_X"], C['W']), h(C["LIGHTING_Y"], C['H']), C["LIGHTING_Z"]))
             filter_textured.feComposite(operator="in", in_="highlight", in2="SourceAlpha", result="highlightApplied")
             filter_textured.feBlend(in_="SourceGraphic", in2="highlightApplied", mode="multiply")
-        
-        # Define the center & size of the circle
-        c = (100 * random.random(), 100 * random.random())
-        r = (C["SPLOTCH_SIZE_MAX"] - C["SPLOTCH_SIZE_MIN"]) * random.random() + C["SPLOTCH_SIZE_MIN"]
-        if C["ADD_FADING_EFFECT"]: r = 0.2 * r + i * 0.6 * r/C["NUMBER_OF_SPLOTCHES"]
-    
-        number_of_splotch_points = random.choice(range(C["NUMBER_OF_SPLOTCH_POINTS_MIN"], C["NUMBER_OF_SPLOTCH_POINTS_MAX"] + 1))
-        
-        splotch_points_regular = utils.generate_regular_points(c, number_of_splotch_points, r)
-        splotch_points_from = [utils.translate_point_radially(utils.translate_point_tangentially(p, c, C["SPLOTCH_POINT_SPACING_RANDOMNESS"] * (random.random() - 0.5)), c, C["SPLOTCH_POINT_RADIAL_RANDOMNESS"] * (random.random() - 0.5)) for p in splotch_points_regular]
-        splotch_points_to = [utils.translate_point_radially(p, c, (C["SPLOTCH_POINT_ANIMATION_STRENGTH"] if C["SPLOTCH_POINTS_ANIMATED"] else 0) * (random.random() - 0.5)) for p in splotch_points_from]
-        
-        # get path
-        from_path_data, to_path_data = get_path_data(C, splotch_points_from, splotch_points_to)
-        
-        # create the stripped path
-        from_path = from_path_data.replace('\n', ' ').strip()
-        to_path = to_path_data.replace('\n', ' ').strip()
-        fill_color = C["FILL_COLOR"] if C["SINGLE_COLOR"] else random.choice(OTHER_CONFIG["COLORS"])
-        if C["ADD_FADING_EFFECT"]: fill_color = utils.hex_to_rgb_with_luminosity(C["FILL_COLOR"] if C["SINGLE_COLOR"] else random.choice(OTHER_CONFIG["COLORS"]), 0.1 + i * 0.8/C["NUMBER_OF_SPLOTCHES"])
 
-        splotch = dwg.path(d=from_path, fill=fill_color, filter=f"url(#filterTextured-{i})")
+        splotch = dwg.path(d=from_path, fill=stages["colors"]["fills"][i])
         splotch_shadow = None
         
         if C["HAS_SHADOW"]:
@@ -147,7 +271,10 @@ def generate_splotches(dwg, C, OTHER_CONFIG):
         
         # NOTE: The animation only works if x and y coordinates in the path are comma separated, and points are space separated
         # i.e. 'S 50 50, 20 20' doesn't work, but 'S 50,50 20,20' does... 
-        if C["IS_ANIMATED"]: add_animations(dwg, C, from_path, to_path, c, splotch, splotch_shadow, point_light)
+        if C["IS_ANIMATED"]: add_animations(dwg, C, from_path, to_path, c, splotch, splotch_shadow, point_light, stages["motion"][i])
+        if C["IS_TEXTURED"]:
+            add = filters.add if C["IS_ANIMATED"] and C["SPLOTCHES_TRANSLATE"] else filters.register
+            splotch["filter"] = f"url(#{add(filter_textured, 'filterTextured')})"
         
         # add splotches to group and group to drawing
         group = dwg.g(id=f"splotch-{i}")
@@ -155,62 +282,77 @@ def generate_splotches(dwg, C, OTHER_CONFIG):
         if C["HAS_SHADOW"]: group.add(splotch_shadow)
         
         dwg.add(group)
-        
-    if C["HAS_NOISE"]:
-        rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=random.choice(OTHER_CONFIG["COLORS"]), fill_opacity=0.2, filter="url(#noiseFilter)")
-        dwg.add(rect)
+
+def splotch_geometry(C, seed):
+    """
+    Compute the outlines of all splotches at once.
+
+    Splotches have different numbers of points, so the point arrays are padded to the
+    largest number of points; entries past counts[i] are meaningless. Every splotch has its own random numbers
+    (see streams.uniforms), so adding splotches leaves the existing ones as they are.
+
+    Args:
+        C (dict): The config.
+        seed (int): The stream all randomness of the outlines derives from.
+
+    Returns:
+        dict: centers (n, 2), radii (n,) and counts (n,), plus the (n, m, 2) arrays points_from, points_to,
+        controls_from and controls_to. All coordinates are relative to the canvas (0-100).
+    """
+    n = C["NUMBER_OF_SPLOTCHES"]
+    centers = 100 * uniforms(substream(seed, "center"), n, 2)
+    radii = (C["SPLOTCH_SIZE_MAX"] - C["SPLOTCH_SIZE_MIN"]) * uniforms(substream(seed, "radius"), n) + C["SPLOTCH_SIZE_MIN"]
+    if C["ADD_FADING_EFFECT"]: radii = 0.2 * radii + np.arange(n) * 0.6 * radii/n
+    if C["PLACEMENT"] != "Random":
+        # spread out by their (unjittered) radii. outlines are relative to the canvas on both axes, so distances are as well
+        centers = np.array(place(radii.tolist(), substream(seed, "placement"), (0, 0, 100, 100), C["PLACEMENT"], C["PLACEMENT_SPACING"]))
+    point_range = C["NUMBER_OF_SPLOTCH_POINTS_MAX"] + 1 - C["NUMBER_OF_SPLOTCH_POINTS_MIN"]
+    counts = C["NUMBER_OF_SPLOTCH_POINTS_MIN"] + (point_range * uniforms(substream(seed, "points"), n)).astype(int)
+    k = np.arange(counts.max())
     
-    return dwg
+    # jitter the regular points tangentially (by arc length) and radially, then pick the animation targets
+    spacing = C["SPLOTCH_POINT_SPACING_RANDOMNESS"] * (uniforms(substream(seed, "spacing"), n, k.size) - 0.5)
+    radial = C["SPLOTCH_POINT_RADIAL_RANDOMNESS"] * (uniforms(substream(seed, "radial"), n, k.size) - 0.5)
+    strength = C["SPLOTCH_POINT_ANIMATION_STRENGTH"] if C["SPLOTCH_POINTS_ANIMATED"] else 0
+    animation = strength * (uniforms(substream(seed, "animation"), n, k.size) - 0.5)
+    
+    angles = 2 * np.pi * k / counts[:, None] + np.divide(spacing, radii[:, None], out=np.zeros_like(spacing), where=radii[:, None] > 0)
+    directions = np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+    distances_from = radii[:, None] * (1 + radial)
+    points_from = centers[:, None] + distances_from[..., None] * directions
+    points_to = centers[:, None] + (distances_from * (1 + animation))[..., None] * directions
+    
+    # control points, see utils.calculate_control. previous and next wrap around within each splotch
+    rows = np.arange(n)[:, None]
+    prev = (k - 1) % counts[:, None]
+    next = (k + 1) % counts[:, None]
+    z = C["CONTROL_ARM_LENGTH"]
+    controls_from = points_from - z * (points_from[rows, next] - points_from[rows, prev])
+    controls_to = points_to - z * (points_to[rows, next] - points_to[rows, prev])
+    
+    return {
+        "centers": centers,
+        "radii": radii,
+        "counts": counts,
+        "points_from": points_from,
+        "points_to": points_to,
+        "controls_from": controls_from,
+        "controls_to": controls_to,
+    }
 
-def get_path_data(C, splotch_points_from, splotch_points_to):
-    start_point_from_x, start_point_from_y = splotch_points_from[0]
-    from_path_data = f"M {w(start_point_from_x, C['W'])},{h(start_point_from_y, C['H'])}\n"
-    start_point_to_x, start_point_to_y = splotch_points_to[0]
-    to_path_data = f"M {w(start_point_to_x, C['W'])},{h(start_point_to_y, C['H'])}\n"
-        
-    for k, ((from_x, from_y), (to_x, to_y))  in enumerate(zip(splotch_points_from, splotch_points_to)):
-        ### FROM
-        # find the previous and next points, wrapping around
-        from_prev = splotch_points_from[(k - 1) % len(splotch_points_from)]
-        from_next = splotch_points_from[(k + 1) % len(splotch_points_from)]
-            
-        # calculate control points for p
-        from_control_x, from_control_y = utils.calculate_control(from_prev, (from_x, from_y), from_next, C["CONTROL_ARM_LENGTH"])
-            
-        from_path_data += f"S {w(from_control_x, C['W'])},{h(from_control_y, C['H'])} {w(from_x, C['W'])},{h(from_y, C['H'])}\n"
-        
-        ### TO
-        # find the previous and next points, wrapping around
-        to_prev = splotch_points_to[(k - 1) % len(splotch_points_to)]
-        to_next = splotch_points_to[(k + 1) % len(splotch_points_to)]
-            
-        # calculate control points for p
-        to_control_x, to_control_y = utils.calculate_control(to_prev, (to_x, to_y), to_next, C["CONTROL_ARM_LENGTH"])
-            
-        to_path_data += f"S {w(to_control_x, C['W'])},{h(to_control_y, C['H'])} {w(to_x, C['W'])},{h(to_y, C['H'])}\n"
-        
-    ### FROM
-    # add the first point again, to get a smooth closure
-    from_x, from_y = splotch_points_from[0]
-    from_prev = splotch_points_from[-1]
-    from_next = splotch_points_from[1]
-    control_x, control_y = utils.calculate_control(from_prev, (from_x, from_y), from_next, C["CONTROL_ARM_LENGTH"])
-    from_path_data += f"S {w(control_x, C['W'])},{h(control_y, C['H'])} {w(from_x, C['W'])},{h(from_y, C['H'])}\n"
-        
-    ### TO
-    # add the first point again, to get a smooth closure
-    to_x, to_y = splotch_points_to[0]
-    to_prev = splotch_points_to[-1]
-    to_next = splotch_points_to[1]
-    control_x, control_y = utils.calculate_control(to_prev, (to_x, to_y), to_next, C["CONTROL_ARM_LENGTH"])
-    to_path_data += f"S {w(control_x, C['W'])},{h(control_y, C['H'])} {w(to_x, C['W'])},{h(to_y, C['H'])}\n"
-        
-    # close the path
-    from_path_data += "Z"
-    to_path_data +="Z"
-    return from_path_data,to_path_data
+def get_path_data(C, *keyframes):
+    # the path data of each (points, controls) keyframe of an outline: move to the first point,
+    # then curve through all points and back to the first one to get a smooth closure
+    commands = "M" + "S" * (len(keyframes[0][0]) + 1) + "Z"
+    coordinates = []
+    for points, controls in keyframes:
+        segments = np.stack((controls, points), axis=1).reshape(-1, 2)
+        coordinates.append(np.concatenate((points[:1], segments, segments[:2])))
+    if C["COMPACT_OUTPUT"]: return compact_path_data(commands, coordinates, C["PATH_PRECISION"])
+    return [path_data(commands, keyframe, C["PATH_PRECISION"]) for keyframe in coordinates]
 
-def add_animations(dwg, C, from_path, to_path, c, splotch, splotch_shadow, point_light):
+def add_animations(dwg, C, from_path, to_path, c, splotch, splotch_shadow, point_light, motion):
+    travel_distance, rotation_duration = motion
     if C["SPLOTCH_POINTS_ANIMATED"]:
         animate_splotch_points = dwg.animate(
             attributeName="d",
@@ -223,8 +365,7 @@ def add_animations(dwg, C, from_path, to_path, c, splotch, splotch_shadow, point
         )
     
     if C["SPLOTCHES_TRANSLATE"]:
-        travel_distance_x = C["MIN_X_DISTANCE_PERC"] + (C["MAX_X_DISTANCE_PERC"] - C["MIN_X_DISTANCE_PERC"]) * random.random() # reused later
-        travel_distance_y = C["MIN_Y_DISTANCE_PERC"] + (C["MAX_Y_DISTANCE_PERC"] - C["MIN_Y_DISTANCE_PERC"]) * random.random() # reused later
+        travel_distance_x, travel_distance_y = travel_distance # reused later
         animate_translation = dwg.animateTransform(
             transform="translate",
             repeatCount="indefinite" if C["REPEAT_ANIMATION"] else 1,
@@ -267,7 +408,7 @@ def add_animations(dwg, C, from_path, to_path, c, splotch, splotch_shadow, point
         animate_rotation = dwg.animateTransform(
             transform="rotate",
             repeatCount="indefinite" if C["REPEAT_ANIMATION"] else 1,
-            dur=f"{C['MIN_SPLOTCH_ROTATION_DURATION'] + (C['MAX_SPLOTCH_ROTATION_DURATION'] - C['MIN_SPLOTCH_ROTATION_DURATION']) * random.random()}s",
+            dur=f"{rotation_duration}s",
             from_=f"0 {w(c[0], C['W'])} {h(c[1], C['H'])}",
             to=f"360 {w(c[0], C['W'])} {h(c[1], C['H'])}",
             additive="sum"
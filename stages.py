@@ -0,0 +1,77 @@
+import hashlib
+import json
+import sys
+from background import checkpoint
+from cache import RenderCache
+from profiling import active, span
+from streams import substream
+
+def result_size(result):
+    # rough number of bytes a stage result holds, numpy arrays by their buffers
+    if hasattr(result, "nbytes"): return result.nbytes
+    if isinstance(result, dict): return sum(result_size(value) for value in result.values())
+    if isinstance(result, (list, tuple)):
+        # the elements of a result are alike, a few of them tell the size of all
+        sample = result[:16]
+        return (sum(result_size(value) for value in sample) + 8 * len(sample)) * len(result) // max(len(sample), 1)
+    return sys.getsizeof(result)
+
+# results of recent stages, shared by all renders (and the app's sessions), up to 64 MB of them as large configs
+# produce arrays of several MB per stage. set to None to compute every stage, profiled renders always do
+STAGE_CACHE = RenderCache(max_entries=256, max_memory=64 * 1024 * 1024, sizeof=result_size)
+
+class Stage:
+    """
+    One step of a generator, e.g. the layout of its shapes or their colors, and the config keys it depends on.
+
+    Args:
+        name (str): Unique within the generator. Also names the stage's random stream and its profiling span.
+        function: Called as function(C, OTHER_CONFIG, seed, **inputs) and returns the stage's result. seed is the
+            stage's own stream, see streams.py. Results are
+            cached and shared between renders, nobody may change them in place.
+        keys (list): The config keys the result depends on. C only holds these, reading any other raises a KeyError.
+            Keys the config lacks (e.g. settings the sidebar hides) are None. Stages using the palette (OTHER_CONFIG,
+            empty otherwise) declare COLOR_SCHEME.
+        inputs (list): Names of earlier stages, their results are passed as keyword arguments.
+    """
+    def __init__(self, name, function, keys=(), inputs=()):
+        self.name = name
+        self.function = function
+        self.keys = list(keys)
+        self.inputs = list(inputs)
+
+def stage_key(generator, stage, C, OTHER_CONFIG, seed, input_keys):
+    # hash of everything a stage's result depends on, including the keys of its inputs (and thus theirs)
+    canonical = json.dumps([generator, stage.name, seed, C, OTHER_CONFIG.get("COLORS"), input_keys], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def run_stages(generator, stages, C, OTHER_CONFIG, rng):
+    """
+    Run the stages of a generator, reusing the results of earlier renders whose inputs haven't changed.
+
+    Every stage draws from its own random stream, a substream of one number drawn from rng. Changing e.g. the colors
+    thus never moves the shapes, and stages that don't need to run don't have to be replayed to keep later ones the same.
+
+    Args:
+        generator (str): Name of the generator, keeps the cache entries of different generators apart.
+        stages (list): The Stages, in order.
+        rng (random.Random): The generator's random stream, one number is drawn from it.
+
+    Returns:
+        dict: The result of each stage by name.
+    """
+    seed = rng.getrandbits(64)
+    cache = None if active() else STAGE_CACHE # profiles time every stage, not cache hits
+    results, keys = {}, {}
+    for stage in stages:
+        checkpoint()
+        stage_C = {key: C.get(key) for key in stage.keys}
+        stage_OTHER_CONFIG = OTHER_CONFIG if "COLOR_SCHEME" in stage.keys else {}
+        inputs = {name: results[name] for name in stage.inputs}
+        keys[stage.name] = stage_key(generator, stage, stage_C, stage_OTHER_CONFIG, seed, [keys[name] for name in stage.inputs])
+
+        def compute():
+            return stage.function(stage_C, stage_OTHER_CONFIG, substream(seed, stage.name), **inputs)
+        with span(stage.name):
+            results[stage.name] = compute() if cache is None else cache.get_or_render(keys[stage.name], compute)
+    return results
@@ -0,0 +1,56 @@
+import hashlib
+
+# random numbers are splitmix64 (https://prng.di.unimi.it/splitmix64.c), whose i-th number only depends on its seed and i.
+# the numbers of any element can thus be computed on their own, in any order, thread or process, and adding elements
+# never changes the numbers of the existing ones
+GOLDEN = 0x9E3779B97F4A7C15
+MASK = 2**64 - 1
+
+def substream(seed, *names):
+    """
+    The seed of a named substream, e.g. substream(seed, "splotches", "colors").
+
+    Different names give unrelated streams, so every purpose (radii, colors, ...) can have its own and drawing more or
+    fewer numbers for one of them never shifts the others.
+    """
+    digest = hashlib.blake2b(repr((seed,) + names).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def mix(x):
+    # splitmix64's output function, for ints as well as numpy uint64 arrays
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+def uniform(seed, i, j=None):
+    """
+    Number i of the stream seed, in [0, 1).
+
+    With j, number j of element i's own stream instead (seeded with number i), for elements needing several numbers
+    of the same kind, e.g. the jitter of each of their points.
+    """
+    x = mix((seed + (i + 1) * GOLDEN) & MASK)
+    if j is not None: x = mix((x + (j + 1) * GOLDEN) & MASK)
+    return (x >> 11) * 2.0 ** -53
+
+def uniforms(seed, count, width=None, start=0):
+    """
+    uniform() for many elements at once.
+
+    Args:
+        seed (int): The stream, see substream.
+        count (int): Number of elements.
+        width (int): Numbers per element (j), None for one number per element.
+        start (int): Index of the first element, e.g. to generate a range of elements separately.
+
+    Returns:
+        numpy.ndarray: (count,) or (count, width) numbers, the same uniform() returns for each index.
+    """
+    import numpy as np # only the vectorized generators need it, bubbles get by without
+    x = mix(np.uint64(seed) + np.arange(start + 1, start + count + 1, dtype=np.uint64) * np.uint64(GOLDEN))
+    if width is not None: x = mix(x[:, None] + np.arange(1, width + 1, dtype=np.uint64) * np.uint64(GOLDEN))
+    return (x >> np.uint64(11)) * 2.0 ** -53
+
+def pick(options, u):
+    # the option a uniform number u falls on
+    return options[int(u * len(options))]
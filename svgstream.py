@@ -0,0 +1,167 @@
+import io
+
+# the same escaping ElementTree (and thus svgwrite) applies to attribute values
+ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#09;"})
+
+def value_to_string(value):
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(item) for item in value if item is not None)
+    return str(value)
+
+class Element:
+    """
+    A minimal stand-in for svgwrite's elements: attributes, children and serialization, without validation.
+
+    Keyword arguments follow svgwrite's rules, i.e. trailing underscores are removed and
+    inner underscores become dashes (in_ -> in, fill_opacity -> fill-opacity).
+    """
+    __slots__ = ("elementname", "attribs", "elements")
+
+    def __init__(self, elementname, **extra):
+        self.elementname = elementname
+        self.attribs = {}
+        self.elements = []
+        self.update(extra)
+
+    def update(self, attribs):
+        for key, value in attribs.items():
+            self.attribs[key.rstrip('_').replace('_', '-')] = value
+
+    def __getitem__(self, key):
+        return self.attribs[key]
+
+    def __setitem__(self, key, value):
+        self.attribs[key] = value
+
+    def add(self, element):
+        self.elements.append(element)
+        return element
+
+    def write(self, fileobj):
+        attributes = "".join(f' {key}="{value}"' for key, value in ((key, value_to_string(value).translate(ESCAPES)) for key, value in sorted(self.attribs.items()) if value is not None) if value)
+        if not self.elements:
+            fileobj.write(f"<{self.elementname}{attributes} />")
+            return
+
+        fileobj.write(f"<{self.elementname}{attributes}>")
+        for element in self.elements:
+            element.write(fileobj)
+        fileobj.write(f"</{self.elementname}>")
+
+    def tostring(self):
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue()
+
+    def get_xml(self):
+        # lets svgwrite serialize these elements as part of its own tree, e.g. the thousands of <use>s of instanced bubbles
+        from xml.etree.ElementTree import Element as XMLElement
+        xml = XMLElement(self.elementname, {key: value_to_string(value) for key, value in sorted(self.attribs.items()) if value is not None})
+        for element in self.elements:
+            xml.append(element.get_xml())
+        return xml
+
+class LightingPrimitive(Element):
+    __slots__ = ()
+
+    def fePointLight(self, source=(0, 0, 0), **extra):
+        x, y, z = source
+        return self.add(Element("fePointLight", x=x, y=y, z=z, **extra))
+
+class Filter(Element):
+    __slots__ = ()
+
+    def feBlend(self, **extra): return self.add(Element("feBlend", **extra))
+    def feColorMatrix(self, **extra): return self.add(Element("feColorMatrix", **extra))
+    def feComposite(self, **extra): return self.add(Element("feComposite", **extra))
+    def feDiffuseLighting(self, **extra): return self.add(LightingPrimitive("feDiffuseLighting", **extra))
+    def feDisplacementMap(self, **extra): return self.add(Element("feDisplacementMap", **extra))
+    def feFlood(self, **extra): return self.add(Element("feFlood", **extra))
+    def feGaussianBlur(self, **extra): return self.add(Element("feGaussianBlur", **extra))
+    def feImage(self, **extra): return self.add(Element("feImage", **extra))
+    def feOffset(self, **extra): return self.add(Element("feOffset", **extra))
+    def feTurbulence(self, **extra): return self.add(Element("feTurbulence", **extra))
+
+class LinearGradient(Element):
+    __slots__ = ()
+
+    def add_stop_color(self, offset=None, color=None, opacity=None):
+        return self.add(Element("stop", offset=offset, stop_color=color, stop_opacity=opacity))
+
+class Defs:
+    # definitions are held back until the next element is written, so filters and gradients
+    # can still be filled in after they were added (as all the generators do)
+    def __init__(self, drawing):
+        self.drawing = drawing
+        self.pending = []
+
+    def add(self, element):
+        self.pending.append(element)
+        return element
+
+    def flush(self):
+        if not self.pending: return
+        self.drawing.fileobj.write("<defs>")
+        for element in self.pending:
+            element.write(self.drawing.fileobj)
+        self.drawing.fileobj.write("</defs>")
+        self.pending = []
+
+class Drawing:
+    """
+    Drop-in replacement for the parts of svgwrite.Drawing the generators use, which writes every
+    element to fileobj as soon as it is added to the drawing instead of keeping an element tree.
+    Memory thus stays flat no matter how many elements are drawn. Call close() when done.
+    """
+    def __init__(self, fileobj, size=('100%', '100%'), **extra):
+        self.fileobj = fileobj
+        self.defs = Defs(self)
+        self.elements = [] # never filled, elements are written right away
+
+        root = Element("svg", width=size[0], height=size[1], baseProfile="full", version="1.1", **extra)
+        root.update({"xmlns": "http://www.w3.org/2000/svg", "xmlns:xlink": "http://www.w3.org/1999/xlink", "xmlns:ev": "http://www.w3.org/2001/xml-events"})
+        fileobj.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        fileobj.write(root.tostring()[:-3] + ">")
+
+    def add(self, element):
+        self.defs.flush()
+        element.write(self.fileobj)
+        return element
+
+    def close(self):
+        self.defs.flush()
+        self.fileobj.write("</svg>")
+
+    ######## element factory, mirroring svgwrite's signatures ########
+    def circle(self, center=(0, 0), r=1, **extra):
+        return Element("circle", cx=center[0], cy=center[1], r=r, **extra)
+
+    def rect(self, insert=(0, 0), size=(1, 1), **extra):
+        return Element("rect", x=insert[0], y=insert[1], width=size[0], height=size[1], **extra)
+
+    def path(self, d=None, **extra):
+        return Element("path", d=d, **extra)
+
+    def g(self, **extra):
+        return Element("g", **extra)
+
+    def symbol(self, **extra):
+        return Element("symbol", **extra)
+
+    def use(self, href, insert=None, **extra):
+        if insert is not None: extra.update(x=insert[0], y=insert[1])
+        return Element("use", **{"xlink:href": href}, **extra)
+
+    def filter(self, **extra):
+        return Filter("filter", **extra)
+
+    def linearGradient(self, start=None, end=None, **extra):
+        if start is not None: extra.update(x1=start[0], y1=start[1])
+        if end is not None: extra.update(x2=end[0], y2=end[1])
+        return LinearGradient("linearGradient", **extra)
+
+    def animate(self, attributeName=None, values=None, **extra):
+        return Element("animate", attributeName=attributeName, values=values, **extra)
+
+    def animateTransform(self, transform, **extra):
+        return Element("animateTransform", type=transform, **extra)
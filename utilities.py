@@ -1,8 +1,23 @@
-import numpy as np
 import math
-import matplotlib.colors as mcolors
 import colorsys
 
+# numpy and matplotlib are imported inside the few functions that need them, they make up most of the startup time
+
+def to_rgb(color):
+    # '#rgb' or '#rrggbb' to an (r, g, b) tuple in the 0-1 range, same as mcolors.to_rgb for those
+    hex_digits = color.strip().lstrip('#') if isinstance(color, str) and color.strip().startswith('#') else None
+    if hex_digits and len(hex_digits) in (3, 6) and all(c in "0123456789abcdefABCDEF" for c in hex_digits):
+        if len(hex_digits) == 3: hex_digits = "".join(c * 2 for c in hex_digits)
+        return tuple(int(hex_digits[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+    # anything else (named colors, ...) still goes through matplotlib
+    import matplotlib.colors as mcolors
+    return mcolors.to_rgb(color)
+
+def to_hex(rgb):
+    # (r, g, b) in the 0-1 range to '#rrggbb', rounded like mcolors.to_hex
+    return "#" + "".join(format(round(channel * 255), "02x") for channel in rgb)
+
 def w(p, abs):
     return p/100 * abs
 
@@ -11,8 +26,8 @@ def h(p, abs):
 
 # Function to convert hex to HSL with a custom lightness value
 def hex_to_rgb_with_luminosity(hex_color, luminosity):
-    # Convert hex to RGB (0-1 range) using mcolors
-    rgb = mcolors.to_rgb(hex_color)
+    # Convert hex to RGB (0-1 range)
+    rgb = to_rgb(hex_color)
     
     # Convert RGB to HLS using colorsys
     h, l, s = colorsys.rgb_to_hls(*rgb)
@@ -24,17 +39,17 @@ def hex_to_rgb_with_luminosity(hex_color, luminosity):
     adjusted_rgb = colorsys.hls_to_rgb(h, l, s)
     
     # Return the adjusted RGB value as a hex string
-    return mcolors.to_hex(adjusted_rgb)
+    return to_hex(adjusted_rgb)
 
 def complementary_color(hex_color):
     # Convert the hex color to an RGB tuple
-    rgb = mcolors.to_rgb(hex_color)
+    rgb = to_rgb(hex_color)
     
-    # Find the complementary color by subtracting each channel from 1 (since mcolors uses values between 0 and 1)
+    # Find the complementary color by subtracting each channel from 1 (since the values are between 0 and 1)
     comp_rgb = [(1.0 - channel) for channel in rgb]
     
     # Convert the complementary RGB back to hex
-    return mcolors.to_hex(comp_rgb)
+    return to_hex(comp_rgb)
 
 def calculate_control(prev, p, next, z=0.5):
     # Unpack the points
@@ -64,6 +79,8 @@ def linear_interpolation(start, end, n_steps):
         return [start]
 
 def log_interpolation(start, end, n_steps):
+    import numpy as np
+
     # Ensure the minimum and maximum are positive (since log doesn't work with non-positive numbers)
     if start <= 0 or end <= 0:
         raise ValueError("Both start and end must be greater than 0.")
@@ -1,53 +1,131 @@
-import streamlit as st
+import numpy as np
 import utilities as utils
-from utilities import w, h
+from utilities import h
+from paths import path_data, compact_path_data, to_canvas
+from profiling import span
+from stages import Stage, run_stages
+from streams import substream, uniform, uniforms, pick
 import random
 
+# fallback values for the wave settings
+WAVE_DEFAULTS = {
+    "NUMBER_OF_WAVES": 30,
+    "HORIZON_Y": 15.0,
+    "LAST_WAVE_Y": 80.0,
+    "SPACING_TYPE": "Logarithmic",
+    "WAVE_SPACING_RANDOMNESS": 0.0,
+    "NUMBER_OF_WAVE_POINTS_MIN": 2,
+    "NUMBER_OF_WAVE_POINTS_MAX": 6,
+    "WAVE_HEIGHT_FACTOR": 15.0,
+    "FIRST_POINT_START_MAX": 0.0,
+    "WAVE_POINT_SPACING_RANDOMNESS": 0.0,
+    "CONTROL_ARM_LENGTH": 0.2,
+    "SINGLE_COLOR": True,
+    "FILL_COLOR": "#FF4800",
+    "HAS_NOISE": True,
+    "ADD_FADING_EFFECT": True,
+    "INVERT_FADE": False,
+    "MIN_LUMINOSITY": 1.0,
+    "MAX_LUMINOSITY": 0.2,
+    "HAS_SHADOW": False,
+    "SHADOW_COLOR_COMPLEMENTARY": False,
+    "SHADOW_COLOR": "#000",
+    "SHADOW_BLURRINESS": 20,
+    "SHADOW_OPACITY": 0.2,
+    "SHADOW_OFFSET_Y": 2.0,
+    "ANIMATION_STRENGTH": 0.15,
+}
+
 def wave_settings(C, OTHER_CONFIG, sp):
+    import streamlit as st
+
     with st.sidebar.expander("Layout Settings"):
-        C["NUMBER_OF_WAVES"] = st.number_input("Number of Waves", min_value=1, max_value=1000, value=sp.get("NUMBER_OF_WAVES", 30), step=1, help="NUMBER_OF_WAVES")
-        C["HORIZON_Y"] = st.number_input("Horizon Position", value=sp.get("HORIZON_Y", 15.0), step=1.0, help="HORIZON_Y")
-        C["LAST_WAVE_Y"] = st.number_input("Last Wave", value=sp.get("LAST_WAVE_Y", 80.0), step=1.0, help="LAST_WAVE_Y")
+        C["NUMBER_OF_WAVES"] = st.number_input("Number of Waves", min_value=1, max_value=1000, value=sp.get("NUMBER_OF_WAVES", WAVE_DEFAULTS["NUMBER_OF_WAVES"]), step=1, help="NUMBER_OF_WAVES")
+        C["HORIZON_Y"] = st.number_input("Horizon Position", value=sp.get("HORIZON_Y", WAVE_DEFAULTS["HORIZON_Y"]), step=1.0, help="HORIZON_Y")
+        C["LAST_WAVE_Y"] = st.number_input("Last Wave", value=sp.get("LAST_WAVE_Y", WAVE_DEFAULTS["LAST_WAVE_Y"]), step=1.0, help="LAST_WAVE_Y")
         spacing_types = ["Linear", "Logarithmic"]
-        C["SPACING_TYPE"] = st.selectbox("Spacing Type", spacing_types, index=spacing_types.index(sp.get("SPACING_TYPE", "Logarithmic")), help="SPACING_TYPE")
-        C["WAVE_SPACING_RANDOMNESS"] = st.number_input("Wave Spacing Randomness", value=sp.get("WAVE_SPACING_RANDOMNESS", 0.0), min_value=0.0, max_value=1.0, step=0.05, help="WAVE_SPACING_RANDOMNESS")
+        C["SPACING_TYPE"] = st.selectbox("Spacing Type", spacing_types, index=spacing_types.index(sp.get("SPACING_TYPE", WAVE_DEFAULTS["SPACING_TYPE"])), help="SPACING_TYPE")
+        C["WAVE_SPACING_RANDOMNESS"] = st.number_input("Wave Spacing Randomness", value=sp.get("WAVE_SPACING_RANDOMNESS", WAVE_DEFAULTS["WAVE_SPACING_RANDOMNESS"]), min_value=0.0, max_value=1.0, step=0.05, help="WAVE_SPACING_RANDOMNESS")
     
     with st.sidebar.expander("Wave Settings"):
-        C["NUMBER_OF_WAVE_POINTS_MIN"] = st.number_input("Min number of Wave Points", min_value=1, value=sp.get("NUMBER_OF_WAVE_POINTS_MIN", 2), step=1, help="NUMBER_OF_WAVE_POINTS_MIN")
-        C["NUMBER_OF_WAVE_POINTS_MAX"] = st.number_input("Max number of Wave Points", min_value=1, value=sp.get("NUMBER_OF_WAVE_POINTS_MAX", 6), step=1, help="NUMBER_OF_WAVE_POINTS_MAX")
-        C["WAVE_HEIGHT_FACTOR"] = st.number_input("Wave Height Indicator", value=sp.get("WAVE_HEIGHT_FACTOR", 15.0), step=1.0, help="WAVE_HEIGHT_FACTOR")
-        C["FIRST_POINT_START_MAX"] = st.number_input("Max First Point Start", value=sp.get("FIRST_POINT_START_MAX", 0.0), step=1.0, help="FIRST_POINT_START_MAX")
-        C["WAVE_POINT_SPACING_RANDOMNESS"] = st.number_input("Point Spacing Randomness", value=sp.get("WAVE_POINT_SPACING_RANDOMNESS", 0.0), min_value=0.0, max_value=1.0, step=0.05, help="WAVE_POINT_SPACING_RANDOMNESS")
-        C["CONTROL_ARM_LENGTH"] = st.number_input("Control Arm Length (Relative)", value=sp.get("CONTROL_ARM_LENGTH", 0.2), min_value=0.0, step=0.01, help="CONTROL_ARM_LENGTH")
+        C["NUMBER_OF_WAVE_POINTS_MIN"] = st.number_input("Min number of Wave Points", min_value=1, value=sp.get("NUMBER_OF_WAVE_POINTS_MIN", WAVE_DEFAULTS["NUMBER_OF_WAVE_POINTS_MIN"]), step=1, help="NUMBER_OF_WAVE_POINTS_MIN")
+        C["NUMBER_OF_WAVE_POINTS_MAX"] = st.number_input("Max number of Wave Points", min_value=1, value=sp.get("NUMBER_OF_WAVE_POINTS_MAX", WAVE_DEFAULTS["NUMBER_OF_WAVE_POINTS_MAX"]), step=1, help="NUMBER_OF_WAVE_POINTS_MAX")
+        C["WAVE_HEIGHT_FACTOR"] = st.number_input("Wave Height Indicator", value=sp.get("WAVE_HEIGHT_FACTOR", WAVE_DEFAULTS["WAVE_HEIGHT_FACTOR"]), step=1.0, help="WAVE_HEIGHT_FACTOR")
+        C["FIRST_POINT_START_MAX"] = st.number_input("Max First Point Start", value=sp.get("FIRST_POINT_START_MAX", WAVE_DEFAULTS["FIRST_POINT_START_MAX"]), step=1.0, help="FIRST_POINT_START_MAX")
+        C["WAVE_POINT_SPACING_RANDOMNESS"] = st.number_input("Point Spacing Randomness", value=sp.get("WAVE_POINT_SPACING_RANDOMNESS", WAVE_DEFAULTS["WAVE_POINT_SPACING_RANDOMNESS"]), min_value=0.0, max_value=1.0, step=0.05, help="WAVE_POINT_SPACING_RANDOMNESS")
+        C["CONTROL_ARM_LENGTH"] = st.number_input("Control Arm Length (Relative)", value=sp.get("CONTROL_ARM_LENGTH", WAVE_DEFAULTS["CONTROL_ARM_LENGTH"]), min_value=0.0, step=0.01, help="CONTROL_ARM_LENGTH")
         
     with st.sidebar.expander("Color Settings"):
-        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", True), help="SINGLE_COLOR")
+        C["SINGLE_COLOR"] = st.checkbox("Use Single Color", value=sp.get("SINGLE_COLOR", WAVE_DEFAULTS["SINGLE_COLOR"]), help="SINGLE_COLOR")
         if (C["SINGLE_COLOR"]):
-            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", "#FF4800"), help="FILL_COLOR")
+            C["FILL_COLOR"] = st.color_picker("Choose Color", value=sp.get("FILL_COLOR", WAVE_DEFAULTS["FILL_COLOR"]), help="FILL_COLOR")
         
-        C["HAS_NOISE"] = st.checkbox("Has Noise", value=sp.get("HAS_NOISE", True), help="HAS_NOISE")
-        C["ADD_FADING_EFFECT"] = st.checkbox("Add Fade", value=sp.get("ADD_FADING_EFFECT", True), help="ADD_FADING_EFFECT")
+        C["HAS_NOISE"] = st.checkbox("Has Noise", value=sp.get("HAS_NOISE", WAVE_DEFAULTS["HAS_NOISE"]), help="HAS_NOISE")
+        C["ADD_FADING_EFFECT"] = st.checkbox("Add Fade", value=sp.get("ADD_FADING_EFFECT", WAVE_DEFAULTS["ADD_FADING_EFFECT"]), help="ADD_FADING_EFFECT")
         if C["ADD_FADING_EFFECT"]:
-            C["INVERT_FADE"] = st.checkbox("Invert Fade", value=sp.get("INVERT_FADE", False), help="INVERT_FADE")
-            C["MIN_LUMINOSITY"] = st.number_input("Minimum Luminosity", min_value=0.0, max_value=1.0, value=sp.get("MIN_LUMINOSITY", 1.0), step=0.1, help="MIN_LUMINOSITY")
-            C["MAX_LUMINOSITY"] = st.number_input("Maximum Luminosity", min_value=0.0, max_value=1.0, value=sp.get("MAX_LUMINOSITY", 0.2), step=0.1, help="MAX_LUMINOSITY")
+            C["INVERT_FADE"] = st.checkbox("Invert Fade", value=sp.get("INVERT_FADE", WAVE_DEFAULTS["INVERT_FADE"]), help="INVERT_FADE")
+            C["MIN_LUMINOSITY"] = st.number_input("Minimum Luminosity", min_value=0.0, max_value=1.0, value=sp.get("MIN_LUMINOSITY", WAVE_DEFAULTS["MIN_LUMINOSITY"]), step=0.1, help="MIN_LUMINOSITY")
+            C["MAX_LUMINOSITY"] = st.number_input("Maximum Luminosity", min_value=0.0, max_value=1.0, value=sp.get("MAX_LUMINOSITY", WAVE_DEFAULTS["MAX_LUMINOSITY"]), step=0.1, help="MAX_LUMINOSITY")
 
     with st.sidebar.expander("Shadow Settings"):
-        C["HAS_SHADOW"] = st.checkbox("Add Wave Shadow", value=sp.get("HAS_SHADOW", False), help="HAS_SHADOW")
+        C["HAS_SHADOW"] = st.checkbox("Add Wave Shadow", value=sp.get("HAS_SHADOW", WAVE_DEFAULTS["HAS_SHADOW"]), help="HAS_SHADOW")
         if C["HAS_SHADOW"]:
             if C["SINGLE_COLOR"]:
-                C["SHADOW_COLOR_COMPLEMENTARY"] = st.checkbox("Complementary Color", value=sp.get("SHADOW_COLOR_COMPLEMENTARY", False), help="SHADOW_COLOR_COMPLEMENTARY")
-            C["SHADOW_COLOR"] = st.color_picker("Shadow Color", utils.complementary_color(C["FILL_COLOR"]) if C["SINGLE_COLOR"] and C["SHADOW_COLOR_COMPLEMENTARY"] else sp.get("SHADOW_COLOR", "#000"), help="SHADOW_COLOR")
-            C["SHADOW_BLURRINESS"] = st.number_input("Shadow Blurriness", value=sp.get("SHADOW_BLURRINESS", 20), min_value=0, step=1, help="SHADOW_BLURRINESS")
-            C["SHADOW_OPACITY"] = st.number_input("Shadow Opacity", min_value=0.0, max_value=1.0, value=sp.get("SHADOW_OPACITY", 0.2), step=0.05, help="SHADOW_OPACITY")
-            C['SHADOW_OFFSET_Y'] = st.number_input("Shadow Offset (relative, negative)", value=sp.get("SHADOW_OFFSET_Y", 2.0), step=1.0, help="SHADOW_OFFSET_Y")
+                C["SHADOW_COLOR_COMPLEMENTARY"] = st.checkbox("Complementary Color", value=sp.get("SHADOW_COLOR_COMPLEMENTARY", WAVE_DEFAULTS["SHADOW_COLOR_COMPLEMENTARY"]), help="SHADOW_COLOR_COMPLEMENTARY")
+            C["SHADOW_COLOR"] = st.color_picker("Shadow Color", utils.complementary_color(C["FILL_COLOR"]) if C["SINGLE_COLOR"] and C["SHADOW_COLOR_COMPLEMENTARY"] else sp.get("SHADOW_COLOR", WAVE_DEFAULTS["SHADOW_COLOR"]), help="SHADOW_COLOR")
+            C["SHADOW_BLURRINESS"] = st.number_input("Shadow Blurriness", value=sp.get("SHADOW_BLURRINESS", WAVE_DEFAULTS["SHADOW_BLURRINESS"]), min_value=0, step=1, help="SHADOW_BLURRINESS")
+            C["SHADOW_OPACITY"] = st.number_input("Shadow Opacity", min_value=0.0, max_value=1.0, value=sp.get("SHADOW_OPACITY", WAVE_DEFAULTS["SHADOW_OPACITY"]), step=0.05, help="SHADOW_OPACITY")
+            C['SHADOW_OFFSET_Y'] = st.number_input("Shadow Offset (relative, negative)", value=sp.get("SHADOW_OFFSET_Y", WAVE_DEFAULTS["SHADOW_OFFSET_Y"]), step=1.0, help="SHADOW_OFFSET_Y")
     
     with st.sidebar.expander("Wave Animation Settings"):
-        C['ANIMATION_STRENGTH'] = st.number_input("Animation Strength", value=sp.get("SPLOTCH_ANIMATION_STRENGTH", 0.15), min_value=0.0, step=0.05, help="SPLOTCH_ANIMATION_STRENGTH")
+        C['ANIMATION_STRENGTH'] = st.number_input("Animation Strength", value=sp.get("SPLOTCH_ANIMATION_STRENGTH", WAVE_DEFAULTS["ANIMATION_STRENGTH"]), min_value=0.0, step=0.05, help="SPLOTCH_ANIMATION_STRENGTH")
+
+def wave_shapes(C, OTHER_CONFIG, seed):
+    return wave_geometry(C, seed)
+
+def wave_paths(C, OTHER_CONFIG, seed, geometry):
+    # the from and to path data of every wave, on the canvas
+    return list(zip(*get_path_data(C, geometry)))
+
+def wave_colors(C, OTHER_CONFIG, seed):
+    # the fill of every wave (fading with its distance if asked to) and the noise color
+    fills, fill = [], substream(seed, "fill")
+    for i in range(C["NUMBER_OF_WAVES"]):
+        fill_color = C["FILL_COLOR"] if C["SINGLE_COLOR"] else pick(OTHER_CONFIG["COLORS"], uniform(fill, i))
+        if C["ADD_FADING_EFFECT"]:
+            luminosity = C["MAX_LUMINOSITY"] - i * (C["MAX_LUMINOSITY"] - C["MIN_LUMINOSITY"])/C["NUMBER_OF_WAVES"]
+            fill_color = utils.hex_to_rgb_with_luminosity(fill_color, luminosity if C["INVERT_FADE"] else 1 - luminosity)
+        fills.append(fill_color)
+    return {"fills": fills, "noise": pick(OTHER_CONFIG["COLORS"], uniform(substream(seed, "noise"), 0)) if C["HAS_NOISE"] else ""}
+
+# the stages of generate_waves and the settings each of them depends on, see stages.py.
+# everything else (shadows, durations, ...) only affects how their results are drawn, which is cheap
+WAVE_STAGES = [
+    Stage("geometry", wave_shapes, keys=[
+        "NUMBER_OF_WAVES", "SPACING_TYPE", "HORIZON_Y", "LAST_WAVE_Y", "WAVE_SPACING_RANDOMNESS", "NUMBER_OF_WAVE_POINTS_MIN",
+        "NUMBER_OF_WAVE_POINTS_MAX", "FIRST_POINT_START_MAX", "WAVE_POINT_SPACING_RANDOMNESS", "WAVE_HEIGHT_FACTOR",
+        "ANIMATION_STRENGTH", "CONTROL_ARM_LENGTH",
+    ]),
+    Stage("paths", wave_paths, keys=["W", "H", "PATH_PRECISION", "COMPACT_OUTPUT"], inputs=["geometry"]),
+    Stage("colors", wave_colors, keys=[
+        "NUMBER_OF_WAVES", "SINGLE_COLOR", "FILL_COLOR", "COLOR_SCHEME", "ADD_FADING_EFFECT", "MIN_LUMINOSITY", "MAX_LUMINOSITY",
+        "INVERT_FADE", "HAS_NOISE",
+    ]),
+]
+
+def generate_waves(dwg, C, OTHER_CONFIG, rng=random):
+    stages = run_stages("waves", WAVE_STAGES, C, OTHER_CONFIG, rng)
 
-def generate_waves(dwg, C, OTHER_CONFIG):
-    regular_wave_horizons = utils.linear_interpolation(C["HORIZON_Y"], C["LAST_WAVE_Y"], C["NUMBER_OF_WAVES"]) if C["SPACING_TYPE"] == "Linear" else utils.log_interpolation(C["HORIZON_Y"], C["LAST_WAVE_Y"], C["NUMBER_OF_WAVES"])
+    with span("defs"): add_shadow_filter(dwg, C)
+    with span("elements"): add_waves(dwg, C, stages)
+
+    if C["HAS_NOISE"]:
+        rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=stages["colors"]["noise"], fill_opacity=0.2, filter="url(#noiseFilter)")
+        dwg.add(rect)
     
+    return dwg
+
+def add_shadow_filter(dwg, C):
     # Define the shadow filter using feGaussianBlur and feOffset
     if C["HAS_SHADOW"]: 
         filter_element = dwg.filter(id="shadow", x="-50%", y="-50%", width="200%", height="200%")
@@ -58,68 +136,8 @@ def generate_waves(dwg, C, OTHER_CONFIG):
     
         dwg.defs.add(filter_element)
 
-    # create points
-    for i, regular_horizon in enumerate(regular_wave_horizons):
-        # calculate the minimum distance between the current horizon and the previous and next ones...
-        # only this complicated because of non-linear steps...
-        min_horizon_dist = 0
-        if i == 0 and len(regular_wave_horizons) > 1: min_horizon_dist = abs(regular_wave_horizons[i+1] - regular_horizon) 
-        elif i == len(regular_wave_horizons) - 1: min_horizon_dist = abs(regular_horizon - regular_wave_horizons[i-1])
-        else: min_horizon_dist = min(abs(regular_wave_horizons[i+1] - regular_horizon), abs(regular_horizon - regular_wave_horizons[i-1]))
-        
-        # define the currrent horizon
-        horizon = regular_horizon + C["WAVE_SPACING_RANDOMNESS"] * min_horizon_dist * (random.random() - 0.5)
-        start_point = (0, 100)
-        wave_points = []
-        number_of_wave_points = random.choice(range(C["NUMBER_OF_WAVE_POINTS_MIN"], C["NUMBER_OF_WAVE_POINTS_MAX"] + 1))
-        
-        first_wave_point_x = C["FIRST_POINT_START_MAX"] * random.random()
-        # TODO: To do the animation properly, I'd likely want to generate a separate set of points.
-        # That would then also change the calculation of the control points for the to_path below...
-        for j in range(number_of_wave_points):
-            regular_x = first_wave_point_x + (j + 1) * (100 - first_wave_point_x)/(number_of_wave_points + 1)
-            regular_y = horizon
-            x = regular_x + (100/number_of_wave_points) * C["WAVE_POINT_SPACING_RANDOMNESS"] * (random.random() - 0.5)
-            y = regular_y + C["WAVE_HEIGHT_FACTOR"] * (random.random() - 0.5)
-            
-            wave_points.append((x, y))
-            
-        end_point = (100, 100)
-        
-        # generate the path TODO: Make into a standalone function
-        from_path_data = f"M {w(start_point[0], C['W'])},{h(start_point[1], C['H'])}\n"
-        from_path_data += f"L {w(start_point[0], C['W'])},{h(horizon, C['H'])}\n"
-        to_path_data = from_path_data # start off with the same to_path
-        
-        for k, (p_x, p_y) in enumerate(wave_points):
-            p_prev = (start_point[0], horizon) if k == 0 else wave_points[k-1]
-            p_next = (end_point[0], horizon) if k == len(wave_points) - 1 else wave_points[k+1]
-            control_x, control_y = utils.calculate_control(p_prev, (p_x, p_y), p_next, C["CONTROL_ARM_LENGTH"])
-            from_path_data += f"S {w(control_x, C['W'])},{h(control_y, C['H'])} {w(p_x, C['W'])},{h(p_y, C['H'])}\n"
-            to_path_data += f"S {w(control_x, C['W'])},{h(control_y, C['H'])} {w(p_x, C['W'])},{h((1 + C['ANIMATION_STRENGTH'] * (random.random() - 0.5)) * p_y, C['H'])}\n"
-        
-        # construct the the final leg
-        control_x = wave_points[-1][0] + 0.5 * (end_point[0] - wave_points[-1][0])
-        control_y = wave_points[-1][1] + 0.5 * (horizon - wave_points[-1][1])
-        
-        from_path_data += f"S {w(control_x, C['W'])},{h(control_y, C['H'])} {w(end_point[0], C['W'])},{h(horizon, C['H'])}\n"
-        from_path_data += f"L {w(end_point[0], C['W'])},{h(end_point[1], C['H'])}\n"
-        from_path_data += f"Z"
-        
-        # add the same endpoint logic to the to_path
-        to_path_data += f"S {w(control_x, C['W'])},{h(control_y, C['H'])} {w(end_point[0], C['W'])},{h(horizon, C['H'])}\n"
-        to_path_data += f"L {w(end_point[0], C['W'])},{h(end_point[1], C['H'])}\n"
-        to_path_data += f"Z"
-        
-        from_path = from_path_data.replace('\n', ' ').strip()
-        to_path = to_path_data.replace('\n', ' ').strip()
-        
-        # color stuffs...
-        fill_color = C["FILL_COLOR"] if C["SINGLE_COLOR"] else random.choice(OTHER_CONFIG["COLORS"])
-        if C["ADD_FADING_EFFECT"]:
-            luminosity = C["MAX_LUMINOSITY"] - i * (C["MAX_LUMINOSITY"] - C["MIN_LUMINOSITY"])/C["NUMBER_OF_WAVES"]
-            fill_color = utils.hex_to_rgb_with_luminosity(fill_color, luminosity if C["INVERT_FADE"] else 1 - luminosity) 
-        
+def add_waves(dwg, C, stages):
+    for (from_path, to_path), fill_color in zip(stages["paths"], stages["colors"]["fills"]):
         wave = dwg.path(d=from_path, fill=fill_color)
         if C["HAS_SHADOW"]: wave_shadow = dwg.path(d=from_path, fill="blue", filter="url(#shadow)")
         
@@ -141,9 +159,101 @@ def generate_waves(dwg, C, OTHER_CONFIG):
         
         if C["HAS_SHADOW"]: dwg.add(wave_shadow)
         dwg.add(wave)
-        
-    if C["HAS_NOISE"]:
-        rect = dwg.rect(insert=(0, 0), size=(C['W'], C['H']), fill=random.choice(OTHER_CONFIG["COLORS"]), fill_opacity=0.2, filter="url(#noiseFilter)")
-        dwg.add(rect)
+
+def wave_geometry(C, seed):
+    """
+    Compute all waves at once.
+
+    Waves have different numbers of points, so the point arrays are padded to the
+    largest number of points; entries past counts[i] are meaningless.
+
+    Args:
+        C (dict): The config.
+        seed (int): The stream all randomness of the waves derives from. Every wave has its own random numbers
+            (see streams.uniforms), their horizons still spread out over the same range when waves are added.
+
+    Returns:
+        dict: horizons (n,) and counts (n,), the (n, m, 2) arrays points and controls, the (n, m)
+        array to_y holding the animated y coordinates and the (n, 2) controls of the final legs.
+        All coordinates are relative to the canvas (0-100).
+    """
+    n = C["NUMBER_OF_WAVES"]
+    interpolation = utils.linear_interpolation if C["SPACING_TYPE"] == "Linear" else utils.log_interpolation
+    regular_horizons = np.asarray(interpolation(C["HORIZON_Y"], C["LAST_WAVE_Y"], n), dtype=float)
     
-    return dwg
+    # the minimum distance between each horizon and its neighbours, only this complicated because of non-linear steps...
+    gaps = np.abs(np.diff(regular_horizons))
+    min_horizon_dist = np.minimum(np.append(np.inf, gaps), np.append(gaps, np.inf))
+    min_horizon_dist[np.isinf(min_horizon_dist)] = 0
+    
+    horizons = regular_horizons + C["WAVE_SPACING_RANDOMNESS"] * min_horizon_dist * (uniforms(substream(seed, "horizon"), n) - 0.5)
+    point_range = C["NUMBER_OF_WAVE_POINTS_MAX"] + 1 - C["NUMBER_OF_WAVE_POINTS_MIN"]
+    counts = C["NUMBER_OF_WAVE_POINTS_MIN"] + (point_range * uniforms(substream(seed, "points"), n)).astype(int)
+    first_x = C["FIRST_POINT_START_MAX"] * uniforms(substream(seed, "start"), n)
+    j = np.arange(counts.max())
+    
+    # TODO: To do the animation properly, I'd likely want to generate a separate set of points.
+    # That would then also change the calculation of the control points for the to_path below...
+    regular_x = first_x[:, None] + (j + 1) * (100 - first_x[:, None])/(counts[:, None] + 1)
+    x = regular_x + (100/counts[:, None]) * C["WAVE_POINT_SPACING_RANDOMNESS"] * (uniforms(substream(seed, "spacing"), n, j.size) - 0.5)
+    y = horizons[:, None] + C["WAVE_HEIGHT_FACTOR"] * (uniforms(substream(seed, "height"), n, j.size) - 0.5)
+    to_y = (1 + C['ANIMATION_STRENGTH'] * (uniforms(substream(seed, "animation"), n, j.size) - 0.5)) * y
+    points = np.stack((x, y), axis=-1)
+    
+    # pad each wave with its start and end point on the horizon, so that the neighbours
+    # of point k are simply entries k and k + 2 (see utils.calculate_control)
+    rows = np.arange(n)
+    extended = np.zeros((n, j.size + 2, 2))
+    extended[:, 0] = np.stack((np.zeros(n), horizons), axis=-1)
+    extended[:, 1:-1] = points
+    extended[rows, counts + 1] = np.stack((np.full(n, 100.0), horizons), axis=-1)
+    controls = points - C["CONTROL_ARM_LENGTH"] * (extended[:, 2:] - extended[:, :-2])
+    
+    # the final leg goes halfway from the last point to the end point
+    last_points = points[rows, counts - 1]
+    final_controls = last_points + 0.5 * (extended[rows, counts + 1] - last_points)
+    
+    return {
+        "horizons": horizons,
+        "counts": counts,
+        "points": points,
+        "controls": controls,
+        "to_y": to_y,
+        "final_controls": final_controls,
+    }
+
+def get_path_data(C, geometry):
+    # serialize the from and to paths of all waves. every wave is laid out as
+    # M start, L horizon, one S per point, the S of the final leg, L end, Z
+    n, m = geometry["points"].shape[:2]
+    rows = np.arange(n)[:, None]
+    counts = geometry["counts"]
+    horizons = geometry["horizons"]
+    
+    coordinates = np.zeros((n, 2 * m + 5, 2))
+    coordinates[:, 0] = (0, 100)
+    coordinates[:, 1, 1] = horizons
+    coordinates[:, 2:2 * m + 2] = np.stack((geometry["controls"], geometry["points"]), axis=2).reshape(n, 2 * m, 2)
+    
+    # the to paths only differ in the y coordinates of the points
+    to_coordinates = coordinates.copy()
+    to_coordinates[:, 3:2 * m + 2:2, 1] = geometry["to_y"]
+    
+    # the final leg, end point and bottom corner come right after each wave's last point
+    tail = np.stack((geometry["final_controls"], np.stack((np.full(n, 100.0), horizons), axis=-1), np.full((n, 2), 100.0)), axis=1)
+    tail_index = (2 * counts + 2)[:, None] + np.arange(3)
+    coordinates[rows, tail_index] = tail
+    to_coordinates[rows, tail_index] = tail
+    from_coordinates, to_coordinates = to_canvas(coordinates, C), to_canvas(to_coordinates, C)
+    
+    from_paths, to_paths = [], []
+    for count, from_wave, to_wave in zip(counts.tolist(), from_coordinates, to_coordinates):
+        commands = "ML" + "S" * (count + 1) + "LZ"
+        if C["COMPACT_OUTPUT"]:
+            from_path, to_path = compact_path_data(commands, [from_wave[:2 * count + 5], to_wave[:2 * count + 5]], C["PATH_PRECISION"])
+        else:
+            from_path, to_path = path_data(commands, from_wave[:2 * count + 5], C["PATH_PRECISION"]), path_data(commands, to_wave[:2 * count + 5], C["PATH_PRECISION"])
+        from_paths.append(from_path)
+        to_paths.append(to_path)
+    
+    return from_paths, to_paths